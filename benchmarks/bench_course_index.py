@@ -0,0 +1,54 @@
+import argparse
+import random
+import time
+
+from benchmarks.payloads import make_payload
+from catalog import CatalogSnapshot
+
+#########################################
+# get_course_name: Scan vs Index        #
+#########################################
+
+def legacy_course_name(courses, index_number):
+    """The pre-index implementation: walk every course and section."""
+    for course in courses:
+        course_title = course.get("title", "Unknown Course")
+        subject = course.get("subject", "Unknown Subject")
+        course_number = course.get("courseNumber", "XXX")
+        for section in course.get("sections", []):
+            if str(section.get("index")) == str(index_number):
+                return f"{subject} {course_number} - {course_title}"
+    return f"Unknown Course ({index_number})"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare get_course_name lookups: linear scan vs the catalog snapshot.")
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    courses = make_payload(courses=args.courses)
+    all_indexes = [section["index"] for course in courses for section in course["sections"]]
+    rng = random.Random(1)
+    lookups = [rng.choice(all_indexes) for _ in range(args.lookups)]
+    print(f"Catalog: {len(courses)} courses, {len(all_indexes)} sections; {len(lookups)} lookups")
+
+    start = time.perf_counter()
+    snapshot = CatalogSnapshot.from_courses(courses)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_course_name(courses, i) for i in lookups]
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [snapshot.course_name(i) for i in lookups]
+    lookup = time.perf_counter() - start
+
+    assert legacy == indexed
+    print(f"index build:     {build * 1e3:9.2f} ms (once per refresh)")
+    print(f"linear scan:     {scan / len(lookups) * 1e6:9.1f} us/lookup")
+    print(f"index lookup:    {lookup / len(lookups) * 1e6:9.3f} us/lookup")
+    print(f"speedup:         {scan / lookup:9.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import contextlib
+import logging
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.payloads import make_payload
+from catalog import CatalogSnapshot, diff_snapshots
+import logs
+
+#########################################
+# Scan-Pass CPU: print Spam vs Logging  #
+#########################################
+
+def legacy_pass(courses):
+    """The pre-snapshot check_courses pass: walk every section and print its status."""
+    open_count = 0
+    for course in courses:
+        for section in course.get("sections", []):
+            index_number = section.get("index")
+            status = section.get("openStatus")
+            print(f"🔎 Course {index_number}: {status}")
+            if str(status).strip().upper() == "TRUE":
+                open_count += 1
+    return open_count
+
+def current_pass(log, previous, snapshot):
+    """Today's pass: diff the bitmaps and log one summary line through the queue."""
+    opened, closed = diff_snapshots(previous, snapshot)
+    log.info("🔎 %s changed: %d opened, %d closed, %d open.", "bench", len(opened), len(closed), snapshot.open_count)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("🔎 opened: %s", ", ".join(opened[:20]))
+    return snapshot.open_count
+
+def flip(courses, rng, ratio):
+    for course in courses:
+        for section in course["sections"]:
+            if rng.random() < ratio:
+                section["openStatus"] = "FALSE" if section["openStatus"] == "TRUE" else "TRUE"
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU time of one scan pass: per-section print() vs diff + queued logging.")
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--passes", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of sections that flip between passes")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    courses = make_payload(courses=args.courses)
+    sections = sum(len(course["sections"]) for course in courses)
+    payloads = []
+    for _ in range(args.passes + 1):
+        flip(courses, rng, args.churn)
+        payloads.append([{**course, "sections": [dict(section) for section in course["sections"]]} for course in courses])
+    snapshots = [CatalogSnapshot.from_courses(payload) for payload in payloads]
+
+    with tempfile.TemporaryFile("w", encoding="utf-8") as out:
+        with contextlib.redirect_stdout(out):
+            start = time.process_time()
+            for payload in payloads[1:]:
+                legacy_pass(payload)
+            out.flush()
+            legacy = (time.process_time() - start) / args.passes
+
+        sys.stdout = out  # the queue listener's StreamHandler writes here
+        try:
+            listener = logs.setup_logging("INFO")
+            log = logging.getLogger("bench")
+            start = time.process_time()
+            for previous, snapshot in zip(snapshots, snapshots[1:]):
+                current_pass(log, previous, snapshot)
+            listener.stop()  # include the writer thread's work
+            current = (time.process_time() - start) / args.passes
+        finally:
+            sys.stdout = sys.__stdout__
+
+    print(f"Catalog: {args.courses} courses, {sections} sections; {args.passes} passes, {args.churn:.0%} churn")
+    print(f"print per section:   {legacy * 1e3:9.2f} ms CPU/pass ({sections} lines)")
+    print(f"diff + queued log:   {current * 1e3:9.3f} ms CPU/pass (1 line)")
+    print(f"speedup:             {legacy / current:9.0f}x")
+
+if __name__ == "__main__":
+    main()
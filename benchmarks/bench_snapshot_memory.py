@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.payloads import make_payload
+
+#########################################
+# Peak RSS: Parsed Payload vs Snapshot  #
+#########################################
+
+CHUNK_SIZE = 64 * 1024
+
+def peak_rss_mb():
+    # VmHWM belongs to this address space; ru_maxrss can carry over the parent's peak across fork/exec.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+def run_mode(mode, path):
+    """Load the catalog the way ``mode`` does and report peak RSS (runs in a fresh process)."""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "dict":
+        # Pre-snapshot behaviour: read the whole body, json.loads it, keep the nested lists/dicts.
+        with open(path, "rb") as f:
+            body = f.read()
+        data = json.loads(body)
+        del body
+        open_count = sum(1 for course in data for section in course.get("sections", [])
+                         if str(section.get("openStatus")).strip().upper() == "TRUE")
+    else:
+        from catalog import CatalogBuilder
+        builder = CatalogBuilder()
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                builder.feed(chunk)
+        data = builder.finish()
+        open_count = data.open_count
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "open": open_count, "parse_s": round(elapsed, 3),
+                      "baseline_mb": round(baseline, 1), "peak_mb": round(peak_rss_mb(), 1)}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of the parsed courses.json dict vs the streamed CatalogSnapshot.")
+    parser.add_argument("--courses", type=int, default=4500)
+    parser.add_argument("--payload", help="real courses.json to measure instead of a synthetic one")
+    parser.add_argument("--mode", choices=["dict", "snapshot"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        run_mode(args.mode, args.payload)
+        return
+
+    path = args.payload
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as f:
+            json.dump(make_payload(courses=args.courses), f)
+    try:
+        print(f"Payload: {os.path.getsize(path) / 1e6:.1f} MB")
+        for mode in ("dict", "snapshot"):
+            result = subprocess.run([sys.executable, "-m", "benchmarks.bench_snapshot_memory", "--mode", mode, "--payload", path],
+                                    capture_output=True, text=True, check=True)
+            stats = json.loads(result.stdout)
+            print(f"{mode:9s} peak RSS {stats['peak_mb']:7.1f} MB (+{stats['peak_mb'] - stats['baseline_mb']:.1f} MB over interpreter), "
+                  f"parse {stats['parse_s']:.2f}s, {stats['open']} open")
+    finally:
+        if args.payload is None:
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+#########################################
+# Fake Discord Client                   #
+#########################################
+
+class FakeUser:
+    def __init__(self, client, user_id):
+        self.client = client
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.discriminator = "0"
+        self.mention = f"<@{user_id}>"
+        self.dm_channel = None
+
+    async def create_dm(self):
+        await self.client.request("create_dm")
+        self.dm_channel = FakeDMChannel(self)
+        return self.dm_channel
+
+    async def send(self, content=None, tts=False, file=None):
+        channel = self.dm_channel or await self.create_dm()
+        await channel.send(content, tts=tts, file=file)
+
+class FakeDMChannel:
+    def __init__(self, user):
+        self.recipient = user
+
+    async def send(self, content=None, tts=False, file=None):
+        client = self.recipient.client
+        await client.request("send")
+        client.sends.append((self.recipient.id, content, time.monotonic()))
+
+class FakeDiscord:
+    """Stands in for the bot: records DMs, adds latency and enforces a rate limit.
+
+    Every REST call (``fetch_user``, ``create_dm`` and ``send``) sleeps ``latency`` seconds and
+    counts against one bucket of ``rate_limit`` calls per ``window`` seconds;
+    calls over the limit raise ``discord.RateLimited`` like the real client.
+    """
+
+    def __init__(self, latency=0.0, rate_limit=None, window=1.0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.sends = []
+        self.calls = {"fetch_user": 0, "create_dm": 0, "send": 0}
+        self.rate_limited = 0
+        self._recent = deque()
+
+    async def request(self, route):
+        self.calls[route] += 1
+        if self.rate_limit is not None:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= self.window:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.rate_limited += 1
+                raise discord.RateLimited(self.window - (now - self._recent[0]))
+            self._recent.append(now)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def fetch_user(self, user_id):
+        await self.request("fetch_user")
+        return FakeUser(self, int(user_id))
+
+    def get_user(self, user_id):
+        return None
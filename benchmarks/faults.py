@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.payloads import make_payload
+from benchmarks.stub_soc import StubSOC
+from soc_client import CircuitBreaker, Source
+import logs
+
+#########################################
+# SOC Outage and Recovery               #
+#########################################
+
+async def run_phase(bot, stub, name, seconds, sources, known_index, interval=0.1):
+    """Sample lookups, breaker state and data health every ``interval`` seconds for one phase."""
+    active, paused = sources
+    requests_before, faulted_before = sum(stub.requests.values()), stub.faulted
+    polled_before = bot.SCHEDULER.poller(active).timestamp
+    started = time.time()
+    lookups, unknown, states, health, first_poll = [], 0, {}, {}, None
+    while time.time() - started < seconds:
+        lookup_started = time.perf_counter()
+        snapshot = await bot.get_catalog(paused)
+        lookups.append(time.perf_counter() - lookup_started)
+        unknown += snapshot.course_name(known_index).startswith("Unknown Course")
+        state = bot.SCHEDULER.breaker_status()[0]
+        states[state] = states.get(state, 0) + 1
+        source_health = bot.catalog_health(active)[0]
+        health[source_health] = health.get(source_health, 0) + 1
+        if first_poll is None and bot.SCHEDULER.poller(active).timestamp > max(polled_before, started):
+            first_poll = time.time() - started
+        await asyncio.sleep(interval)
+    lookups.sort()
+    return {
+        "phase": name,
+        "seconds": seconds,
+        "soc_requests": sum(stub.requests.values()) - requests_before,
+        "faulted_requests": stub.faulted - faulted_before,
+        "lookups": len(lookups),
+        "lookup_p50_ms": round(lookups[len(lookups) // 2] * 1e3, 3),
+        "lookup_max_ms": round(lookups[-1] * 1e3, 3),
+        "unknown_names": unknown,
+        "breaker_samples": states,
+        "health_samples": health,
+        "first_successful_poll_s": round(first_poll, 2) if first_poll is not None else None,
+        "breaker_at_end": bot.SCHEDULER.breaker_status()[1],
+    }
+
+async def run_scenario(args):
+    import discord_bot as bot  # after the environment is set
+
+    payload = make_payload(courses=args.courses, seed=args.seed)
+    known_index = payload[0]["sections"][0]["index"]
+    stub = StubSOC(payload)
+    bot.SCHEDULER.api_base = await stub.start() + "/soc/api"
+    # Short timeouts and cadences so a run takes seconds; the logic is the production one.
+    bot.SCHEDULER.open_interval = args.poll_interval
+    bot.SCHEDULER.timeout = args.timeout
+    bot.SCHEDULER.cadence_options.update(min_interval=args.poll_interval, max_interval=args.poll_interval,
+                                         backoff_max=args.backoff_max, jitter=0)
+    threshold = 10 ** 9 if args.no_breaker else args.threshold
+    bot.SCHEDULER.pool.breaker = CircuitBreaker(threshold=threshold, reset_timeout=args.reset_timeout,
+                                                max_reset_timeout=args.reset_timeout * 4)
+    bot.SOC_STALE_AFTER = args.stale_after
+    active = bot.DEFAULT_SOURCE
+    paused = Source(active.year + 1, active.term, active.campus)  # looked up, never polled
+    await bot.initialize_storage()
+    await bot.REGISTRY.add_snipe("1", active, known_index)
+    bot.SCHEDULER.reconcile()
+    await bot.get_catalog(paused)  # first download of the paused source
+    while bot.SCHEDULER.cached(active) is None:
+        await asyncio.sleep(0.05)
+
+    phases = [await run_phase(bot, stub, "healthy", args.healthy, (active, paused), known_index)]
+    for fault in args.faults:
+        stub.set_fault(fault, delay=args.timeout * 3)
+        phases.append(await run_phase(bot, stub, f"fault:{fault}", args.outage, (active, paused), known_index))
+        stub.set_fault(None)
+        phases.append(await run_phase(bot, stub, f"recovered from {fault}", args.recovery, (active, paused), known_index))
+    await bot.SCHEDULER.close()
+    await bot.DB.close()
+    await stub.stop()
+    return {"breaker": "off" if args.no_breaker else f"threshold {args.threshold}, reset {args.reset_timeout}s",
+            "circuit_opens": bot.SCHEDULER.pool.breaker.opens, "phases": phases}
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the bot's SOC polling through injected outages of a stub SOC "
+                                                 "and report lookups, SOC traffic and recovery per phase.")
+    parser.add_argument("--faults", nargs="+", choices=StubSOC.FAULTS, default=["error", "slow", "reset"])
+    parser.add_argument("--healthy", type=float, default=3.0, help="seconds before the first fault")
+    parser.add_argument("--outage", type=float, default=8.0, help="seconds each fault lasts")
+    parser.add_argument("--recovery", type=float, default=6.0, help="seconds observed after each fault clears")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--backoff-max", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=0.5, help="SOC request timeout (s); the 'slow' fault stalls 3x this")
+    parser.add_argument("--threshold", type=int, default=3, help="failures that open the circuit breaker")
+    parser.add_argument("--reset-timeout", type=float, default=1.0, help="seconds before the breaker's first probe")
+    parser.add_argument("--no-breaker", action="store_true", help="never open the breaker (the old behavior)")
+    parser.add_argument("--stale-after", type=float, default=2.0, help="SOC_STALE_AFTER for the run")
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args()
+
+    logs.setup_logging(args.log_level)
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["SNIPER_DATA_DIR"] = data_dir
+        os.environ["METRICS_PORT"] = "0"
+        results = asyncio.run(run_scenario(args))
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import random
+import sqlite3
+
+#########################################
+# Synthetic SOC Payloads                #
+#########################################
+
+SUBJECTS = ["010", "013", "050", "082", "090", "119", "125", "160", "198", "220",
+            "300", "332", "355", "373", "420", "506", "540", "620", "640", "730",
+            "750", "790", "830", "920", "960"]
+
+def make_payload(courses=4000, sections_per_course=8, open_ratio=0.3, seed=0):
+    """Build a courses.json-shaped list roughly matching the real NB catalog."""
+    rng = random.Random(seed)
+    payload = []
+    next_index = 10000
+    for n in range(courses):
+        subject = SUBJECTS[n % len(SUBJECTS)]
+        course_number = f"{100 + n // len(SUBJECTS):03d}"
+        sections = []
+        for s in range(rng.randint(1, sections_per_course * 2 - 1)):
+            sections.append({
+                "index": f"{next_index:05d}",
+                "number": f"{s + 1:02d}",
+                "openStatus": rng.random() < open_ratio,
+                "openStatusText": "OPEN",
+                "instructors": [{"name": f"PROFESSOR, {chr(65 + s % 26)}"}],
+                "meetingTimes": [{"campusName": "BUSCH", "meetingDay": "M", "startTime": "1020", "endTime": "1140",
+                                  "meetingModeDesc": "LEC", "buildingCode": "ARC", "roomNumber": "103"}],
+                "sectionNotes": "",
+                "comments": [],
+                "examCode": "A",
+                "printed": "Y",
+                "subtitle": "",
+                "sessionDates": None,
+                "specialPermissionAddCode": None,
+                "majors": [],
+                "minors": [],
+                "unitMajors": [],
+                "crossListedSections": [],
+                "sectionEligibility": None,
+            })
+            next_index += 1
+        payload.append({
+            "subject": subject,
+            "courseNumber": course_number,
+            "title": f"SYNTHETIC COURSE {n}",
+            "credits": 3,
+            "campusCode": "NB",
+            "courseString": f"01:{subject}:{course_number}",
+            "synopsisUrl": "",
+            "coreCodes": [],
+            "sections": sections,
+        })
+    return payload
+
+def churn(payload, ratio, rng):
+    """Copy of ``payload`` with about ``ratio`` of its sections' open flags flipped (one poll tick)."""
+    ticked = []
+    for course in payload:
+        sections = course["sections"]
+        if any(rng.random() < ratio for _ in sections):
+            sections = [dict(section, openStatus=not section["openStatus"]) if rng.random() < ratio else section
+                        for section in sections]
+            course = dict(course, sections=sections)
+        ticked.append(course)
+    return ticked
+
+#########################################
+# Synthetic Snipe Databases             #
+#########################################
+
+def make_database(path, indexes, users=20000, snipes_per_user=5, source=(2025, 7, "NB"), hot_ratio=0.2, seed=0):
+    """Create a migrated snipes.db with ``users * snipes_per_user`` snipes and a user_configs row per user.
+
+    ``hot_ratio`` of all picks go to the first 1% of ``indexes``, so a few
+    sections have thousands of subscribers like real gateway courses.
+    Returns the discord ids created.
+    """
+    from storage import migrate
+
+    rng = random.Random(seed)
+    hot = indexes[:max(1, len(indexes) // 100)]
+    discord_ids = [str(100000000000000000 + n) for n in range(users)]
+    conn = sqlite3.connect(path, isolation_level=None)
+    migrate(conn)
+    conn.execute("BEGIN")
+    for discord_id in discord_ids:
+        picks = set()
+        while len(picks) < min(snipes_per_user, len(indexes)):
+            picks.add(rng.choice(hot) if rng.random() < hot_ratio else rng.choice(indexes))
+        conn.executemany("INSERT INTO snipes (discord_id, year, term, campus, index_number, notifications_sent) VALUES (?, ?, ?, ?, ?, 0)",
+                         [(discord_id, *source, index_number) for index_number in picks])
+    conn.executemany("INSERT INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)",
+                     [(discord_id,) for discord_id in discord_ids])
+    conn.execute("COMMIT")
+    conn.close()
+    return discord_ids
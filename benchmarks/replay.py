@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+
+from aiohttp import web
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.payloads import churn, make_database, make_payload
+from catalog import CatalogSnapshot, diff_snapshots, format_index
+from recorder import SnapshotRecorder, iter_archive
+from soc_client import Source
+import logs
+
+#########################################
+# Replay a Recorded SOC Archive         #
+#########################################
+
+def snapshot_to_courses(snapshot):
+    """Rebuild a minimal courses.json payload from a snapshot (what CatalogBuilder reads)."""
+    courses = {}
+    for row, index in enumerate(snapshot.indexes):
+        course = snapshot.course_of[row]
+        entry = courses.get(course)
+        if entry is None:
+            entry = courses[course] = {"subject": snapshot.subjects[course], "courseNumber": snapshot.course_numbers[course],
+                                       "title": snapshot.titles[course], "sections": []}
+        entry["sections"].append({"index": format_index(index), "number": snapshot.section_numbers[row],
+                                  "openStatus": snapshot.row_is_open(row)})
+    return list(courses.values())
+
+class ReplaySOC:
+    """Serves each source's state as of the replay clock, answering like the SOC API (with ETags)."""
+
+    def __init__(self):
+        self.current = {}  # source -> snapshot
+        self._bodies = {}  # (source, feed) -> (snapshot the body was built from, body, etag)
+
+    def _body(self, source, feed):
+        snapshot = self.current[source]
+        cached = self._bodies.get((source, feed))
+        if cached is None or cached[0] is not snapshot:
+            if feed == "courses":
+                # The catalog body only changes with the layout; open flags come from openSections.
+                if cached is not None and cached[0].indexes is snapshot.indexes:
+                    return cached[1], cached[2]
+                document = snapshot_to_courses(snapshot)
+            else:
+                document = snapshot.open_indexes()
+            body = json.dumps(document).encode()
+            cached = self._bodies[(source, feed)] = (snapshot, body, f'"{feed}-{id(snapshot)}"')
+        return cached[1], cached[2]
+
+    async def handle(self, request):
+        feed = request.match_info["feed"]
+        query = request.query
+        source = Source(int(query["year"]), int(query["term"]), query["campus"])
+        if source not in self.current or feed not in ("courses", "openSections"):
+            return web.Response(status=404)
+        body, etag = self._body(source, feed)
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, headers={"ETag": etag, "Content-Type": "application/json"})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/soc/api/{feed}.json", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{self.runner.addresses[0][1]}/soc/api"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1e3, 3)
+    return {"count": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1e3, 3)}
+
+async def replay(args):
+    import discord_bot as bot  # after SNIPER_DATA_DIR is set
+
+    records = list(iter_archive(args.archive))
+    if not records:
+        raise SystemExit(f"{args.archive} has no records")
+    sources = list(dict.fromkeys(source for _, source, _ in records))
+    if args.db:
+        shutil.copy(args.db, bot.SQL_FILE)
+    else:
+        first = next(snapshot for _, source, snapshot in records if source == sources[0])
+        make_database(bot.SQL_FILE, [format_index(index) for index in first.indexes],
+                      users=args.users, snipes_per_user=args.snipes_per_user, source=sources[0], seed=args.seed)
+
+    soc = ReplaySOC()
+    bot.SCHEDULER.api_base = await soc.start()
+    fake = FakeDiscord(latency=args.latency, rate_limit=args.rate_limit)
+    bot.USER_CACHE.client = fake
+    bot.DISPATCHER.latencies = deque()
+    await bot.initialize_storage()
+    bot.DISPATCHER.start()
+
+    # Time from a change appearing in the archive to the bot scanning it (only differs from 0 in scheduler mode).
+    changed_at, detect_lags = {}, []
+    scan = bot.scan_courses
+    async def timed_scan(source, snapshot):
+        previous = bot.LAST_SNAPSHOTS.get(source)
+        if previous is not None and snapshot is not previous:
+            now = time.monotonic()
+            opened, closed = diff_snapshots(previous, snapshot)
+            for index_number in (*opened, *closed):
+                seen = changed_at.pop((source, index_number), None)
+                if seen is not None:
+                    detect_lags.append(now - seen)
+        await scan(source, snapshot)
+    bot.SCHEDULER.on_snapshot = timed_scan
+
+    # Each source's first record is the baseline (as after a warm restart), so the replay only alerts on its transitions.
+    for _, source, snapshot in records:
+        if source not in soc.current:
+            soc.current[source] = bot.LAST_SNAPSHOTS[source] = snapshot
+    started, first_timestamp = time.monotonic(), records[0][0]
+    supervisor = asyncio.create_task(bot.check_courses()) if args.mode == "scheduler" else None
+    for timestamp, source, snapshot in records:
+        if args.speed > 0:
+            delay = (timestamp - first_timestamp) / args.speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        previous = soc.current.get(source)
+        soc.current[source] = snapshot
+        if previous is not None and previous is not snapshot and previous.indexes == snapshot.indexes:
+            now = time.monotonic()
+            for row in snapshot.rows_in_mask(previous.open_mask ^ snapshot.open_mask):
+                changed_at.setdefault((source, format_index(snapshot.indexes[row])), now)
+        if args.mode == "direct":
+            await timed_scan(source, snapshot)
+    replayed = time.monotonic() - started
+    if supervisor is not None:
+        await asyncio.sleep(args.settle)
+        supervisor.cancel()
+    await bot.DISPATCHER.queue.join()
+    drained = time.monotonic() - started
+
+    result = {
+        "archive": os.path.abspath(args.archive),
+        "mode": args.mode,
+        "speed": args.speed,
+        "records": len(records),
+        "sources": [str(source) for source in sources],
+        "recorded_span_s": round(records[-1][0] - first_timestamp, 3),
+        "replay_s": round(replayed, 3),
+        "drained_s": round(drained, 3),
+        "snipes": bot.REGISTRY.count_snipes(),
+        "transitions": bot.SCAN_TRANSITIONS.total(),
+        "alerts_sent": bot.DISPATCHER.sent,
+        "alerts_failed": bot.DISPATCHER.failed,
+        "rate_limited": fake.rate_limited,
+        "alerts_per_s": round(bot.DISPATCHER.sent / drained, 1) if drained else None,
+        "detect_lag": percentiles(detect_lags),
+        "detection_to_dm": percentiles(list(bot.DISPATCHER.latencies)),
+        "discord_calls": fake.calls,
+    }
+    await bot.DISPATCHER.stop()
+    await bot.SCHEDULER.close()
+    await bot.DB.close()
+    await soc.stop()
+    return result
+
+def synthesize(args):
+    """Write an archive of ``ticks`` polls of a synthetic catalog with ``churn`` flips per tick."""
+    rng = random.Random(args.seed)
+    payload = make_payload(courses=args.courses, seed=args.seed)
+    source = Source.parse(args.source)
+    if os.path.exists(args.archive):
+        os.remove(args.archive)
+    recorder = SnapshotRecorder(args.archive, args.record_mode)
+    catalog = CatalogSnapshot.from_courses(payload)
+    timestamp = time.time()
+    for _ in range(args.ticks):
+        recorder.record(source, catalog, timestamp)
+        payload = churn(payload, args.churn, rng)
+        catalog = catalog.with_open_indexes([section["index"] for course in payload for section in course["sections"]
+                                             if section["openStatus"]])[0]
+        timestamp += args.interval
+    recorder.close()
+    print(f"📼 Wrote {recorder.records} record(s), {recorder.bytes_written / 1024:.1f} KiB to {args.archive}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record synthetic SOC archives and replay archives into the bot offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    synth = commands.add_parser("synth", help="write a synthetic archive")
+    synth.add_argument("archive")
+    synth.add_argument("--courses", type=int, default=4000)
+    synth.add_argument("--ticks", type=int, default=120)
+    synth.add_argument("--interval", type=float, default=5.0, help="seconds between recorded polls")
+    synth.add_argument("--churn", type=float, default=0.005)
+    synth.add_argument("--source", default="2025:7:NB")
+    synth.add_argument("--record-mode", choices=("diff", "full"), default="diff")
+    synth.add_argument("--seed", type=int, default=0)
+
+    run = commands.add_parser("run", help="replay an archive (recorded with SOC_RECORD_PATH or synth)")
+    run.add_argument("archive")
+    run.add_argument("--mode", choices=("direct", "scheduler"), default="direct",
+                     help="direct: hand each record to scan_courses; scheduler: serve it and let the pollers find it")
+    run.add_argument("--speed", type=float, default=10.0, help="replay speed multiplier; 0 = as fast as possible")
+    run.add_argument("--settle", type=float, default=5.0, help="scheduler mode: seconds to keep polling after the last record")
+    run.add_argument("--db", help="snipes.db to replay against (copied); default: synthetic")
+    run.add_argument("--users", type=int, default=20000)
+    run.add_argument("--snipes-per-user", type=int, default=5)
+    run.add_argument("--latency", type=float, default=0.05)
+    run.add_argument("--rate-limit", type=int, default=50)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="write the results as JSON to this file")
+    run.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        synthesize(args)
+        return
+    logs.setup_logging(args.log_level)
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["SNIPER_DATA_DIR"] = data_dir
+        os.environ["METRICS_PORT"] = "0"
+        result = asyncio.run(replay(args))
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.payloads import churn, make_database, make_payload
+from benchmarks.stub_soc import StubSOC, open_sections_of
+from catalog import format_index
+import logs
+
+#########################################
+# Synthetic-Load Benchmark Suite        #
+#########################################
+
+class FakeResponse:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, content=None, file=None, ephemeral=False):
+        self.messages.append((content, file))
+
+    async def defer(self, ephemeral=False, thinking=False):
+        pass
+
+    send = send_message
+
+class FakeInteraction:
+    """Just enough of discord.Interaction to call a command's callback directly."""
+
+    def __init__(self, user):
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = self.response
+
+def summarize(durations, **extra):
+    ordered = sorted(durations)
+    result = {
+        "runs": len(ordered),
+        "total_s": round(sum(ordered), 6),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1e3, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1e3, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3, 4),
+        "max_ms": round(ordered[-1] * 1e3, 4),
+    }
+    result.update(extra)
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def bench_scan(bot, stub, payload, args, rng):
+    """check_courses passes end to end: poll the stub's open list, merge, diff and queue alerts."""
+    source = bot.DEFAULT_SOURCE
+    poller = bot.SCHEDULER.poller(source)
+    await bot.scan_courses(source, await poller.get(max_open_age=0))  # baseline
+    transitions_before, alerts_before = bot.SCAN_TRANSITIONS.total(), bot.ALERTS_QUEUED.total()
+    durations = []
+    for _ in range(args.passes):
+        payload = churn(payload, args.churn, rng)
+        stub.set_open_sections(open_sections_of(payload))
+        start = time.perf_counter()
+        await bot.scan_courses(source, await poller.get(max_open_age=0))
+        durations.append(time.perf_counter() - start)
+    await bot.DISPATCHER.queue.join()
+    return payload, summarize(durations, sections=len(poller.snapshot), open=poller.snapshot.open_count,
+                              transitions=bot.SCAN_TRANSITIONS.total() - transitions_before,
+                              alerts_queued=bot.ALERTS_QUEUED.total() - alerts_before)
+
+async def bench_notify(bot, fake, args):
+    """notify_users fan-out for the most-subscribed section, until every DM is delivered."""
+    source = bot.DEFAULT_SOURCE
+    index_number = max(bot.REGISTRY.tracked_indexes(source), key=lambda i: len(bot.REGISTRY.subscribers_of(source, i)))
+    subscribers = len(bot.REGISTRY.subscribers_of(source, index_number))
+    sends_before, limited_before = len(fake.sends), fake.rate_limited
+    fake.latency, fake.rate_limit = args.latency, args.rate_limit
+    start = time.perf_counter()
+    await bot.notify_users(source, index_number)
+    queued = time.perf_counter() - start
+    await bot.DISPATCHER.queue.join()
+    elapsed = time.perf_counter() - start
+    fake.latency, fake.rate_limit = 0, None
+    sent = len(fake.sends) - sends_before
+    return summarize([elapsed], subscribers=subscribers, sent=sent, rate_limited=fake.rate_limited - limited_before,
+                     queue_ms=round(queued * 1e3, 4), sends_per_s=round(sent / elapsed, 1))
+
+async def bench_global_burst(bot, stub, fake, payload, args, rng):
+    """Global sniping through a registration-open burst: one scan pass flipping --burst of all sections, then the digest."""
+    source = bot.DEFAULT_SOURCE
+    poller = bot.SCHEDULER.poller(source)
+    bot.GLOBAL_SNIPING_ENABLED = True
+    admin_id = bot.ADMIN_ID if bot.ADMIN_ID.isdigit() else "1"
+    bot.ADMIN_ID, sends_before = admin_id, len(fake.sends)
+    payload = churn(payload, args.burst, rng)
+    stub.set_open_sections(open_sections_of(payload))
+    start = time.perf_counter()
+    await bot.scan_courses(source, await poller.get(max_open_age=0))
+    scanned = time.perf_counter() - start
+    pending = len(bot.GLOBAL_DIGEST.pending)
+    await bot.GLOBAL_DIGEST.flush()
+    elapsed = time.perf_counter() - start
+    bot.GLOBAL_SNIPING_ENABLED = False
+    await bot.DISPATCHER.queue.join()
+    admin_messages = sum(1 for user_id, _, _ in fake.sends[sends_before:] if user_id == int(admin_id))
+    return payload, summarize([elapsed], transitions=pending, scan_ms=round(scanned * 1e3, 4), admin_messages=admin_messages)
+
+async def bench_coalescing(bot, fake, args, rng):
+    """Registration morning: users each watching every section of one course, all opening in one pass.
+
+    Runs the pass once with one DM per snipe and once with one DM per user,
+    on separate users and courses, and reports Discord REST calls per
+    transition (``cohort_dms`` counts only the whole-course watchers; the
+    rest come from the synthetic database's subscribers of the same
+    sections). DM channels are opened first, as on a bot that has been up.
+    """
+    source = bot.DEFAULT_SOURCE
+    snapshot = bot.LAST_SNAPSHOTS[source]
+    rows_of = {}
+    for row, course in enumerate(snapshot.course_of):
+        rows_of.setdefault(course, []).append(row)
+    courses = rng.sample(sorted(rows_of), 2 * args.morning_courses)
+    results = {}
+    for n, coalesce in enumerate((False, True)):
+        chosen = courses[n::2]
+        users = [str(800000000000000000 + n * 1000000 + u) for u in range(args.morning_users)]
+        for u, user in enumerate(users):
+            for row in rows_of[chosen[u % len(chosen)]]:
+                await bot.REGISTRY.add_snipe(user, source, format_index(snapshot.indexes[row]))
+        for row in (row for course in chosen for row in rows_of[course]):
+            for user, _ in bot.REGISTRY.subscribers_of(source, format_index(snapshot.indexes[row])):
+                await bot.USER_CACHE.get_dm_channel(user)
+        mask = sum(1 << row for course in chosen for row in rows_of[course])
+        closed = snapshot.with_open_bits((snapshot.open_mask & ~mask).to_bytes(len(snapshot.open_bits), "little"))
+        reopened = snapshot.with_open_bits((snapshot.open_mask | mask).to_bytes(len(snapshot.open_bits), "little"))
+        await bot.scan_courses(source, closed)
+        await bot.DISPATCHER.queue.join()
+        bot.ALERT_COALESCING = coalesce
+        calls_before, transitions_before = sum(fake.calls.values()), bot.SCAN_TRANSITIONS.total()
+        sends_before, alerts_before = len(fake.sends), bot.ALERTS_QUEUED.total()
+        start = time.perf_counter()
+        await bot.scan_courses(source, reopened)
+        await bot.DISPATCHER.queue.join()
+        elapsed = time.perf_counter() - start
+        calls = sum(fake.calls.values()) - calls_before
+        cohort = set(map(int, users))
+        transitions = bot.SCAN_TRANSITIONS.total() - transitions_before
+        results["alerts_coalesced" if coalesce else "alerts_per_snipe"] = summarize(
+            [elapsed], users=len(users), transitions=transitions, alerts=bot.ALERTS_QUEUED.total() - alerts_before,
+            dms=len(fake.sends) - sends_before, cohort_dms=sum(1 for user_id, _, _ in fake.sends[sends_before:] if user_id in cohort),
+            discord_calls=calls, calls_per_transition=round(calls / transitions, 3),
+            rate_limited_s=round(calls / args.rate_limit, 1))
+        for user in users:
+            await bot.REGISTRY.clear_snipes(user)
+        snapshot = reopened
+    bot.ALERT_COALESCING = True
+    return results
+
+async def bench_course_name(bot, indexes, args, rng):
+    durations = []
+    for _ in range(args.lookups):
+        index_number = rng.choice(indexes)
+        start = time.perf_counter()
+        await bot.get_course_name(index_number)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+async def bench_add_snipe(bot, indexes, args, rng):
+    durations = []
+    for n in range(args.lookups):
+        discord_id = str(900000000000000000 + n)
+        start = time.perf_counter()
+        await bot.add_snipe(discord_id, rng.choice(indexes))
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+async def bench_admin_list(bot, admin):
+    interaction = FakeInteraction(admin)
+    start = time.perf_counter()
+    await bot.admin_list_snipes.callback(interaction)
+    elapsed = time.perf_counter() - start
+    return summarize([elapsed], rows=bot.REGISTRY.count_snipes(), responses=len(interaction.response.messages))
+
+async def run_suite(args):
+    import discord_bot as bot  # after SNIPER_DATA_DIR is set
+
+    rng = random.Random(args.seed)
+    payload = make_payload(courses=args.courses, sections_per_course=args.sections_per_course,
+                           open_ratio=args.open_ratio, seed=args.seed)
+    indexes = [section["index"] for course in payload for section in course["sections"]]
+    start = time.perf_counter()
+    make_database(bot.SQL_FILE, indexes, users=args.users, snipes_per_user=args.snipes_per_user,
+                  source=bot.DEFAULT_SOURCE, seed=args.seed)
+    database_seconds = time.perf_counter() - start
+
+    stub = StubSOC(payload)
+    base = await stub.start()
+    bot.SCHEDULER.api_base = base + "/soc/api"
+    fake = FakeDiscord()
+    bot.USER_CACHE.client = fake
+    await bot.initialize_storage()
+    bot.DISPATCHER.start()
+
+    results = {}
+    try:
+        payload, results["scan_pass"] = await bench_scan(bot, stub, payload, args, rng)
+        results["notify_fanout"] = await bench_notify(bot, fake, args)
+        payload, results["global_burst"] = await bench_global_burst(bot, stub, fake, payload, args, rng)
+        results.update(await bench_coalescing(bot, fake, args, rng))
+        results["get_course_name"] = await bench_course_name(bot, indexes, args, rng)
+        results["add_snipe"] = await bench_add_snipe(bot, indexes, args, rng)
+        results["admin_list_snipes"] = await bench_admin_list(bot, await fake.fetch_user(bot.ADMIN_ID if bot.ADMIN_ID.isdigit() else 1))
+    finally:
+        await bot.DISPATCHER.stop()
+        await bot.SCHEDULER.close()
+        await bot.DB.close()
+        await stub.stop()
+    return {"database_build_s": round(database_seconds, 3), "cases": results}
+
+def compare(baseline, current):
+    print(f"\n{'case':<20}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for name, result in current["results"]["cases"].items():
+        before = baseline["results"]["cases"].get(name)
+        if before is None:
+            print(f"{name:<20}{'-':>14}{result['mean_ms']:>14.3f}{'new':>10}")
+            continue
+        change = (result["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100 if before["mean_ms"] else 0.0
+        print(f"{name:<20}{before['mean_ms']:>14.3f}{result['mean_ms']:>14.3f}{change:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the scan and notify paths against a stub SOC API, a fake Discord and a synthetic database.")
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--sections-per-course", type=int, default=8)
+    parser.add_argument("--open-ratio", type=float, default=0.3)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of sections flipping per poll tick")
+    parser.add_argument("--burst", type=float, default=0.2, help="fraction of sections flipping in the global sniping burst")
+    parser.add_argument("--passes", type=int, default=20, help="scan passes to time")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--snipes-per-user", type=int, default=5)
+    parser.add_argument("--morning-users", type=int, default=500, help="users watching a whole course in the coalescing case")
+    parser.add_argument("--morning-courses", type=int, default=25, help="courses those users watch, per mode")
+    parser.add_argument("--lookups", type=int, default=500, help="get_course_name lookups and add_snipe calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Discord latency per REST call (s) during fan-out")
+    parser.add_argument("--rate-limit", type=int, default=50, help="fake Discord calls allowed per second during fan-out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --output to diff against")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logs.setup_logging(args.log_level)
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["SNIPER_DATA_DIR"] = data_dir
+        os.environ["METRICS_PORT"] = "0"
+        results = asyncio.run(run_suite(args))
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "params": vars(args),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.payloads import churn, make_database, make_payload
+from benchmarks.stub_soc import StubSOC, open_sections_of
+import logs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#########################################
+# Bot + Poller Worker, End to End       #
+#########################################
+
+async def wait_for(predicate, timeout, what):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Timed out waiting for {what}")
+        await asyncio.sleep(0.05)
+
+def serve_stub(conn, args):
+    """Child process: serve the stub SOC and churn it on request, so its JSON/gzip work stays off the bot's CPU."""
+    async def serve():
+        rng = random.Random(args.seed)
+        payload = make_payload(courses=args.courses, seed=args.seed)
+        stub = StubSOC(payload)
+        conn.send(await stub.start())
+        loop = asyncio.get_running_loop()
+        while await loop.run_in_executor(None, conn.recv) == "churn":
+            before = set(open_sections_of(payload))
+            payload = churn(payload, args.churn, rng)
+            stub.set_payload(payload)
+            conn.send(sorted(set(open_sections_of(payload)) - before))
+        conn.send(stub.requests)
+        await stub.stop()
+    asyncio.run(serve())
+
+async def run_mode(args, data_dir):
+    """Run the bot (and in worker mode the worker process) against a stub SOC; return the measurements."""
+    worker = None
+    if args.mode == "worker":
+        socket_path = os.path.join(data_dir, "poller.sock")
+        os.environ["POLLER_WORKER_SOCKET"] = socket_path
+        worker = subprocess.Popen([sys.executable, os.path.join(ROOT, "worker.py"), "--socket", socket_path, "--log-level", args.log_level])
+    import discord_bot as bot  # after the environment is set
+    import metrics
+
+    payload = make_payload(courses=args.courses, seed=args.seed)  # the same catalog the stub process builds
+    make_database(bot.SQL_FILE, [section["index"] for course in payload for section in course["sections"]],
+                  users=args.users, snipes_per_user=args.snipes_per_user, source=bot.DEFAULT_SOURCE, seed=args.seed)
+    conn, child_conn = multiprocessing.Pipe()
+    stub = multiprocessing.Process(target=serve_stub, args=(child_conn, args), daemon=True)
+    stub.start()
+    loop = asyncio.get_running_loop()
+    bot.SCHEDULER.api_base = await loop.run_in_executor(None, conn.recv) + "/soc/api"
+    # Poll fast and re-download the catalog every round so parsing load shows up where it runs.
+    bot.SCHEDULER.open_interval = args.poll_interval
+    bot.SCHEDULER.catalog_interval = args.catalog_interval
+    bot.SCHEDULER.cadence_options.update(min_interval=args.poll_interval, max_interval=args.poll_interval, jitter=0)
+    fake = FakeDiscord(latency=args.latency)
+    bot.USER_CACHE.client = fake
+    await bot.initialize_storage()
+    bot.DISPATCHER.start()
+    lag_monitor = asyncio.create_task(metrics.monitor_loop_lag(0.02))
+    supervisor = asyncio.create_task(bot.check_courses())
+    await wait_for(lambda: bot.DEFAULT_SOURCE in bot.LAST_SNAPSHOTS, 60, "the first snapshot")
+
+    cpu_started, started = time.process_time(), time.monotonic()
+    metrics.LOOP_LAG_MAX.set(0)
+    opened_at = {}
+    for _ in range(args.rounds):
+        conn.send("churn")
+        opened = await loop.run_in_executor(None, conn.recv)
+        now = time.monotonic()
+        for index_number in opened:
+            opened_at.setdefault(index_number, now)
+        await asyncio.sleep(args.round_interval)
+    await asyncio.sleep(args.settle)
+    await bot.DISPATCHER.queue.join()
+    elapsed, cpu = time.monotonic() - started, time.process_time() - cpu_started
+    conn.send("stop")
+    requests = await loop.run_in_executor(None, conn.recv)
+
+    first_dm = {}
+    for _, content, sent_at in fake.sends:
+        for match in re.finditer(r"\(index (\d+),", content or ""):  # a coalesced DM lists several
+            first_dm.setdefault(match.group(1), sent_at)
+    latencies = sorted(first_dm[index] - opened_at[index] for index in first_dm.keys() & opened_at.keys())
+    result = {
+        "mode": args.mode,
+        "sections": len(bot.LAST_SNAPSHOTS[bot.DEFAULT_SOURCE]),
+        "rounds": args.rounds,
+        "catalog_downloads": requests["courses"],
+        "open_downloads": requests["openSections"],
+        "scan_passes": bot.SCAN_SECONDS.count(),
+        "alerts_sent": bot.DISPATCHER.sent,
+        "bot_cpu_s": round(cpu, 3),
+        "bot_cpu_share": round(cpu / elapsed, 3),
+        "loop_lag_max_ms": round(metrics.LOOP_LAG_MAX.value() * 1e3, 1),
+        "loop_lag_mean_ms": round(metrics.LOOP_LAG_SECONDS.mean() * 1e3, 2),
+        "open_to_dm_p50_ms": round(latencies[len(latencies) // 2] * 1e3, 1) if latencies else None,
+        "open_to_dm_max_ms": round(latencies[-1] * 1e3, 1) if latencies else None,
+    }
+    supervisor.cancel()
+    lag_monitor.cancel()
+    await bot.DISPATCHER.stop()
+    await bot.SCHEDULER.close()
+    await bot.DB.close()
+    stub.join()
+    if worker is not None:
+        worker.terminate()
+        worker.wait()
+        result["worker_exit"] = worker.returncode
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot with in-process polling and with the poller worker process, "
+                                                 "against a stub SOC and a fake Discord, and compare event-loop lag.")
+    parser.add_argument("--mode", choices=("inprocess", "worker", "both"), default="both")
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--round-interval", type=float, default=1.5, help="seconds between SOC changes")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--catalog-interval", type=float, default=1.0, help="seconds before courses.json is re-downloaded")
+    parser.add_argument("--churn", type=float, default=0.005)
+    parser.add_argument("--settle", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--snipes-per-user", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake Discord latency per REST call (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    if args.mode == "both":
+        # discord_bot reads its environment at import, so each mode runs in a fresh interpreter.
+        results = []
+        for mode in ("inprocess", "worker"):
+            command = [sys.executable, "-m", "benchmarks.split_process", "--mode", mode]
+            for name, value in vars(args).items():
+                if name not in ("mode", "output"):
+                    command += [f"--{name.replace('_', '-')}", str(value)]
+            output = subprocess.run(command, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output[output.index("{"):]))
+    else:
+        logs.setup_logging(args.log_level)
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.environ["SNIPER_DATA_DIR"] = data_dir
+            os.environ["METRICS_PORT"] = "0"
+            results = asyncio.run(run_mode(args, data_dir))
+    text = json.dumps(results, indent=2)
+    if args.output and args.mode == "both":
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    sys.exit(main())
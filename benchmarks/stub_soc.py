@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+
+from aiohttp import web
+
+from benchmarks.payloads import make_payload
+
+#########################################
+# Local Stub of the SOC API             #
+#########################################
+
+class Feed:
+    """One JSON document served with an ETag and an optional gzip body."""
+
+    def __init__(self, document):
+        self.body = json.dumps(document).encode()
+        self.gzipped = gzip.compress(self.body)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+
+def open_sections_of(payload):
+    return [section["index"] for course in payload for section in course.get("sections", [])
+            if str(section.get("openStatus")).strip().upper() == "TRUE"]
+
+class StubSOC:
+    """Serves courses.json and openSections.json with ETag/304 and gzip like the real SOC.
+
+    Point the poller at ``<base>/soc/api/courses.json`` and
+    ``<base>/soc/api/openSections.json``. ``set_payload`` replaces the catalog
+    (and derives the open list from it); ``set_open_sections`` changes only the
+    open list, like the live SOC between catalog rebuilds. ``set_fault``
+    makes every request fail in one of the ways the SOC does until cleared.
+    """
+
+    FAULTS = ("error", "slow", "reset", "garbage")
+
+    def __init__(self, payload, open_sections=None):
+        self.requests = {"courses": 0, "openSections": 0}
+        self.not_modified = 0
+        self.faulted = 0
+        self.fault = None
+        self.fault_status = 503
+        self.fault_delay = 30.0
+        self.set_payload(payload, open_sections)
+
+    def set_fault(self, fault=None, status=503, delay=30.0):
+        """Fail every request: "error" answers ``status``, "slow" answers only after
+        ``delay`` seconds, "reset" drops the connection and "garbage" sends a
+        truncated JSON body. ``None`` heals the stub."""
+        if fault not in (None, *self.FAULTS):
+            raise ValueError(f"Unknown fault: {fault}")
+        self.fault, self.fault_status, self.fault_delay = fault, status, delay
+
+    def set_payload(self, payload, open_sections=None):
+        self.courses = Feed(payload)
+        self.set_open_sections(open_sections_of(payload) if open_sections is None else open_sections)
+
+    def set_open_sections(self, open_sections):
+        self.open_sections = Feed(open_sections)
+
+    async def _inject(self, request):
+        """The faulty response for ``request``, or None to serve it normally."""
+        if self.fault is None:
+            return None
+        self.faulted += 1
+        if self.fault == "error":
+            return web.Response(status=self.fault_status, text="Service Unavailable")
+        if self.fault == "slow":
+            await asyncio.sleep(self.fault_delay)
+            return None
+        if self.fault == "reset":
+            request.transport.close()
+            return web.Response(status=500)  # never reaches the client
+        return web.Response(body=b'[{"subject": "198", "sections": [', headers={"Content-Type": "application/json"})
+
+    def _serve(self, request, feed):
+        if request.headers.get("If-None-Match") == feed.etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": feed.etag})
+        headers = {"ETag": feed.etag, "Content-Type": "application/json"}
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return web.Response(body=feed.gzipped, headers=headers)
+        return web.Response(body=feed.body, headers=headers)
+
+    async def handle_courses(self, request):
+        self.requests["courses"] += 1
+        fault = await self._inject(request)
+        return fault if fault is not None else self._serve(request, self.courses)
+
+    async def handle_open_sections(self, request):
+        self.requests["openSections"] += 1
+        fault = await self._inject(request)
+        return fault if fault is not None else self._serve(request, self.open_sections)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/soc/api/courses.json", self.handle_courses)
+        app.router.add_get("/soc/api/openSections.json", self.handle_open_sections)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving in the running loop; returns the base URL."""
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub SOC API locally.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--payload", help="courses.json file to serve (default: synthetic catalog)")
+    parser.add_argument("--open-sections", help="openSections.json file to serve (default: derived from the catalog)")
+    parser.add_argument("--fault", choices=StubSOC.FAULTS, help="fail every request this way")
+    parser.add_argument("--fault-status", type=int, default=503, help="status code of the 'error' fault")
+    parser.add_argument("--fault-delay", type=float, default=30.0, help="seconds the 'slow' fault stalls each response")
+    args = parser.parse_args()
+    payload = load_json(args.payload) if args.payload else make_payload()
+    open_sections = load_json(args.open_sections) if args.open_sections else None
+    stub = StubSOC(payload, open_sections)
+    stub.set_fault(args.fault, args.fault_status, args.fault_delay)
+    web.run_app(stub.app(), host="127.0.0.1", port=args.port)
@@ -0,0 +1,276 @@
+import codecs
+import copy
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import NamedTuple
+
+#########################################
+# Compact Catalog Snapshot              #
+#########################################
+
+class SectionInfo(NamedTuple):
+    subject: str
+    course_number: str
+    title: str
+    section_number: str
+    is_open: bool
+
+    @property
+    def course_name(self):
+        return f"{self.subject} {self.course_number} - {self.title}"
+
+def is_open_status(value):
+    return str(value).strip().upper() == "TRUE"
+
+def format_index(value):
+    return f"{value:05d}"
+
+def parse_index(index_number):
+    try:
+        return int(index_number)
+    except (TypeError, ValueError):
+        return None
+
+def normalize_index(index_number):
+    """The zero-padded key for an index ("9302" -> "09302"), or None if it is not a number."""
+    index = parse_index(index_number)
+    return format_index(index) if index is not None else None
+
+class CatalogSnapshot:
+    """Columnar, read-only view of one courses.json payload.
+
+    Sections are rows: ``indexes`` holds each section's index as an int and
+    ``open_bits`` is a bitmap of open flags, so the scan loop never touches
+    per-section Python objects. Course strings are interned and stored once
+    per course for display. A snapshot is never mutated; a refresh builds a
+    new one and swaps it in.
+    """
+
+    def __init__(self, indexes=None, course_of=None, section_numbers=(), subjects=(), course_numbers=(), titles=(), open_bits=b""):
+        self.indexes = indexes if indexes is not None else array("i")
+        self.course_of = course_of if course_of is not None else array("i")
+        self.section_numbers = list(section_numbers)
+        self.subjects = list(subjects)
+        self.course_numbers = list(course_numbers)
+        self.titles = list(titles)
+        self.open_bits = bytes(open_bits)
+        self.open_mask = int.from_bytes(self.open_bits, "little")
+        self.open_count = self.open_mask.bit_count()
+        self.rows = {index: row for row, index in enumerate(self.indexes)}
+
+    @classmethod
+    def from_courses(cls, courses):
+        builder = CatalogBuilder()
+        for course in courses:
+            builder.add_course(course)
+        return builder.snapshot()
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def row(self, index_number):
+        return self.rows.get(parse_index(index_number))
+
+    def row_is_open(self, row):
+        return bool(self.open_bits[row >> 3] >> (row & 7) & 1)
+
+    def section(self, row):
+        course = self.course_of[row]
+        return SectionInfo(self.subjects[course], self.course_numbers[course], self.titles[course],
+                           self.section_numbers[row], self.row_is_open(row))
+
+    def get(self, index_number):
+        row = self.row(index_number)
+        return None if row is None else self.section(row)
+
+    def course_name(self, index_number):
+        section = self.get(index_number)
+        if section is None:
+            return f"Unknown Course ({index_number})"
+        return section.course_name
+
+    def is_open(self, index_number):
+        row = self.row(index_number)
+        return row is not None and self.row_is_open(row)
+
+    def rows_in_mask(self, mask):
+        """Row numbers of the set bits of ``mask``, scanning only non-zero bytes."""
+        rows = []
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        for offset, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                rows.append(offset * 8 + low.bit_length() - 1)
+                byte ^= low
+        return rows
+
+    def open_indexes(self):
+        return [format_index(self.indexes[row]) for row in self.rows_in_mask(self.open_mask)]
+
+    def with_open_bits(self, open_bits):
+        """Same sections and metadata with a different open-flag bitmap."""
+        snapshot = copy.copy(self)
+        snapshot.open_bits = bytes(open_bits)
+        snapshot.open_mask = int.from_bytes(snapshot.open_bits, "little")
+        snapshot.open_count = snapshot.open_mask.bit_count()
+        return snapshot
+
+    def with_open_indexes(self, open_indexes):
+        """Same sections and metadata, open flags taken from an openSections list.
+
+        Returns (snapshot, unknown) where ``unknown`` lists open indexes this
+        catalog does not contain yet.
+        """
+        bits = bytearray(len(self.open_bits))
+        unknown = []
+        for index_number in open_indexes:
+            row = self.row(index_number)
+            if row is None:
+                unknown.append(index_number)
+                continue
+            bits[row >> 3] |= 1 << (row & 7)
+        return self.with_open_bits(bits), unknown
+
+    def to_bytes(self):
+        """Serialize to the compact binary layout read by ``from_bytes``.
+
+        Layout: a header with the row/course counts, the raw little-endian
+        index and course columns, the open bitmap, then every string column
+        NUL-joined and zlib-compressed.
+        """
+        indexes, course_of = array("i", self.indexes), array("i", self.course_of)
+        if sys.byteorder == "big":
+            indexes.byteswap()
+            course_of.byteswap()
+        strings = zlib.compress("\0".join([*self.section_numbers, *self.subjects, *self.course_numbers, *self.titles]).encode(), 6)
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(self.indexes), len(self.subjects), len(strings))
+        return b"".join([header, indexes.tobytes(), course_of.tobytes(), self.open_bits, strings])
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, rows, courses, strings_length = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a catalog snapshot (or an incompatible version)")
+        view, offset = memoryview(data), SNAPSHOT_HEADER.size
+        columns = []
+        for _ in range(2):
+            column = array("i")
+            column.frombytes(view[offset:offset + rows * column.itemsize])
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns.append(column)
+            offset += rows * column.itemsize
+        open_bits = bytes(view[offset:offset + (rows + 7) // 8])
+        offset += len(open_bits)
+        strings = zlib.decompress(view[offset:offset + strings_length]).decode().split("\0") if rows or courses else []
+        if len(strings) != rows + 3 * courses:
+            raise ValueError("catalog snapshot is truncated or corrupt")
+        strings = [sys.intern(text) for text in strings]
+        return cls(columns[0], columns[1], strings[:rows], strings[rows:rows + courses],
+                   strings[rows + courses:rows + 2 * courses], strings[rows + 2 * courses:], open_bits)
+
+SNAPSHOT_MAGIC = b"RUSOC\x00\x01\x00"  # bump the last bytes when the layout changes
+SNAPSHOT_HEADER = struct.Struct("<8sIII")
+
+def diff_snapshots(previous, current):
+    """Compare the open flags of two snapshots. Returns (opened, closed) index lists.
+
+    When both snapshots list the same sections in the same order (the normal
+    case between polls) this is a single XOR over the bitmaps.
+    """
+    if previous.indexes == current.indexes:
+        changed = previous.open_mask ^ current.open_mask
+        opened = current.rows_in_mask(changed & current.open_mask)
+        closed = current.rows_in_mask(changed & previous.open_mask)
+        return ([format_index(current.indexes[row]) for row in opened],
+                [format_index(current.indexes[row]) for row in closed])
+    before = set(previous.open_indexes())
+    after = set(current.open_indexes())
+    return sorted(after - before), sorted(before - after)
+
+#########################################
+# Streaming courses.json Parser         #
+#########################################
+
+class CatalogBuilder:
+    """Builds a CatalogSnapshot from courses.json fed in arbitrary byte chunks.
+
+    Only one course object is decoded at a time and reduced straight into the
+    snapshot columns, so the full nested payload never exists in memory.
+    """
+
+    def __init__(self):
+        self.indexes = array("i")
+        self.course_of = array("i")
+        self.section_numbers = []
+        self.subjects = []
+        self.course_numbers = []
+        self.titles = []
+        self.open_bits = bytearray()
+        self.skipped = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._done = False
+
+    def add_course(self, course):
+        course_row = len(self.subjects)
+        self.subjects.append(sys.intern(str(course.get("subject", "Unknown Subject"))))
+        self.course_numbers.append(sys.intern(str(course.get("courseNumber", "XXX"))))
+        self.titles.append(sys.intern(str(course.get("title", "Unknown Course"))))
+        for section in course.get("sections", []):
+            index = parse_index(section.get("index"))
+            if index is None:
+                self.skipped += 1
+                continue
+            row = len(self.indexes)
+            self.indexes.append(index)
+            self.course_of.append(course_row)
+            self.section_numbers.append(sys.intern(str(section.get("number", ""))))
+            if row >> 3 >= len(self.open_bits):
+                self.open_bits.append(0)
+            if is_open_status(section.get("openStatus")):
+                self.open_bits[row >> 3] |= 1 << (row & 7)
+
+    def feed(self, chunk):
+        self._buffer += self._decoder.decode(chunk)
+        buffer, pos, end = self._buffer, 0, len(self._buffer)
+        while not self._done:
+            while pos < end and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= end:
+                break
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError("courses.json payload is not a JSON array")
+                self._started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                self._done = True
+                pos += 1
+                break
+            try:
+                course, pos = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # incomplete object; wait for the next chunk
+            self.add_course(course)
+        self._buffer = buffer[pos:]
+
+    def finish(self):
+        """The snapshot of everything fed; raises ValueError unless the body was one complete JSON array."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        self.feed(b"")
+        if not self._started:
+            raise ValueError("courses.json payload is empty")
+        if not self._done:
+            raise ValueError("courses.json payload ended mid-array")
+        return self.snapshot()
+
+    def snapshot(self):
+        return CatalogSnapshot(self.indexes, self.course_of, self.section_numbers,
+                               self.subjects, self.course_numbers, self.titles, self.open_bits)
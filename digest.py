@@ -0,0 +1,165 @@
+import asyncio
+import io
+import logging
+import time
+
+import discord
+
+from catalog import diff_snapshots, format_index
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Global Snipe Digests                  #
+#########################################
+
+def parse_filters(text):
+    """Parse "198, 640:151, 01:198:111" into (subjects, courses).
+
+    A bare code is a subject; ``subject:course`` (optionally prefixed with the
+    school code, which the catalog does not keep) is one course. Empty text
+    means no filter. Raises ValueError on anything else.
+    """
+    subjects, courses = set(), set()
+    for token in (text or "").replace(" ", "").split(","):
+        if not token:
+            continue
+        parts = token.split(":")
+        if len(parts) == 3:
+            parts = parts[1:]
+        if not all(parts) or len(parts) > 2:
+            raise ValueError(f"Bad filter: {token}")
+        if len(parts) == 1:
+            subjects.add(parts[0])
+        else:
+            courses.add((parts[0], parts[1]))
+    return frozenset(subjects), frozenset(courses)
+
+def format_filters(filters):
+    subjects, courses = filters
+    return ", ".join([*sorted(subjects), *sorted(f"{subject}:{course}" for subject, course in courses)]) or "everything"
+
+class GlobalDigest:
+    """Coalesces the admin's global-snipe transitions into periodic digest DMs.
+
+    Each scan pass hands over its previous and current snapshot; the
+    transitions are one XOR of the open bitmaps masked by the admin's
+    subject/course filters, and only rows that flipped become Python
+    objects. Everything collected since the last flush goes out as a single
+    message, with the full list attached as a text file when the burst is
+    too large to inline.
+    """
+
+    def __init__(self, send, interval=30, inline_limit=25, filters=""):
+        self.send = send  # async (content, file=None)
+        self.interval = interval
+        self.inline_limit = inline_limit
+        self.filters = parse_filters(filters)
+        self.pending = {}  # index -> [course name, section number, state before, state now, flips]
+        self.since = None
+        self.digests_sent = 0
+        self.transitions = 0
+        self._mask = (None, None, 0)  # (indexes, filters, row mask) of the last catalog layout
+
+    def set_filters(self, text):
+        self.filters = parse_filters(text)
+        self._mask = (None, None, 0)
+
+    def mask(self, snapshot):
+        """Bitmap of the rows the filters let through (-1: every row), cached per catalog layout."""
+        subjects, courses = self.filters
+        if not subjects and not courses:
+            return -1
+        indexes, filters, mask = self._mask
+        if indexes is snapshot.indexes and filters is self.filters:
+            return mask
+        matched = [snapshot.subjects[course] in subjects or (snapshot.subjects[course], snapshot.course_numbers[course]) in courses
+                   for course in range(len(snapshot.subjects))]
+        bits = bytearray((len(snapshot) + 7) // 8)
+        for row, course in enumerate(snapshot.course_of):
+            if matched[course]:
+                bits[row >> 3] |= 1 << (row & 7)
+        mask = int.from_bytes(bits, "little")
+        self._mask = (snapshot.indexes, self.filters, mask)
+        return mask
+
+    def add(self, previous, snapshot):
+        """Collect the filtered transitions between two snapshots. Returns how many there were."""
+        mask = self.mask(snapshot)
+        if previous.indexes == snapshot.indexes:
+            rows = snapshot.rows_in_mask((previous.open_mask ^ snapshot.open_mask) & mask)
+        else:
+            opened, closed = diff_snapshots(previous, snapshot)
+            rows = [row for row in map(snapshot.row, [*opened, *closed]) if row is not None and mask >> row & 1]
+        if rows and self.since is None:
+            self.since = time.time()
+        for row in rows:
+            index_number = format_index(snapshot.indexes[row])
+            is_open = snapshot.row_is_open(row)
+            entry = self.pending.get(index_number)
+            if entry is None:
+                section = snapshot.section(row)
+                self.pending[index_number] = [section.course_name, section.section_number, not is_open, is_open, 1]
+            else:
+                entry[3] = is_open
+                entry[4] += 1
+        self.transitions += len(rows)
+        return len(rows)
+
+    def clear(self):
+        self.pending = {}
+        self.since = None
+
+    def render(self, pending):
+        """Return (summary, full text) of a digest: net openings, closings, then sections that flipped back."""
+        groups = {"opened": [], "closed": [], "flapped": []}
+        for index_number, (course_name, section_number, before, now, flips) in sorted(pending.items(), key=lambda item: (item[1][0], item[0])):
+            line = f"{course_name} (Index: {index_number}, section {section_number})"
+            if before == now:
+                groups["flapped"].append(f"{line} {'closed and reopened' if now else 'opened and closed again'} ({flips} flips)")
+            else:
+                groups["opened" if now else "closed"].append(line)
+        summary = (f"🌐 Global Snipe Digest ({format_filters(self.filters)}) since "
+                   f"{time.strftime('%H:%M:%S', time.localtime(self.since))}: "
+                   f"{len(groups['opened'])} opened, {len(groups['closed'])} closed, {len(groups['flapped'])} flapped.")
+        sections = []
+        for name, emoji in (("opened", "🟢"), ("closed", "🔴"), ("flapped", "🔁")):
+            if groups[name]:
+                sections.append(f"{emoji} **{name.title()}:**\n" + "\n".join(groups[name]))
+        return summary, "\n".join(sections)
+
+    async def flush(self):
+        """Send what accumulated as one DM. On failure the entries are kept for the next flush."""
+        if not self.pending:
+            return False
+        pending, since = self.pending, self.since
+        summary, text = self.render(pending)
+        self.clear()
+        try:
+            if len(pending) <= self.inline_limit and len(summary) + len(text) < 1900:
+                await self.send(f"{summary}\n{text}")
+            else:
+                filename = f"global_snipes_{time.strftime('%Y%m%d-%H%M%S', time.localtime(since))}.txt"
+                await self.send(f"{summary} Full list attached.",
+                                file=discord.File(io.BytesIO(f"{summary}\n\n{text}\n".replace("**", "").encode()), filename=filename))
+        except Exception as e:
+            log.error("❌ Failed to send the global snipe digest (%d sections, kept for the next one): %s", len(pending), e)
+            for index_number, entry in self.pending.items():
+                old = pending.get(index_number)
+                if old is not None:
+                    entry[2], entry[4] = old[2], entry[4] + old[4]
+                pending[index_number] = entry
+            self.pending, self.since = pending, since
+            return False
+        self.digests_sent += 1
+        log.debug("🌐 Sent a global snipe digest of %d section(s).", len(pending))
+        return True
+
+    async def run(self):
+        """Flush every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception("🔥 Global snipe digest crashed: %s", e)
@@ -1,26 +1,104 @@
 import discord
 import asyncio
-import requests
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
 import sqlite3
 import os
+import threading
 import time
 import psutil
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional
+from soc_client import SOCAPIError, SOCUnavailableError, Source, TERM_NAMES, CAMPUS_NAMES
+from catalog import CatalogSnapshot, diff_snapshots, format_index, parse_index
+from poller import PollerScheduler, parse_windows
+from storage import Database
+from registry import Rule, SubscriptionRegistry, index_key
+from dispatcher import NotificationDispatcher
+from user_cache import UserCache
+from snapshot_store import SnapshotStore
+from recorder import SnapshotRecorder
+from worker import RemoteScheduler, WorkerUnavailableError
+from digest import GlobalDigest, format_filters, parse_filters
+from search import MAX_CHOICES, SearchIndex
+import metrics
+import logs
+import profiler
+from metrics import ALERTS_QUEUED, COMMANDS, COMMAND_SECONDS, SCAN_SECONDS, SCAN_SECTIONS, SCAN_TRANSITIONS
 
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
-SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "snipes.db")
-RUTGERS_API_URL = "https://sis.rutgers.edu/soc/api/courses.json?year=2025&term=7&campus=NB"
-SCAN_INTERVAL = 1 #checks every second
-
-COURSE_CACHE = {"timestamp": 0, "data": None}
-CACHE_DURATION = 60  
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # "text" or "json"
+LOG_FILE = os.getenv("LOG_FILE") # also write to this rotating file
+LOG_SAMPLE_SIZE = 20 # per-section transitions logged at DEBUG per scan pass; the rest are counted
+log = logging.getLogger("discord_bot")
+DATA_DIR = os.getenv("SNIPER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+SQL_FILE = os.path.join(DATA_DIR, "snipes.db")
+DB = Database(SQL_FILE)
+REGISTRY = SubscriptionRegistry(DB)
+SOC_API_BASE = "https://sis.rutgers.edu/soc/api"
+DEFAULT_SOURCE = Source.parse(os.getenv("SOC_DEFAULT_SOURCE", "2025:7:NB")) # year:term:campus used when /snipe can't tell
+SOC_SOURCES = list(dict.fromkeys([DEFAULT_SOURCE, *(Source.parse(s) for s in os.getenv("SOC_SOURCES", "").split(",") if s.strip())])) # sources /snipe may infer
+SCAN_INTERVAL = 1 # seconds between checks of which sources need a poller
+
+CACHE_DURATION = 5 # starting poll interval; also how long the open-sections list is reused for lookups
+MIN_POLL_INTERVAL = 2 # fastest a source is polled (after changes, and during registration windows)
+MAX_POLL_INTERVAL = 60 # slowest a quiet source is polled
+POLL_BACKOFF_MAX = 300 # cap of the exponential backoff after API errors
+POLL_JITTER = 0.1 # +/- fraction added to every poll delay
+REGISTRATION_WINDOWS = parse_windows(os.getenv("SOC_REGISTRATION_WINDOWS", "")) # "2025-11-03T07:00/2025-11-03T12:00,..."
+CATALOG_REFRESH_INTERVAL = 1800 # seconds between full courses.json downloads (names, sections)
+API_TIMEOUT = 20 # seconds before a download is abandoned
+SOC_POOL_SIZE = 8 # keep-alive connections shared by every source's poller
+SOC_BREAKER_THRESHOLD = 5 # failed SOC requests in a row that open the circuit breaker
+SOC_BREAKER_RESET = 15 # seconds the breaker stays open before a probe; doubles per failed probe
+SOC_BREAKER_RESET_MAX = 300
+SOC_STALE_AFTER = 180 # seconds after which replies and /admin_status flag a source's data as stale
+SNAPSHOT_DIR = os.path.join(os.path.dirname(SQL_FILE), "snapshots")
+SNAPSHOT_SAVE_INTERVAL = 10 # seconds between writes of a changed snapshot to disk
+WORKER_SOCKET = os.getenv("POLLER_WORKER_SOCKET") # poll in a separate `python worker.py` process behind this Unix socket
+# One poller per source with subscribers; the lambdas resolve the functions defined further down.
+SCHEDULER_ARGS = (SOC_API_BASE, lambda source, snapshot: scan_courses(source, snapshot), lambda: active_sources())
+SCHEDULER_OPTIONS = dict(open_interval=CACHE_DURATION, catalog_interval=CATALOG_REFRESH_INTERVAL,
+                         timeout=API_TIMEOUT, pool_size=SOC_POOL_SIZE,
+                         breaker_options=dict(threshold=SOC_BREAKER_THRESHOLD, reset_timeout=SOC_BREAKER_RESET,
+                                              max_reset_timeout=SOC_BREAKER_RESET_MAX),
+                         cadence_options=dict(min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL,
+                                              backoff_max=POLL_BACKOFF_MAX, jitter=POLL_JITTER, windows=REGISTRATION_WINDOWS))
+if WORKER_SOCKET:
+    SCHEDULER = RemoteScheduler(WORKER_SOCKET, *SCHEDULER_ARGS, snapshot_dir=SNAPSHOT_DIR,
+                                snapshot_save_interval=SNAPSHOT_SAVE_INTERVAL, **SCHEDULER_OPTIONS)
+else:
+    SCHEDULER = PollerScheduler(*SCHEDULER_ARGS, **SCHEDULER_OPTIONS)
+EMPTY_CATALOG = CatalogSnapshot()
+SEARCH = SearchIndex() # autocomplete over the cached catalogs; never downloads
+SNAPSHOT_STORE = SnapshotStore(SNAPSHOT_DIR)
+SAVED_SNAPSHOTS = {}        # source -> (snapshot last written, when)
+RECORD_PATH = os.getenv("SOC_RECORD_PATH") # append every scanned snapshot to this archive (for benchmarks/replay.py)
+RECORD_MODE = os.getenv("SOC_RECORD_MODE", "diff") # "diff": only flipped sections; "full": every poll's bitmap
+RECORDER = SnapshotRecorder(RECORD_PATH, RECORD_MODE) if RECORD_PATH else None
 
 ADMIN_ID = "admin_id"
 
 GLOBAL_SNIPING_ENABLED = False
-ADMIN_GLOBAL_LAST_OPEN_STATUS = {}
+DISCORD_MESSAGE_LIMIT = 2000 # characters; longer admin status replies come as a .txt attachment
+STATUS_ERROR_LENGTH = 120 # characters of each source's (or the breaker's) last error shown in /admin_status
+GLOBAL_DIGEST_INTERVAL = 30 # seconds of global-snipe transitions coalesced into one admin DM
+GLOBAL_DIGEST_INLINE_LIMIT = 25 # sections listed in the message itself; larger digests come as a .txt attachment
+GLOBAL_SNIPE_FILTERS = os.getenv("GLOBAL_SNIPE_FILTERS", "") # subjects/courses watched by default, e.g. "198, 640:151"
+
+LAST_SNAPSHOTS = {}         # source -> catalog diffed on the previous pass
+PENDING_INDEXES = {}        # source -> newly sniped indexes to check once even without a transition
+PENDING_RULES = {}          # source -> newly added course/subject rules to check once against the open sections
+RENOTIFY_INTERVAL = 0       # seconds between repeat alerts while a section stays open; 0 = only when it opens
+LAST_NOTIFIED = {}          # (source, index) -> time of the last alert, for sections still open
+RULE_ALERT_SECTIONS = 10    # opened sections listed in one course/subject alert; the rest are counted
+ALERT_COALESCING = os.getenv("ALERT_COALESCING", "1") != "0" # one DM per user per scan pass instead of one per snipe
 
 ADMIN_SCAN_NOTIFY = False
 ADMIN_SCAN_LAST_NOTIFIED = 0
@@ -31,237 +109,429 @@ allocated_memory = []
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+DISCORD_SHARDS = os.getenv("DISCORD_SHARDS") # "auto" or a shard count: one gateway connection per shard for large guild counts
+
+class SniperBot(commands.AutoShardedBot if DISCORD_SHARDS else commands.Bot):
+    """The bot; one-time startup lives in setup_hook, since on_ready fires again on every reconnect."""
+
+    async def setup_hook(self):
+        await start_services()
+
+if DISCORD_SHARDS:
+    bot = SniperBot(command_prefix="!", intents=intents, shard_count=None if DISCORD_SHARDS == "auto" else int(DISCORD_SHARDS))
+else:
+    bot = SniperBot(command_prefix="!", intents=intents)
+
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 3600 # seconds a resolved user/DM channel is trusted
+USER_CACHE = UserCache(bot, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+EXPORT_USER_CONCURRENCY = 10 # concurrent user lookups while exporting snipes
+ADMIN_LIST_PAGE_SIZE = 20 # snipes per inline /admin_list_snipes page
+
+DISPATCH_CONCURRENCY = 8 # concurrent DM senders
+DISPATCHER = NotificationDispatcher(USER_CACHE.get_dm_channel, REGISTRY, concurrency=DISPATCH_CONCURRENCY)
+
+GLOBAL_DIGEST = GlobalDigest(lambda content, file=None: send_admin_dm(content, file), interval=GLOBAL_DIGEST_INTERVAL,
+                             inline_limit=GLOBAL_DIGEST_INLINE_LIMIT, filters=GLOBAL_SNIPE_FILTERS)
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108")) # Prometheus /metrics endpoint; 0 disables it
+METRICS_SERVER = None
+COMMAND_HASH_FILE = os.path.join(DATA_DIR, "command_tree.sha256") # tree last synced to Discord; unchanged trees skip the sync
+SUPERVISOR_BACKOFF_MIN = 1 # seconds before restarting a crashed background task; doubles per crash
+SUPERVISOR_BACKOFF_MAX = 60
+SUPERVISOR_STABLE_AFTER = 300 # a task that ran this long before crashing restarts at the minimum delay again
+BACKGROUND_TASKS = {} # name -> task started once by start_services()
+COLD_START_SECONDS = None # process start to the first completed scan pass
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25")) # seconds the loop may block before the watchdog logs its stack
+WATCHDOG = profiler.LoopWatchdog(threshold=LOOP_STALL_THRESHOLD)
+PROFILE_MAX_SECONDS = 120 # longest /admin_profile run
+PROFILE_LOCK = asyncio.Lock()
+metrics.Gauge("alert_queue_depth", "Alerts waiting for a DM sender.", function=lambda: DISPATCHER.queue.qsize())
+metrics.Gauge("active_snipes", "Snipes across all users and sources.", function=lambda: REGISTRY.count_snipes())
+metrics.Gauge("soc_circuit_open", "1 while the SOC circuit breaker is open.", function=lambda: int(SCHEDULER.breaker_status()[0] == "open"))
 
 #########################################
 # Database Initialization and Helpers   #
 #########################################
 
 async def initialize_storage():
-    os.makedirs("data", exist_ok=True)
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS snipes (
-                discord_id TEXT,
-                index_number TEXT,
-                notifications_sent INTEGER DEFAULT 0,
-                UNIQUE(discord_id, index_number)
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS user_configs (
-                discord_id TEXT PRIMARY KEY,
-                max_snipes INTEGER DEFAULT 10,
-                banned INTEGER DEFAULT 0,
-                is_mod INTEGER DEFAULT 0,
-                notif_limit INTEGER DEFAULT 5,
-                tts_enabled INTEGER DEFAULT 0
-            )
-        """)
-        c.execute("PRAGMA table_info(user_configs)")
-        columns = [row[1] for row in c.fetchall()]
-        if "notif_limit" not in columns:
-            c.execute("ALTER TABLE user_configs ADD COLUMN notif_limit INTEGER DEFAULT 5")
-        if "tts_enabled" not in columns:
-            c.execute("ALTER TABLE user_configs ADD COLUMN tts_enabled INTEGER DEFAULT 0")
-        conn.commit()
-
-def get_user_config(discord_id):
+    """Open the shared connection (WAL mode), bring the schema up to date and load the registry."""
+    await DB.open()
+    await REGISTRY.load()
+
+async def get_user_config(discord_id):
     """Retrieve or create a default config for the given user."""
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT max_snipes, banned, is_mod, notif_limit, tts_enabled FROM user_configs WHERE discord_id = ?", (discord_id,))
-        row = c.fetchone()
-        if row is None:
-            c.execute("INSERT INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)", (discord_id,))
-            conn.commit()
-            return (10, 0, 0, 5, 0)
-        return row
+    return (await REGISTRY.ensure_config(discord_id)).as_tuple()
 
 #########################################
 # Course Cache and Utility Functions    #
 #########################################
 
-def get_cached_courses():
-    """Retrieve courses using a cache to lower network overhead."""
-    current_time = time.time()
-    if (COURSE_CACHE["data"] is None or 
-        (current_time - COURSE_CACHE["timestamp"]) > CACHE_DURATION):
+async def get_catalog(source=DEFAULT_SOURCE):
+    """Retrieve the catalog snapshot of ``source``, cached to lower network overhead."""
+    try:
+        return await SCHEDULER.get(source)
+    except SOCUnavailableError as e:
+        log.debug("⛔ No data for %s: %s", source.label, e)
+    except WorkerUnavailableError as e:
+        log.warning("🔌 %s", e)
+    except SOCAPIError as e:
+        log.error("❌ %s", e)
+    except Exception as e:
+        log.error("🔥 API request failed: %s", e)
+    return SCHEDULER.cached(source) or EMPTY_CATALOG
+
+def format_age(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+def catalog_health(source):
+    """("fresh" | "stale" | "missing", age in seconds or None) of the data for ``source``."""
+    poller = SCHEDULER.pollers.get(source)
+    age = poller.age() if poller is not None else None
+    if age is None:
+        return "missing", None
+    if age > SOC_STALE_AFTER or SCHEDULER.breaker_status()[0] == "open":
+        return "stale", age
+    return "fresh", age
+
+def freshness_note(source):
+    """A warning line for replies built from stale or missing data; empty when the data is fresh."""
+    health, age = catalog_health(source)
+    if health == "fresh":
+        return ""
+    unreachable = "; the SOC API is not answering" if SCHEDULER.breaker_status()[0] == "open" else ""
+    if health == "missing":
+        return f"\n⚠️ No course data for {source.label} yet{unreachable}, so names may show as unknown."
+    return f"\n⚠️ Course data for {source.label} was last confirmed {format_age(age)} ago{unreachable}."
+
+async def get_course_name(index_number, source=DEFAULT_SOURCE):
+    snapshot = await get_catalog(source)
+    return snapshot.course_name(index_number)
+
+def restore_snapshots():
+    """Seed pollers and scan baselines from the snapshots saved on disk."""
+    for source in SNAPSHOT_STORE.sources():
+        started = time.perf_counter()
         try:
-            response = requests.get(RUTGERS_API_URL)
-            if response.status_code == 200:
-                COURSE_CACHE["data"] = response.json()
-                COURSE_CACHE["timestamp"] = current_time
-            else:
-                print("❌ API returned non-200 status:", response.status_code)
-                return []
+            state = SNAPSHOT_STORE.load(source)
+            if state is None:
+                continue  # removed since sources() listed it; the source starts cold
+            snapshot = SCHEDULER.poller(source).restore_state(*state)
         except Exception as e:
-            print("🔥 API request failed:", e)
-            return []
-    return COURSE_CACHE["data"]
-
-async def fetch_courses():
-    return get_cached_courses()
-
-def get_course_name(index_number):
-    courses = get_cached_courses()
-    for course in courses:
-        course_title = course.get("title", "Unknown Course")
-        subject = course.get("subject", "Unknown Subject")
-        course_number = course.get("courseNumber", "XXX")
-        for section in course.get("sections", []):
-            if str(section.get("index")) == str(index_number):
-                return f"{subject} {course_number} - {course_title}"
-    return f"Unknown Course ({index_number})"
+            log.warning("⚠️ Ignoring unreadable snapshot of %s: %s", source.label, e)
+            continue
+        LAST_SNAPSHOTS[source] = snapshot
+        SAVED_SNAPSHOTS[source] = (snapshot, time.time())
+        log.info("💽 Restored %s: %d sections, %d open, saved %.0fs ago (%.1f ms).", source.label, len(snapshot),
+                 snapshot.open_count, time.time() - state[0]["saved_at"], (time.perf_counter() - started) * 1000)
+
+async def save_snapshot(source):
+    """Write the source's baseline to disk if it changed."""
+    if WORKER_SOCKET:
+        return  # the poller worker holds the catalogs and saves them itself
+    saved, saved_at = SAVED_SNAPSHOTS.get(source, (None, 0))
+    poller = SCHEDULER.poller(source)
+    if poller.snapshot is saved or time.time() - saved_at < SNAPSHOT_SAVE_INTERVAL:
+        return
+    state = poller.export_state()
+    if state is None:
+        return
+    SAVED_SNAPSHOTS[source] = (poller.snapshot, time.time())
+    try:
+        await asyncio.to_thread(SNAPSHOT_STORE.save, source, state)
+    except Exception as e:
+        log.warning("⚠️ Could not save the snapshot of %s: %s", source.label, e)
+
+def active_sources():
+    """Sources somebody subscribes to, plus the default one while the admin watches all of it."""
+    sources = set(REGISTRY.sources())
+    if GLOBAL_SNIPING_ENABLED or ADMIN_SCAN_NOTIFY:
+        sources.add(DEFAULT_SOURCE)
+    return sources
+
+def candidate_sources(year=None, term=None, campus=None):
+    """Configured or already polled sources that fit the options a user gave."""
+    return [source for source in dict.fromkeys([*SOC_SOURCES, *REGISTRY.sources()])
+            if (year is None or source.year == year) and (term is None or source.term == term)
+            and (campus is None or source.campus == campus)]
+
+def resolve_source(index_number, year=None, term=None, campus=None):
+    """Work out which source a /snipe means from the options given and the loaded catalogs."""
+    for source in candidate_sources(year, term, campus):
+        snapshot = SCHEDULER.cached(source)
+        if snapshot is not None and snapshot.row(index_number) is not None:
+            return source
+    return default_source(year, term, campus)
+
+def resolve_course_source(subject, course_number, year=None, term=None, campus=None):
+    """resolve_source() for a course/subject rule."""
+    for source in candidate_sources(year, term, campus):
+        snapshot = SCHEDULER.cached(source)
+        if snapshot is not None and catalog_lists(snapshot, subject, course_number):
+            return source
+    return default_source(year, term, campus)
+
+def default_source(year=None, term=None, campus=None):
+    return Source(DEFAULT_SOURCE.year if year is None else year,
+                  DEFAULT_SOURCE.term if term is None else term,
+                  campus or DEFAULT_SOURCE.campus)
+
+def catalog_lists(snapshot, subject, course_number=""):
+    return any(s == subject and course_number in ("", n) for s, n in zip(snapshot.subjects, snapshot.course_numbers))
+
+def rule_rows(rule, snapshot):
+    """Rows of ``snapshot`` that ``rule`` currently covers."""
+    search = SEARCH.get(rule.source, snapshot)
+    return [row for course, (subject, number) in enumerate(zip(snapshot.subjects, snapshot.course_numbers))
+            if subject == rule.subject and rule.course_number in ("", number)
+            for row in search.sections_of[course] if rule.matches(snapshot.section_numbers[row])]
+
+def search_sections(query, year=None, term=None, campus=None, limit=MAX_CHOICES):
+    """Autocomplete choices for ``query`` from every fitting source whose catalog is loaded."""
+    sources = [source for source in candidate_sources(year, term, campus) if SCHEDULER.cached(source) is not None]
+    choices = []
+    for source in sources:
+        search = SEARCH.get(source, SCHEDULER.cached(source))
+        for row in search.search(query, limit - len(choices)):
+            name = search.describe(row)
+            if len(sources) > 1:
+                name = f"{name[:100 - len(source.label) - 3]} · {source.label}"
+            choices.append(app_commands.Choice(name=name, value=format_index(search.indexes[row])))
+        if len(choices) >= limit:
+            break
+    return choices
 
 #########################################
 # Snipe Management Functions            #
 #########################################
 
-async def add_snipe(discord_id, index_number):
-    max_snipes, banned, is_mod, notif_limit, tts_enabled = get_user_config(discord_id)
+async def add_snipe(discord_id, index_number, source=DEFAULT_SOURCE):
+    index_number = index_key(index_number)
+    max_snipes, banned, is_mod, notif_limit, tts_enabled = await get_user_config(discord_id)
     if int(banned) == 1:
         return "banned"
     if discord_id != ADMIN_ID and int(is_mod) != 1:
-        with sqlite3.connect(SQL_FILE) as conn:
-            c = conn.cursor()
-            c.execute("SELECT COUNT(*) FROM snipes WHERE discord_id = ?", (discord_id,))
-            count = c.fetchone()[0]
-            if count >= max_snipes:
-                return False  # Limit reached
+        if REGISTRY.count_user_snipes(discord_id) >= max_snipes:
+            return False  # Limit reached
     try:
-        with sqlite3.connect(SQL_FILE) as conn:
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO snipes (discord_id, index_number, notifications_sent)
-                VALUES (?, ?, 0)
-            """, (discord_id, index_number))
-            conn.commit()
-            return True
+        await REGISTRY.add_snipe(discord_id, source, index_number)
+        PENDING_INDEXES.setdefault(source, set()).add(index_number)
+        SCHEDULER.reconcile()
+        SCHEDULER.wake(source)
+        return True
     except sqlite3.IntegrityError:
         return "duplicate"  # Already exists
 
-async def notify_users(index_number):
-    print(f"🔍 Notifying users for course {index_number}...")
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("""
-            SELECT discord_id, notifications_sent
-            FROM snipes
-            WHERE index_number = ?
-        """, (index_number,))
-        users = c.fetchall()
-
-        for user_id, sent_count in users:
-            _, _, _, notif_limit, tts_enabled = get_user_config(user_id)
-            if sent_count < notif_limit:
-                try:
-                    user = await bot.fetch_user(int(user_id))
-                    if user:
-                        course_name = get_course_name(index_number)
-                        await user.send(
-                            f"🔔 {user.mention}, the course **{course_name}** (index {index_number}) is now OPEN! (Notification {sent_count + 1}/{notif_limit})",
-                            tts=(tts_enabled == 1)
-                        )
-                        print(f"✅ Sent DM to user {user_id} (#{sent_count+1})")
-                except discord.HTTPException as e:
-                    print(f"❌ Failed to send message to {user_id}: {e}")
-
-                c.execute("""
-                    UPDATE snipes
-                    SET notifications_sent = notifications_sent + 1
-                    WHERE discord_id = ? AND index_number = ?
-                """, (user_id, index_number))
-
-                if sent_count + 1 >= notif_limit:
-                    c.execute("""
-                        DELETE FROM snipes
-                        WHERE discord_id = ? AND index_number = ?
-                    """, (user_id, index_number))
-                    print(f"🗑 Deleted snipe for {user_id} - {index_number} after {notif_limit} notifications.")
-
-        conn.commit()
+async def add_rule(rule):
+    """add_snipe() for a course/subject rule; it takes one slot of the user's max_snipes."""
+    max_snipes, banned, is_mod, notif_limit, tts_enabled = await get_user_config(rule.discord_id)
+    if int(banned) == 1:
+        return "banned"
+    if rule.discord_id != ADMIN_ID and int(is_mod) != 1:
+        if REGISTRY.count_user_snipes(rule.discord_id) >= max_snipes:
+            return False  # Limit reached
+    try:
+        await REGISTRY.add_rule(rule)
+        PENDING_RULES.setdefault(rule.source, set()).add(rule)
+        SCHEDULER.reconcile()
+        SCHEDULER.wake(rule.source)
+        return True
+    except sqlite3.IntegrityError:
+        return "duplicate"
+
+def render_alert(discord_id, texts):
+    """One DM for everything a user's snipes and rules caught in a scan pass."""
+    if len(texts) == 1:
+        return f"🔔 <@{discord_id}>, {texts[0]}"
+    return f"🔔 <@{discord_id}>, {len(texts)} of your snipes just OPENED:\n" + "\n".join(f"- {text}" for text in texts)
+
+def new_alert_batch(detected_at=None):
+    return DISPATCHER.batch(render_alert, detected_at or time.time(), coalesce=ALERT_COALESCING)
+
+async def notify_users(source, index_number, detected_at=None, batch=None, snapshot=None):
+    """Alert every subscriber of ``index_number`` in ``source`` still under their limit."""
+    log.debug("🔍 Notifying users for course %s (%s)...", index_number, source.label)
+    own_batch = batch is None
+    if own_batch:
+        batch = new_alert_batch(detected_at)
+    course_name = snapshot.course_name(index_number) if snapshot is not None else await get_course_name(index_number, source)
+    for user_id, sent_count in REGISTRY.subscribers_of(source, index_number):
+        config = REGISTRY.config(user_id)
+        notif_limit = config.notif_limit
+        if sent_count < notif_limit and batch.add(
+                user_id, (user_id, source, index_number),
+                f"the course **{course_name}** (index {index_number}, {source.label}) is now OPEN! (Notification {sent_count + 1}/{notif_limit})",
+                sent_count + 1 >= notif_limit,
+                config.tts_enabled == 1):
+            ALERTS_QUEUED.inc()
+    if own_batch:
+        batch.submit()
+
+def notify_rules(source, matched, snapshot, batch):
+    """Alert the owners of matched rules still under their limit."""
+    for rule, indexes in matched.items():
+        config = REGISTRY.config(rule.discord_id)
+        sent_count = REGISTRY.rule_sent(rule)
+        if sent_count >= config.notif_limit:
+            continue
+        lines = [f"  - **{snapshot.course_name(index_number)}** section {snapshot.get(index_number).section_number} (index {index_number})"
+                 for index_number in indexes[:RULE_ALERT_SECTIONS]]
+        if len(indexes) > RULE_ALERT_SECTIONS:
+            lines.append(f"  - ... and {len(indexes) - RULE_ALERT_SECTIONS} more")
+        if batch.add(
+                rule.discord_id, rule,
+                f"{len(indexes)} section(s) matching **{rule.label}** ({source.label}) just OPENED! "
+                f"(Notification {sent_count + 1}/{config.notif_limit})\n" + "\n".join(lines),
+                sent_count + 1 >= config.notif_limit,
+                config.tts_enabled == 1):
+            ALERTS_QUEUED.inc()
+
+async def send_admin_dm(content, file=None):
+    admin_dm = await USER_CACHE.get_dm_channel(ADMIN_ID)
+    await admin_dm.send(content, file=file)
+
+async def notify_admin_scan(snapshot):
+    global ADMIN_SCAN_LAST_NOTIFIED
+    now = time.time()
+    if now - ADMIN_SCAN_LAST_NOTIFIED < ADMIN_SCAN_NOTIFY_COOLDOWN:
+        return
+    try:
+        admin_dm = await USER_CACHE.get_dm_channel(ADMIN_ID)
+        await admin_dm.send(
+            f"🔄 API Scan completed at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}. "
+            f"Open sections: {snapshot.open_count}."
+        )
+    except Exception as e:
+        log.error("❌ Failed to send scan notification to admin: %s", e)
+    ADMIN_SCAN_LAST_NOTIFIED = now
+
+async def scan_courses(source, snapshot):
+    """Run one scan pass over the transitions of ``source`` since its previous catalog."""
+    started = time.perf_counter()
+    if RECORDER is not None:
+        RECORDER.record(source, snapshot)
+    tracked_courses = REGISTRY.tracked_indexes(source)
+    previous = LAST_SNAPSHOTS.get(source)
+    watched = source == DEFAULT_SOURCE  # global sniping and scan notifications cover the default source
+
+    opened = closed = rule_candidates = ()
+    if snapshot is not previous:
+        if previous is None:
+            # First pass: no baseline to alert the admin on, but tracked sections that are already open are news to their users.
+            opened = [index_number for index_number in tracked_courses if snapshot.is_open(index_number)]
+            if REGISTRY.has_rules(source):
+                rule_candidates = snapshot.open_indexes()
+        else:
+            opened, closed = diff_snapshots(previous, snapshot)
+            rule_candidates = opened
+            if GLOBAL_SNIPING_ENABLED and watched:
+                GLOBAL_DIGEST.add(previous, snapshot)  # sent every GLOBAL_DIGEST_INTERVAL seconds, not per section
+        log.info("🔎 %s changed: %d opened, %d closed, %d open.", source.label, len(opened), len(closed), snapshot.open_count)
+        LAST_SNAPSHOTS[source] = snapshot
+        SCAN_SECTIONS.inc(len(snapshot), str(source))
+        SCAN_TRANSITIONS.inc(len(opened), str(source), "opened")
+        SCAN_TRANSITIONS.inc(len(closed), str(source), "closed")
+        if log.isEnabledFor(logging.DEBUG):
+            log_transitions(source, "opened", opened)
+            log_transitions(source, "closed", closed)
+
+    for index_number in closed:
+        LAST_NOTIFIED.pop((source, index_number), None)
+
+    due = {index_number for index_number in opened if index_number in tracked_courses}
+    pending = PENDING_INDEXES.pop(source, None)
+    if pending:
+        due.update(index_number for index_number in pending if snapshot.is_open(index_number))
+    if RENOTIFY_INTERVAL:
+        now = time.time()
+        due |= {index_number for (notified_source, index_number), notified_at in LAST_NOTIFIED.items()
+                if notified_source == source and now - notified_at >= RENOTIFY_INTERVAL
+                and snapshot.is_open(index_number) and index_number in tracked_courses}
+
+    batch = new_alert_batch()  # one DM per user for the whole pass
+    for index_number in sorted(due):
+        log.info("✅ Course %s (%s) is OPEN! Notifying users...", index_number, source.label)
+        await notify_users(source, index_number, batch=batch, snapshot=snapshot)
+        LAST_NOTIFIED[(source, index_number)] = time.time()
+
+    # Course/subject rules: two dict lookups per opened section, however many rules there are.
+    matched = REGISTRY.match_rules(source, ((index_number, snapshot.get(index_number)) for index_number in rule_candidates))
+    for rule in PENDING_RULES.pop(source, ()):
+        if rule in REGISTRY.rules_by_user.get(rule.discord_id, ()):
+            open_indexes = [format_index(snapshot.indexes[row]) for row in rule_rows(rule, snapshot) if snapshot.row_is_open(row)]
+            if open_indexes:
+                matched[rule] = open_indexes
+    if matched:
+        log.info("✅ %d course/subject rule(s) matched in %s. Notifying users...", len(matched), source.label)
+        notify_rules(source, matched, snapshot, batch)
+    batch.submit()
+
+    if ADMIN_SCAN_NOTIFY and watched:
+        await notify_admin_scan(snapshot)
+
+    await save_snapshot(source)
+    SCAN_SECONDS.observe(time.perf_counter() - started, str(source))
+    if COLD_START_SECONDS is None:
+        record_cold_start()
+
+def log_transitions(source, direction, indexes):
+    """Debug-log a sample of one pass's transitions instead of a line per section."""
+    sample = list(indexes[:LOG_SAMPLE_SIZE])
+    if sample:
+        more = len(indexes) - len(sample)
+        log.debug("🔎 %s %s: %s%s", source.label, direction, ", ".join(sample), f" (+{more} more)" if more > 0 else "")
+
+def record_cold_start():
+    global COLD_START_SECONDS
+    COLD_START_SECONDS = time.time() - psutil.Process(os.getpid()).create_time()
+    metrics.COLD_START_SECONDS.set(COLD_START_SECONDS)
+    log.info("🚀 First scan pass finished %.2fs after process start.", COLD_START_SECONDS)
 
 async def check_courses():
-    global ADMIN_SCAN_LAST_NOTIFIED
+    """Keep one poller running per active source; each poll ends in scan_courses()."""
     while True:
         try:
-            print("🔄 Checking courses...")
-            with sqlite3.connect(SQL_FILE) as conn:
-                c = conn.cursor()
-                c.execute("SELECT DISTINCT index_number FROM snipes")
-                tracked_courses = {row[0] for row in c.fetchall()}
-
-            courses = await fetch_courses()
-            open_sections = 0
-            for course in courses:
-                for section in course.get("sections", []):
-                    index_number = section.get("index")
-                    status = str(section.get("openStatus")).strip().upper()
-                    if status == "TRUE":
-                        open_sections += 1
-
-                    print(f"🔎 Course {index_number}: {status}")
-
-                    if str(index_number) in tracked_courses and status == "TRUE":
-                        print(f"✅ Course {index_number} is OPEN! Notifying users...")
-                        await notify_users(index_number)
-
-                    if GLOBAL_SNIPING_ENABLED:
-                        course_key = str(index_number)
-                        current_open = (status == "TRUE")
-                        prev_open = ADMIN_GLOBAL_LAST_OPEN_STATUS.get(course_key, None)
-                        if prev_open is None:
-                            ADMIN_GLOBAL_LAST_OPEN_STATUS[course_key] = current_open
-                        elif prev_open != current_open:
-                            try:
-                                admin_user = await bot.fetch_user(int(ADMIN_ID))
-                                course_name = get_course_name(index_number)
-                                state = "opened" if current_open else "closed"
-                                await admin_user.send(
-                                    f"🌐 Global Snipe Alert: **{course_name}** (Index: {index_number}) just {state}!"
-                                )
-                                print(f"✅ Notified admin about course {index_number} state change to {state}.")
-                            except Exception as e:
-                                print(f"❌ Failed to notify admin for course {index_number}: {e}")
-                            ADMIN_GLOBAL_LAST_OPEN_STATUS[course_key] = current_open
-            if ADMIN_SCAN_NOTIFY:
-                now = time.time()
-                if now - ADMIN_SCAN_LAST_NOTIFIED >= ADMIN_SCAN_NOTIFY_COOLDOWN:
-                    try:
-                        admin_user = await bot.fetch_user(int(ADMIN_ID))
-                        await admin_user.send(
-                            f"🔄 API Scan completed at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}. "
-                            f"Open sections: {open_sections}."
-                        )
-                    except Exception as e:
-                        print(f"❌ Failed to send scan notification to admin: {e}")
-                    ADMIN_SCAN_LAST_NOTIFIED = now
-
-            await asyncio.sleep(SCAN_INTERVAL)
+            # Snipes also disappear when they reach their limit, so re-check which sources are needed.
+            SCHEDULER.reconcile()
         except Exception as e:
-            print(f"🔥 check_courses() crashed: {e}")
+            log.exception("🔥 check_courses() crashed: %s", e)
+        await asyncio.sleep(SCAN_INTERVAL)
 
 #########################################
 # Helper: Generate Admin Status Message #
 #########################################
 
 async def get_admin_status_message():
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM snipes")
-        active_snipes_count = c.fetchone()[0]
-
-    last_scan_time = COURSE_CACHE["timestamp"]
-    last_scan_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_scan_time)) if last_scan_time else "Never"
-
-    open_sections = 0
-    courses = get_cached_courses()
-    for course in courses:
-        for section in course.get("sections", []):
-            if str(section.get("openStatus")).strip().upper() == "TRUE":
-                open_sections += 1
+    active_snipes_count = REGISTRY.count_snipes()
+
+    def format_time(timestamp):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else "Never"
+
+    def shorten(text):
+        return text if len(text) <= STATUS_ERROR_LENGTH else text[:STATUS_ERROR_LENGTH - 1] + "…"
+
+    source_lines = []
+    for source in sorted(SCHEDULER.pollers.keys() | active_sources()):
+        poller = SCHEDULER.poller(source)
+        snapshot = SCHEDULER.cached(source) or EMPTY_CATALOG
+        health, age = catalog_health(source)
+        source_lines.append(
+            f"  - {source.label}: {'active' if SCHEDULER.is_running(source) else 'paused'}, "
+            f"{len(REGISTRY.tracked_indexes(source))} tracked, {snapshot.open_count} open, "
+            f"data {health}{f' ({format_age(age)} old)' if age is not None else ''}, "
+            f"last scan {format_time(poller.timestamp)}, catalog {format_time(poller.catalog_client.timestamp)}, "
+            f"cadence {shorten(SCHEDULER.cadence(source).describe())}"
+        )
+
+    poller_mode = "in-process"
+    if WORKER_SOCKET:
+        poller_mode = f"worker at {WORKER_SOCKET} ({'connected' if SCHEDULER.connected else 'disconnected'})"
 
     process = psutil.Process(os.getpid())
     mem_usage_mb = process.memory_info().rss / (1024 * 1024)
@@ -269,23 +539,45 @@ async def get_admin_status_message():
 
     status_message = (
         f"**Bot Status:**\n"
-        f"- Global Sniping Enabled: {GLOBAL_SNIPING_ENABLED}\n"
+        f"- Global Sniping Enabled: {GLOBAL_SNIPING_ENABLED} (watching {format_filters(GLOBAL_DIGEST.filters)}, "
+        f"{len(GLOBAL_DIGEST.pending)} pending, {GLOBAL_DIGEST.digests_sent} digests sent)\n"
         f"- Scan Notifications Enabled: {ADMIN_SCAN_NOTIFY}\n"
-        f"- Last API Scan: {last_scan_str}\n"
-        f"- Open Sections (per API): {open_sections}\n"
-        f"- Active User Snipes: {active_snipes_count}\n"
+        f"- Gateway: {bot.shard_count or 1} shard(s), heartbeat latency {bot.latency * 1000:.0f} ms\n"
+        f"- Poller: {poller_mode}\n"
+        f"- SOC Circuit Breaker: {shorten(SCHEDULER.breaker_status()[1])}\n"
+        f"- Sources (default {DEFAULT_SOURCE.label}):\n" + "".join(line + "\n" for line in source_lines) +
+        f"- Active User Snipes: {active_snipes_count} (+{REGISTRY.count_rules()} course/subject rules)\n"
+        f"- Alerts Sent: {DISPATCHER.sent} (failed {DISPATCHER.failed}, rate limited {DISPATCHER.rate_limited}, queued {DISPATCHER.queue.qsize()})\n"
+        f"- Detection-to-DM Latency: {DISPATCHER.latency_summary()}\n"
+        f"- User Cache: {USER_CACHE.stats()}\n"
+        f"- SOC Fetches: {metrics.SOC_FETCHES.total()} ({metrics.SOC_FETCH_BYTES.total() / (1024 * 1024):.1f} MB, "
+        f"avg {metrics.SOC_FETCH_SECONDS.mean() * 1000:.0f} ms, parse avg {metrics.SOC_PARSE_SECONDS.mean() * 1000:.1f} ms)\n"
+        f"- Scan Passes: {SCAN_SECONDS.count()} (avg {SCAN_SECONDS.mean() * 1000:.2f} ms, {SCAN_TRANSITIONS.total()} transitions)\n"
+        f"- DB Operations: {metrics.DB_SECONDS.count()} (avg {metrics.DB_SECONDS.mean() * 1000:.2f} ms)\n"
+        f"- Event Loop Lag: avg {metrics.LOOP_LAG_SECONDS.mean() * 1000:.1f} ms, max since scrape {metrics.LOOP_LAG_MAX.value() * 1000:.1f} ms\n"
+        f"- Event Loop Stalls: {WATCHDOG.summary()}\n"
+        f"- Cold Start: {f'{COLD_START_SECONDS:.2f}s to the first scan' if COLD_START_SECONDS is not None else 'first scan pending'}, "
+        f"task restarts {metrics.TASK_RESTARTS.total()}\n"
         f"- RAM Usage: {mem_usage_mb:.2f} MB\n"
         f"- Artificial Memory Allocated: {artificial_mem_mb} MB"
     )
     return status_message
 
+def admin_status_reply(status_message):
+    """Message arguments for the status, attaching it as a file when it is too long."""
+    if len(status_message) <= DISCORD_MESSAGE_LIMIT:
+        return {"content": status_message}
+    head = status_message[:DISCORD_MESSAGE_LIMIT - 100].rsplit("\n", 1)[0]
+    return {"content": head + "\n… (full status attached)",
+            "file": discord.File(io.BytesIO(status_message.encode()), filename="admin_status.txt")}
+
 #########################################
 # Helper: Fetch a user from an identifier
 #########################################
 
 async def fetch_user_by_identifier(user_identifier: str) -> Optional[discord.User]:
     try:
-        return await bot.fetch_user(int(user_identifier))
+        return await USER_CACHE.get_user(user_identifier)
     except ValueError:
         for guild in bot.guilds:
             member = guild.get_member_named(user_identifier)
@@ -293,76 +585,239 @@ async def fetch_user_by_identifier(user_identifier: str) -> Optional[discord.Use
                 return member
     return None
 
+#########################################
+# Helper: Snipe Export                  #
+#########################################
+
+EXPORT_COLUMNS = ("discord_id", "username", "source", "index", "subject", "course", "notifications_sent")
+
+async def collect_snipes(discord_id=None, subject=None, index_number=None):
+    """Return export rows for the matching snipes, sorted by source, index and user."""
+    rows = sorted((snipe for snipe in REGISTRY.all_snipes()
+                   if (discord_id is None or snipe[0] == discord_id) and (index_number is None or snipe[2] == index_number)),
+                  key=lambda snipe: (snipe[1], snipe[2], snipe[0]))
+    catalogs = {source: await get_catalog(source) for source in {snipe[1] for snipe in rows}}
+    if subject is not None:
+        rows = [snipe for snipe in rows if getattr(catalogs[snipe[1]].get(snipe[2]), "subject", None) == subject]
+    users = await USER_CACHE.get_users((snipe[0] for snipe in rows), concurrency=EXPORT_USER_CONCURRENCY)
+    export = []
+    for snipe_user, source, snipe_index, notifications_sent in rows:
+        user = users.get(snipe_user)
+        section = catalogs[source].get(snipe_index)
+        export.append((snipe_user, f"{user.name}#{user.discriminator}" if user is not None else snipe_user, source.label, snipe_index,
+                       section.subject if section else "", catalogs[source].course_name(snipe_index), notifications_sent))
+    return export
+
+def format_snipe(row):
+    discord_id, username, source_label, index_number, _, course_name, notifications_sent = row
+    return f"User: {username} (ID: {discord_id}) | Course: {course_name} (Index: {index_number}, {source_label}) | Notifications Sent: {notifications_sent}"
+
+def export_snipes(rows, fmt="txt", compress=False):
+    """Write rows as text lines or CSV into an in-memory (optionally gzipped) discord.File."""
+    buffer = io.BytesIO()
+    stream = gzip.GzipFile(fileobj=buffer, mode="wb") if compress else buffer
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            text.write(format_snipe(row) + "\n")
+    text.flush()
+    text.detach()
+    if compress:
+        stream.close()
+    buffer.seek(0)
+    return discord.File(buffer, filename=f"admin_snipes.{fmt}{'.gz' if compress else ''}")
+
 #########################################
 # Slash Commands (User)                 #
 #########################################
 
 @bot.tree.command(name="snipe", description="Add a course to your snipes.")
-async def snipe(interaction: discord.Interaction, index_number: str):
-    result = await add_snipe(str(interaction.user.id), index_number)
-    course_name = get_course_name(index_number)
+@app_commands.describe(index_number="Section index, or start typing a subject, course number or title to search",
+                       term="Defaults to the term whose catalog lists the index", campus="Defaults to the campus whose catalog lists the index")
+@app_commands.choices(
+    term=[app_commands.Choice(name=name, value=value) for value, name in TERM_NAMES.items()],
+    campus=[app_commands.Choice(name=name, value=value) for value, name in CAMPUS_NAMES.items()],
+)
+async def snipe(interaction: discord.Interaction, index_number: str, term: Optional[int] = None,
+                campus: Optional[str] = None, year: Optional[int] = None):
+    index_number = index_number.strip()
+    if parse_index(index_number) is None:
+        # Free text that was not picked from the autocomplete list: offer what it matches.
+        suggestions = search_sections(index_number, year, term, campus, limit=5)
+        hint = "\n".join(f"- {choice.name}" for choice in suggestions) or "No matching sections."
+        await interaction.response.send_message(f"❌ `{index_number}` is not a section index. Did you mean:\n{hint}", ephemeral=True)
+        return
+    index_number = format_index(parse_index(index_number))  # "9302" and "09302" are the same snipe
+    source = resolve_source(index_number, year, term, campus)
+    result = await add_snipe(str(interaction.user.id), index_number, source)
+    # Never wait on a download here: Discord drops replies after 3s. A cold cache says so via freshness_note().
+    course_name = (SCHEDULER.cached(source) or EMPTY_CATALOG).course_name(index_number)
     if result is True:
-        await interaction.response.send_message(f"✅ {interaction.user.mention}, you'll be notified when **{course_name}** (index {index_number}) opens!")
+        await interaction.response.send_message(f"✅ {interaction.user.mention}, you'll be notified when **{course_name}** (index {index_number}, {source.label}) opens!{freshness_note(source)}")
     elif result == "duplicate":
-        await interaction.response.send_message(f"⚠️ {interaction.user.mention}, you're already sniping **{course_name}** (index {index_number})!")
+        await interaction.response.send_message(f"⚠️ {interaction.user.mention}, you're already sniping **{course_name}** (index {index_number}, {source.label})!{freshness_note(source)}")
     elif result == "banned":
         await interaction.response.send_message("❌ You are banned from using the bot.", ephemeral=True)
     else:
         await interaction.response.send_message("❌ You have reached your snipe limit.", ephemeral=True)
 snipe.dm_permission = True
 
+@snipe.autocomplete("index_number")
+async def snipe_index_autocomplete(interaction: discord.Interaction, current: str):
+    namespace = interaction.namespace
+    return search_sections(current, namespace.year, namespace.term, namespace.campus)
+
+@bot.tree.command(name="snipe_course", description="Snipe every section of a course, or of a whole subject.")
+@app_commands.describe(course="Course like 01:198:211 or 198:211, or a subject code like 198",
+                       sections="Only section numbers starting with this, e.g. H for honors or 9 for online",
+                       term="Defaults to the term whose catalog lists the course", campus="Defaults to the campus whose catalog lists the course")
+@app_commands.choices(
+    term=[app_commands.Choice(name=name, value=value) for value, name in TERM_NAMES.items()],
+    campus=[app_commands.Choice(name=name, value=value) for value, name in CAMPUS_NAMES.items()],
+)
+async def snipe_course(interaction: discord.Interaction, course: str, sections: Optional[str] = None, term: Optional[int] = None,
+                       campus: Optional[str] = None, year: Optional[int] = None):
+    try:
+        subjects, courses = parse_filters(course)
+    except ValueError:
+        subjects = courses = ()
+    sections = (sections or "").strip().upper()
+    if len(subjects) + len(courses) != 1 or (sections and not sections.isalnum()):
+        await interaction.response.send_message("❌ Give one course (01:198:211 or 198:211) or subject (198), and an optional section prefix like H.", ephemeral=True)
+        return
+    subject, course_number = next(iter(courses)) if courses else (next(iter(subjects)), "")
+    source = resolve_course_source(subject, course_number, year, term, campus)
+    snapshot = SCHEDULER.cached(source)
+    if snapshot is not None and not catalog_lists(snapshot, subject, course_number):
+        await interaction.response.send_message(f"❌ {course} is not in the {source.label} catalog.", ephemeral=True)
+        return
+    rule = Rule(str(interaction.user.id), source, subject, course_number, sections)
+    result = await add_rule(rule)
+    if result is True:
+        covered = f" It covers {len(rule_rows(rule, snapshot))} section(s) right now." if snapshot is not None else ""
+        await interaction.response.send_message(f"✅ {interaction.user.mention}, you'll be notified when a section of **{rule.label}** ({source.label}) opens!{covered}{freshness_note(source)}")
+    elif result == "duplicate":
+        await interaction.response.send_message(f"⚠️ {interaction.user.mention}, you're already sniping **{rule.label}** ({source.label})!")
+    elif result == "banned":
+        await interaction.response.send_message("❌ You are banned from using the bot.", ephemeral=True)
+    else:
+        await interaction.response.send_message("❌ You have reached your snipe limit.", ephemeral=True)
+snipe_course.dm_permission = True
+
 @bot.tree.command(name="my_snipes", description="List your active snipes with course names.")
 async def my_snipes(interaction: discord.Interaction):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT DISTINCT index_number FROM snipes WHERE discord_id = ?", (str(interaction.user.id),))
-        snipes = [row[0] for row in c.fetchall()]
-    if snipes:
-        snipes_list = [f"({get_course_name(index_num)})" for index_num in snipes]
-        snipes_str = ", \n".join(snipes_list)
-        await interaction.response.send_message(f"📋 {interaction.user.mention}\nYour active snipes:\n{snipes_str}")
+    discord_id = str(interaction.user.id)
+    snipes = REGISTRY.snipes_of(discord_id)
+    rules = REGISTRY.rules_of(discord_id)
+    if snipes or rules:
+        message = f"📋 {interaction.user.mention}\n"
+        if snipes:
+            snipes_list = [f"({(SCHEDULER.cached(source) or EMPTY_CATALOG).course_name(index_num)}) [{source.label}]" for source, index_num in snipes]
+            message += "Your active snipes:\n" + ", \n".join(snipes_list) + "\n"
+        if rules:
+            rules_list = []
+            for rule in rules:
+                snapshot = SCHEDULER.cached(rule.source) or EMPTY_CATALOG
+                rows = rule_rows(rule, snapshot)
+                open_indexes = [format_index(snapshot.indexes[row]) for row in rows if snapshot.row_is_open(row)]
+                shown = ", ".join(open_indexes[:5]) + (f" +{len(open_indexes) - 5} more" if len(open_indexes) > 5 else "")
+                rules_list.append(f"({rule.label}) [{rule.source.label}]: {len(rows)} section(s), {len(open_indexes)} open"
+                                  + (f" ({shown})" if open_indexes else ""))
+            message += "Your course/subject snipes:\n" + ", \n".join(rules_list)
+        sources = dict.fromkeys([*(source for source, _ in snipes), *(rule.source for rule in rules)])
+        await interaction.response.send_message(message.rstrip("\n") + "".join(freshness_note(source) for source in sources))
     else:
         await interaction.response.send_message(f"ℹ️ {interaction.user.mention}, you have no active snipes.")
 my_snipes.dm_permission = True
 
 @bot.tree.command(name="clear_snipes", description="Remove all your snipes.")
 async def clear_snipes(interaction: discord.Interaction):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("DELETE FROM snipes WHERE discord_id = ?", (str(interaction.user.id),))
-        conn.commit()
-    await interaction.response.send_message(f"🗑 {interaction.user.mention}, all your snipes have been removed!")
+    await REGISTRY.clear_snipes(str(interaction.user.id))
+    SCHEDULER.reconcile()
+    await interaction.response.send_message(f"🗑 {interaction.user.mention}, all your snipes (including course/subject snipes) have been removed!")
 clear_snipes.dm_permission = True
 
 @bot.tree.command(name="remove_snipe", description="Remove a specific snipe.")
-async def remove_snipe(interaction: discord.Interaction, index_number: str):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("DELETE FROM snipes WHERE discord_id = ? AND index_number = ?", (str(interaction.user.id), index_number))
-        conn.commit()
+@app_commands.describe(source="year:term:campus, e.g. 2025:9:NB (default: every term you snipe this index in)")
+async def remove_snipe(interaction: discord.Interaction, index_number: str, source: Optional[str] = None):
+    discord_id = str(interaction.user.id)
+    index_number = index_key(index_number.strip())
+    try:
+        only = Source.parse(source) if source else None
+    except ValueError:
+        await interaction.response.send_message("❌ Source must look like 2025:9:NB (year:term:campus).", ephemeral=True)
+        return
+    for snipe_source, snipe_index in REGISTRY.snipes_of(discord_id):
+        if snipe_index == index_number and only in (None, snipe_source):
+            await REGISTRY.remove_snipe(discord_id, snipe_source, snipe_index)
+    SCHEDULER.reconcile()
     await interaction.response.send_message(f"✅ {interaction.user.mention}, removed snipe for index **{index_number}**!")
 remove_snipe.dm_permission = True
 
+@remove_snipe.autocomplete("index_number")
+async def remove_snipe_index_autocomplete(interaction: discord.Interaction, current: str):
+    """The user's own snipes, from the registry's memory and the cached catalogs."""
+    text = current.strip().lower()
+    choices = []
+    for source, index_number in REGISTRY.snipes_of(str(interaction.user.id)):
+        snapshot = SCHEDULER.cached(source) or EMPTY_CATALOG
+        name = f"{index_number} · {snapshot.course_name(index_number)} · {source.label}"
+        if text in name.lower():
+            choices.append(app_commands.Choice(name=name[:100], value=index_number))
+    return choices[:MAX_CHOICES]
+
+@remove_snipe.autocomplete("source")
+async def remove_snipe_source_autocomplete(interaction: discord.Interaction, current: str):
+    sources = dict.fromkeys(source for source, _ in REGISTRY.snipes_of(str(interaction.user.id)))
+    return [app_commands.Choice(name=source.label, value=str(source)) for source in sources
+            if current.lower() in f"{source.label} {source}".lower()][:MAX_CHOICES]
+
+@bot.tree.command(name="remove_snipe_course", description="Remove a course or subject snipe.")
+@app_commands.describe(course="Course or subject as given to /snipe_course",
+                       source="year:term:campus, e.g. 2025:9:NB (default: every term you snipe it in)")
+async def remove_snipe_course(interaction: discord.Interaction, course: str, source: Optional[str] = None):
+    discord_id = str(interaction.user.id)
+    try:
+        subjects, courses = parse_filters(course)
+        only = Source.parse(source) if source else None
+    except ValueError:
+        await interaction.response.send_message("❌ Give a course (198:211) or subject (198), and a source like 2025:9:NB.", ephemeral=True)
+        return
+    removed = 0
+    for rule in REGISTRY.rules_of(discord_id):
+        if ((rule.subject, rule.course_number) in courses or (not rule.course_number and rule.subject in subjects)) and only in (None, rule.source):
+            await REGISTRY.remove_rule(rule)
+            removed += 1
+    SCHEDULER.reconcile()
+    await interaction.response.send_message(f"✅ {interaction.user.mention}, removed {removed} course/subject snipe(s) for **{course}**!")
+remove_snipe_course.dm_permission = True
+
+@remove_snipe_course.autocomplete("course")
+async def remove_snipe_course_autocomplete(interaction: discord.Interaction, current: str):
+    choices = {}
+    for rule in REGISTRY.rules_of(str(interaction.user.id)):
+        value = f"{rule.subject}:{rule.course_number}" if rule.course_number else rule.subject
+        name = f"{value} · {rule.label} · {rule.source.label}"
+        if current.lower() in name.lower():
+            choices.setdefault(value, app_commands.Choice(name=name[:100], value=value))
+    return list(choices.values())[:MAX_CHOICES]
+
 @bot.tree.command(name="set_notif_limit", description="Set the number of notifications you'll receive per course (default is 5).")
 async def set_notif_limit(interaction: discord.Interaction, limit: int):
     if limit < 1 or limit > 20:
         await interaction.response.send_message("❌ Please choose a notification limit between 1 and 20.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, ?, 0)", (str(interaction.user.id), limit))
-        c.execute("UPDATE user_configs SET notif_limit = ? WHERE discord_id = ?", (limit, str(interaction.user.id)))
-        conn.commit()
+    await REGISTRY.set_config(str(interaction.user.id), "notif_limit", limit)
     await interaction.response.send_message(f"✅ {interaction.user.mention}, your notification limit has been set to {limit} per course.", ephemeral=True)
 set_notif_limit.dm_permission = True
 
 @bot.tree.command(name="set_tts", description="Toggle TTS for open section notifications (default off).")
 async def set_tts(interaction: discord.Interaction, enable: bool):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, ?)", (str(interaction.user.id), int(enable)))
-        c.execute("UPDATE user_configs SET tts_enabled = ? WHERE discord_id = ?", (int(enable), str(interaction.user.id)))
-        conn.commit()
+    await REGISTRY.set_config(str(interaction.user.id), "tts_enabled", int(enable))
     await interaction.response.send_message(f"✅ {interaction.user.mention}, TTS for open section notifications has been {'enabled' if enable else 'disabled'}.", ephemeral=True)
 set_tts.dm_permission = True
 
@@ -370,9 +825,15 @@ set_tts.dm_permission = True
 async def commands_help(interaction: discord.Interaction):
     help_message = """📖 **Sniper Bot Commands:**
 ```
-/snipe <index_number>        → Add a course to your snipes.
+/snipe <index_number> [term] [campus] [year]
+                             → Add a course to your snipes (term/campus are inferred if omitted).
+/snipe_course <course> [sections] [term] [campus] [year]
+                             → Snipe every section of a course (198:211) or subject (198), optionally only sections starting with e.g. H.
 /my_snipes                   → List your active snipes with course names.
-/remove_snipe <index_number> → Remove a specific snipe.
+/remove_snipe <index_number> [year:term:campus]
+                             → Remove a specific snipe.
+/remove_snipe_course <course> [year:term:campus]
+                             → Remove a course/subject snipe.
 /clear_snipes                → Remove all your snipes.
 /set_notif_limit <limit>     → Set the number of notifications you'll receive per course.
 /set_tts <enable>            → Toggle TTS for open section notifications (true/false).
@@ -389,55 +850,59 @@ commands_help.dm_permission = True
 async def admin_check(interaction: discord.Interaction) -> bool:
     if str(interaction.user.id) == ADMIN_ID:
         return True
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT is_mod FROM user_configs WHERE discord_id = ?", (str(interaction.user.id),))
-        row = c.fetchone()
-        if row and row[0] == 1:
-            return True
+    if REGISTRY.config(str(interaction.user.id)).is_mod == 1:
+        return True
     raise app_commands.CheckFailure("You don't have permission to use this command.")
 
+def record_command(interaction, result):
+    name = interaction.command.qualified_name if interaction.command else "unknown"
+    COMMANDS.inc(1, name, result)
+    COMMAND_SECONDS.observe((discord.utils.utcnow() - interaction.created_at).total_seconds(), name)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    record_command(interaction, "ok")
+
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    record_command(interaction, "denied" if isinstance(error, app_commands.CheckFailure) else "error")
+    # Commands that deferred (e.g. /admin_list_snipes) can only be answered with a followup.
+    send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
     if isinstance(error, app_commands.CheckFailure):
-        try:
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-        except Exception:
-            pass
+        message = "❌ You don't have permission to use this command."
     else:
-        try:
-            await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
-        except Exception:
-            pass
+        message = f"An error occurred: {error}"
+    try:
+        await send(message, ephemeral=True)
+    except Exception as e:
+        log.error("❌ Could not report a command error to the user: %s", e)
 
 #########################################
 # Slash Commands (Admin)                #
 #########################################
 
-@bot.tree.command(name="admin_list_snipes", description="List all active snipes in a .txt file.")
+@bot.tree.command(name="admin_list_snipes", description="List all active snipes in a .txt/.csv file, or a page of them inline.")
+@app_commands.describe(fmt="File format (default txt)", compress="gzip the file", member="Only this user's snipes",
+                       subject="Only this subject code, e.g. 198", index_number="Only this index",
+                       page=f"Show this page ({ADMIN_LIST_PAGE_SIZE} snipes) inline instead of attaching a file")
+@app_commands.choices(fmt=[app_commands.Choice(name="txt", value="txt"), app_commands.Choice(name="csv", value="csv")])
 @app_commands.check(admin_check)
-async def admin_list_snipes(interaction: discord.Interaction):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT discord_id, index_number, notifications_sent FROM snipes")
-        rows = c.fetchall()
+async def admin_list_snipes(interaction: discord.Interaction, fmt: Optional[str] = None, compress: bool = False,
+                            member: Optional[discord.User] = None, subject: Optional[str] = None,
+                            index_number: Optional[str] = None, page: Optional[int] = None):
+    # Resolving thousands of users takes longer than the 3-second interaction deadline.
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    rows = await collect_snipes(str(member.id) if member else None, subject, index_number)
     if not rows:
-        await interaction.response.send_message("No active snipes.", ephemeral=True)
+        await interaction.followup.send("No snipes match." if member or subject or index_number else "No active snipes.", ephemeral=True)
         return
-    lines = []
-    for discord_id, index_number, notifications_sent in rows:
-        try:
-            user = await bot.fetch_user(int(discord_id))
-            username = f"{user.name}#{user.discriminator}"
-        except Exception:
-            username = discord_id
-        course_name = get_course_name(index_number)
-        lines.append(f"User: {username} (ID: {discord_id}) | Course: {course_name} (Index: {index_number}) | Notifications Sent: {notifications_sent}")
-    file_path = "admin_snipes.txt"
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-    await interaction.response.send_message(file=discord.File(file_path), ephemeral=True)
-    os.remove(file_path)
+    if page is not None:
+        pages = (len(rows) + ADMIN_LIST_PAGE_SIZE - 1) // ADMIN_LIST_PAGE_SIZE
+        page = min(max(page, 1), pages)
+        lines = [format_snipe(row) for row in rows[(page - 1) * ADMIN_LIST_PAGE_SIZE:page * ADMIN_LIST_PAGE_SIZE]]
+        await interaction.followup.send(f"**Snipes (page {page}/{pages}, {len(rows)} total):**\n" + "\n".join(lines)[:1900], ephemeral=True)
+        return
+    await interaction.followup.send(f"📋 {len(rows)} snipe(s).", file=export_snipes(rows, fmt or "txt", compress), ephemeral=True)
 admin_list_snipes.dm_permission = True
 
 @bot.tree.command(name="admin_edit_limit", description="Edit a user's snipes limit.")
@@ -446,16 +911,10 @@ async def admin_edit_limit(interaction: discord.Interaction, member: discord.Use
     if str(member.id) == ADMIN_ID:
         await interaction.response.send_message("❌ Cannot change limit for the admin.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT is_mod FROM user_configs WHERE discord_id = ?", (str(member.id),))
-        row = c.fetchone()
-        if row and row[0] == 1:
-            await interaction.response.send_message("❌ Cannot change limit for a mod; they have unlimited snipes.", ephemeral=True)
-            return
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)", (str(member.id),))
-        c.execute("UPDATE user_configs SET max_snipes = ? WHERE discord_id = ?", (limit, str(member.id)))
-        conn.commit()
+    if REGISTRY.config(str(member.id)).is_mod == 1:
+        await interaction.response.send_message("❌ Cannot change limit for a mod; they have unlimited snipes.", ephemeral=True)
+        return
+    await REGISTRY.set_config(str(member.id), "max_snipes", limit)
     await interaction.response.send_message(f"✅ Set snipes limit for {member.mention} to {limit}.", ephemeral=True)
     if message:
         try:
@@ -474,11 +933,7 @@ async def admin_ban(interaction: discord.Interaction, user_identifier: str, mess
     if str(user.id) == ADMIN_ID:
         await interaction.response.send_message("❌ Cannot ban the admin.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)", (str(user.id),))
-        c.execute("UPDATE user_configs SET banned = 1 WHERE discord_id = ?", (str(user.id),))
-        conn.commit()
+    await REGISTRY.set_config(str(user.id), "banned", 1)
     await interaction.response.send_message(f"✅ Banned {user.mention}.", ephemeral=True)
     if message:
         try:
@@ -494,11 +949,7 @@ async def admin_unban(interaction: discord.Interaction, user_identifier: str):
     if user is None:
         await interaction.response.send_message("❌ Could not find a user with that identifier.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)", (str(user.id),))
-        c.execute("UPDATE user_configs SET banned = 0 WHERE discord_id = ?", (str(user.id),))
-        conn.commit()
+    await REGISTRY.set_config(str(user.id), "banned", 0)
     await interaction.response.send_message(f"✅ Unbanned {user.mention}.", ephemeral=True)
 admin_unban.dm_permission = True
 
@@ -508,11 +959,7 @@ async def admin_set_mod(interaction: discord.Interaction, member: discord.User):
     if str(member.id) == ADMIN_ID:
         await interaction.response.send_message("❌ Admin is already mod by default.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, 10, 0, 0, 5, 0)", (str(member.id),))
-        c.execute("UPDATE user_configs SET is_mod = 1 WHERE discord_id = ?", (str(member.id),))
-        conn.commit()
+    await REGISTRY.set_config(str(member.id), "is_mod", 1)
     await interaction.response.send_message(f"✅ Set {member.mention} as a mod.", ephemeral=True)
 admin_set_mod.dm_permission = True
 
@@ -522,27 +969,21 @@ async def admin_remove_mod(interaction: discord.Interaction, member: discord.Use
     if str(member.id) == ADMIN_ID:
         await interaction.response.send_message("❌ Cannot remove admin.", ephemeral=True)
         return
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("UPDATE user_configs SET is_mod = 0 WHERE discord_id = ?", (str(member.id),))
-        conn.commit()
+    await REGISTRY.set_config(str(member.id), "is_mod", 0)
     await interaction.response.send_message(f"✅ Removed mod privileges from {member.mention}.", ephemeral=True)
 admin_remove_mod.dm_permission = True
 
 @bot.tree.command(name="admin_list_mods", description="List all mods with their usernames.")
 @app_commands.check(admin_check)
 async def admin_list_mods(interaction: discord.Interaction):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT discord_id FROM user_configs WHERE is_mod = 1")
-        rows = c.fetchall()
+    rows = [(discord_id,) for discord_id in REGISTRY.users_with_flag("is_mod")]
     if not rows:
         await interaction.response.send_message("No mods found.", ephemeral=True)
         return
     lines = []
     for (discord_id,) in rows:
         try:
-            user = await bot.fetch_user(int(discord_id))
+            user = await USER_CACHE.get_user(discord_id)
             username = f"{user.name}#{user.discriminator}"
         except Exception:
             username = discord_id
@@ -557,7 +998,7 @@ admin_list_mods.dm_permission = True
 @app_commands.check(admin_check)
 async def admin_status(interaction: discord.Interaction):
     status_message = await get_admin_status_message()
-    await interaction.response.send_message(status_message, ephemeral=True)
+    await interaction.response.send_message(**admin_status_reply(status_message), ephemeral=True)
 admin_status.default_member_permissions = discord.Permissions(administrator=True)
 admin_status.dm_permission = True
 
@@ -566,39 +1007,100 @@ admin_status.dm_permission = True
 async def admin_toggle_scan_notify(interaction: discord.Interaction, enable: bool):
     global ADMIN_SCAN_NOTIFY
     ADMIN_SCAN_NOTIFY = enable
+    SCHEDULER.reconcile()
     await interaction.response.send_message(f"Scan notifications have been {'enabled' if enable else 'disabled'}.", ephemeral=True)
 admin_toggle_scan_notify.dm_permission = True
 
 @bot.tree.command(name="admin_global_snipe", description="Toggle global sniping mode for the admin.")
+@app_commands.describe(filters="Subjects or subject:course to watch, e.g. 198, 640:151 ('all' watches everything; default: unchanged)")
 @app_commands.check(admin_check)
-async def admin_global_snipe(interaction: discord.Interaction, enable: bool):
-    global GLOBAL_SNIPING_ENABLED, ADMIN_GLOBAL_LAST_OPEN_STATUS
+async def admin_global_snipe(interaction: discord.Interaction, enable: bool, filters: Optional[str] = None):
+    global GLOBAL_SNIPING_ENABLED
+    if filters is not None:
+        try:
+            GLOBAL_DIGEST.set_filters("" if filters.strip().lower() == "all" else filters)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}. Use subjects or subject:course, e.g. 198, 640:151.", ephemeral=True)
+            return
+    # Transitions come from the scanner's pass-to-pass diff, so the baseline is always the previous catalog.
     GLOBAL_SNIPING_ENABLED = enable
-    if enable:
-        courses = get_cached_courses()
-        for course in courses:
-            for section in course.get("sections", []):
-                course_key = str(section.get("index"))
-                ADMIN_GLOBAL_LAST_OPEN_STATUS[course_key] = (str(section.get("openStatus")).strip().upper() == "TRUE")
-    else:
-        ADMIN_GLOBAL_LAST_OPEN_STATUS = {}
-    await interaction.response.send_message(f"Global sniping mode has been {'enabled' if enable else 'disabled'}.", ephemeral=True)
+    if not enable:
+        GLOBAL_DIGEST.clear()
+    SCHEDULER.reconcile()
+    await interaction.response.send_message(
+        f"Global sniping mode has been {'enabled' if enable else 'disabled'} (watching {format_filters(GLOBAL_DIGEST.filters)}, "
+        f"digest every {GLOBAL_DIGEST_INTERVAL}s).", ephemeral=True)
 admin_global_snipe.dm_permission = True
 
+@bot.tree.command(name="admin_cadence", description="Show or override how often each term/campus is polled.")
+@app_commands.describe(source="year:term:campus (default: the default source)", seconds="Fixed poll interval; 0 returns to adaptive")
+@app_commands.check(admin_check)
+async def admin_cadence(interaction: discord.Interaction, source: Optional[str] = None, seconds: Optional[float] = None):
+    try:
+        target = Source.parse(source) if source else DEFAULT_SOURCE
+    except ValueError:
+        await interaction.response.send_message("❌ Source must look like 2025:9:NB (year:term:campus).", ephemeral=True)
+        return
+    cadence = SCHEDULER.cadence(target)
+    if seconds is not None:
+        if seconds < 0 or 0 < seconds < MIN_POLL_INTERVAL:
+            await interaction.response.send_message(f"❌ Use 0 (adaptive) or at least {MIN_POLL_INTERVAL} seconds.", ephemeral=True)
+            return
+        cadence.override = seconds or None
+        SCHEDULER.wake(target)
+    lines = [f"{s.label}: {'active' if SCHEDULER.is_running(s) else 'paused'}, {SCHEDULER.cadence(s).describe()}"
+             for s in sorted(SCHEDULER.cadences.keys() | {target})]
+    await interaction.response.send_message("**Poll Cadence:**\n" + "\n".join(lines), ephemeral=True)
+admin_cadence.dm_permission = True
+
+@bot.tree.command(name="admin_log_level", description="Show or change the log level at runtime.")
+@app_commands.describe(level="New level", logger="Logger name, e.g. poller or discord (default: everything)")
+@app_commands.choices(level=[app_commands.Choice(name=name, value=name) for name in logs.LEVELS])
+@app_commands.check(admin_check)
+async def admin_log_level(interaction: discord.Interaction, level: Optional[str] = None, logger: Optional[str] = None):
+    if level is not None:
+        logs.set_level(level, logger)
+        log.warning("📝 Log level of %s set to %s by %s", logger or "root", level, interaction.user.id)
+    current = logging.getLevelName(logging.getLogger(logger).getEffectiveLevel())
+    await interaction.response.send_message(f"📝 Log level of `{logger or 'root'}`: {current}", ephemeral=True)
+admin_log_level.dm_permission = True
+
+@bot.tree.command(name="admin_profile", description="Sample the live process and return a flame-graph-ready profile.")
+@app_commands.describe(seconds=f"How long to sample (1-{PROFILE_MAX_SECONDS})", interval_ms="Milliseconds between samples (default 5)",
+                       all_threads="Sample every thread, not just the event loop")
+@app_commands.check(admin_check)
+async def admin_profile(interaction: discord.Interaction, seconds: int, interval_ms: Optional[int] = 5, all_threads: bool = False):
+    if not 1 <= seconds <= PROFILE_MAX_SECONDS or not 1 <= interval_ms <= 1000:
+        await interaction.response.send_message(f"❌ Use 1-{PROFILE_MAX_SECONDS} seconds and 1-1000 ms between samples.", ephemeral=True)
+        return
+    if PROFILE_LOCK.locked():
+        await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+        return
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    async with PROFILE_LOCK:
+        # The sampler thread reads the loop thread's stacks while the loop keeps running.
+        stacks, samples = await asyncio.to_thread(profiler.sample_stacks, seconds, interval_ms / 1000,
+                                                  None if all_threads else threading.get_ident())
+    folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    top = "\n".join(f"{count * 100 / max(samples, 1):5.1f}%  {label}" for label, count in profiler.top_functions(stacks))
+    await interaction.followup.send(
+        f"🔥 {samples} samples over {seconds}s. Top functions (self time):\n```\n{top[:1700]}\n```\n"
+        "Open the file with speedscope.app or flamegraph.pl.",
+        file=discord.File(io.BytesIO(folded.encode()), filename=f"profile_{time.strftime('%Y%m%d-%H%M%S')}.folded"),
+        ephemeral=True)
+admin_profile.dm_permission = True
+
 @bot.tree.command(name="admin_show_banned", description="Display a list of all banned users.")
 @app_commands.check(admin_check)
 async def admin_show_banned(interaction: discord.Interaction):
-    with sqlite3.connect(SQL_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT discord_id FROM user_configs WHERE banned = 1")
-        rows = c.fetchall()
+    rows = [(discord_id,) for discord_id in REGISTRY.users_with_flag("banned")]
     if not rows:
         await interaction.response.send_message("No banned users.", ephemeral=True)
         return
     banned_users = []
     for (discord_id,) in rows:
         try:
-            user = await bot.fetch_user(int(discord_id))
+            user = await USER_CACHE.get_user(discord_id)
             banned_users.append(f"{user.name}#{user.discriminator} (ID: {discord_id})")
         except Exception:
             banned_users.append(f"Unknown User (ID: {discord_id})")
@@ -633,7 +1135,7 @@ admin_unset_ram.dm_permission = True
 async def admin_help(interaction: discord.Interaction):
     help_message = """
 **Admin Commands:**
-`/admin_list_snipes` - List all active snipes in a .txt file.
+`/admin_list_snipes [fmt] [compress] [member] [subject] [index_number] [page]` - Export snipes (.txt/.csv, optionally gzipped) or show a page inline.
 `/admin_edit_limit <user> <limit> [message]` - Edit a user's snipes limit.
 `/admin_ban <user_identifier> [message]` - Ban a user from using the bot (by ID or username).
 `/admin_unban <user_identifier>` - Unban a user (by ID or username).
@@ -643,7 +1145,10 @@ async def admin_help(interaction: discord.Interaction):
 `/admin_show_banned` - List all banned users.
 `/admin_status` - Show bot status information.
 `/admin_toggle_scan_notify <enable>` - Toggle API scan notifications.
-`/admin_global_snipe <enable>` - Toggle global sniping mode.
+`/admin_global_snipe <enable> [filters]` - Toggle global sniping digests, optionally for some subjects/courses.
+`/admin_cadence [source] [seconds]` - Show or override the poll interval (0 = adaptive).
+`/admin_log_level [level] [logger]` - Show or change the log level.
+`/admin_profile <seconds> [interval_ms] [all_threads]` - Sample the live process into a flame-graph file.
 `/admin_set_ram <megabytes>` - Allocate artificial memory (in MB).
 `/admin_unset_ram` - Free the artificial memory.
 `/admin_help` - Show this help message.
@@ -661,22 +1166,99 @@ async def admin_status_prefix(ctx):
         await ctx.send("❌ You don't have permission to use this command.")
         return
     status_message = await get_admin_status_message()
-    await ctx.send(status_message)
+    await ctx.send(**admin_status_reply(status_message))
 
 #########################################
 # Bot Startup                           #
 #########################################
 
-@bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
+async def start_services():
+    """Start storage, dispatch and the background tasks once per process."""
+    if BACKGROUND_TASKS:
+        return  # setup_hook runs again if the client logs in again
     await initialize_storage()
+    DISPATCHER.start()
+    await start_metrics()
+    WATCHDOG.start()
+    start_task("prewarm", prewarm_users())
+    start_task("scanner", supervise("scanner", check_courses))
+    start_task("global_digest", supervise("global_digest", GLOBAL_DIGEST.run))
+    start_task("command_sync", sync_commands())
+    log.info("🚀 Started monitoring courses!")
+
+async def prewarm_users():
+    """Open the DM channels of everyone with a snipe or rule once the bot is ready."""
+    await bot.wait_until_ready()
+    await USER_CACHE.prewarm(sorted(REGISTRY.by_user.keys() | REGISTRY.rules_by_user.keys()))
+
+def start_task(name, coroutine):
+    if name in BACKGROUND_TASKS and not BACKGROUND_TASKS[name].done():
+        coroutine.close()
+        return BACKGROUND_TASKS[name]
+    BACKGROUND_TASKS[name] = asyncio.create_task(coroutine, name=name)
+    return BACKGROUND_TASKS[name]
+
+async def supervise(name, factory):
+    """Run ``factory()`` until cancelled, restarting it with backoff whenever it stops."""
+    delay = SUPERVISOR_BACKOFF_MIN
+    while True:
+        started = time.monotonic()
+        try:
+            await factory()
+            log.error("🔥 %s exited unexpectedly.", name)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.exception("🔥 %s crashed: %s", name, e)
+        if time.monotonic() - started >= SUPERVISOR_STABLE_AFTER:
+            delay = SUPERVISOR_BACKOFF_MIN
+        metrics.TASK_RESTARTS.inc(1, name)
+        log.warning("🔁 Restarting %s in %ss.", name, delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SUPERVISOR_BACKOFF_MAX)
+
+def command_tree_hash():
+    commands_json = json.dumps([command.to_dict(bot.tree) for command in bot.tree.get_commands()], sort_keys=True)
+    return hashlib.sha256(f"{bot.application_id}:{commands_json}".encode()).hexdigest()
+
+async def sync_commands():
+    """Sync slash commands with Discord when the tree changed since the last sync."""
+    digest = command_tree_hash()
+    try:
+        with open(COMMAND_HASH_FILE, encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                log.info("🚀 Slash commands unchanged since the last sync; skipping it.")
+                return
+    except FileNotFoundError:
+        pass
     try:
         synced = await bot.tree.sync()
-        print(f"🚀 Synced {len(synced)} slash command(s).")
     except Exception as e:
-        print("🔥 Failed to sync commands:", e)
-    asyncio.create_task(check_courses())
-    print("🚀 Started monitoring courses!")
+        log.error("🔥 Failed to sync commands: %s", e)
+        return
+    log.info("🚀 Synced %d slash command(s).", len(synced))
+    with open(COMMAND_HASH_FILE, "w", encoding="utf-8") as f:
+        f.write(digest + "\n")
 
-bot.run(TOKEN)
+@bot.event
+async def on_ready():
+    # Runs again after every gateway reconnect, so nothing here may start work.
+    log.info("✅ Logged in as %s (%d guild(s)).", bot.user, len(bot.guilds))
+
+async def start_metrics():
+    global METRICS_SERVER
+    if METRICS_SERVER is not None:
+        return
+    asyncio.create_task(metrics.monitor_loop_lag())
+    if METRICS_PORT:
+        try:
+            METRICS_SERVER = await metrics.start_server(METRICS_HOST, METRICS_PORT)
+            return
+        except OSError as e:
+            log.warning("⚠️ Could not start the metrics endpoint on port %d: %s", METRICS_PORT, e)
+    METRICS_SERVER = False  # lag monitor running, no endpoint
+
+if __name__ == "__main__":
+    logs.setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
+    restore_snapshots()  # in worker mode too: the worker's first record is diffed against this baseline
+    bot.run(TOKEN, log_handler=None)  # discord.py logs through the root logger's queue too
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import NamedTuple
+
+import discord
+
+from metrics import ALERT_LATENCY_SECONDS, ALERTS, DISCORD_RATE_LIMITS
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Notification Dispatcher               #
+#########################################
+
+class Alert(NamedTuple):
+    discord_id: str
+    content: str
+    tts: bool
+    keys: tuple          # what the DM counts against: (discord_id, source, index_number) snipes and registry.Rule objects
+    finished: tuple      # the keys whose notification limit this DM uses up
+    detected_at: float   # when the opening was seen, for detection-to-delivery latency
+
+def retry_after_seconds(error):
+    """Seconds Discord asked us to wait, or None if ``error`` is not a rate limit."""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        headers = getattr(error.response, "headers", None) or {}
+        try:
+            return float(headers.get("Retry-After", 1))
+        except ValueError:
+            return 1.0
+    return None
+
+class AlertBatch:
+    """One scan pass's alerts, grouped per recipient.
+
+    Every snipe or rule that fires adds a part (its key and a line of
+    text); ``submit`` then queues one DM per user holding all of their
+    parts, split only where Discord's message limit forces it. With
+    ``coalesce`` off each part is its own DM (one per snipe or rule).
+    """
+
+    def __init__(self, dispatcher, render, detected_at, coalesce=True, max_length=1800):
+        self.dispatcher = dispatcher
+        self.render = render  # (discord_id, [text, ...]) -> message content
+        self.detected_at = detected_at
+        self.coalesce = coalesce
+        self.max_length = max_length
+        self.parts = {}  # discord_id -> [(key, text, finished, tts), ...]
+
+    def add(self, discord_id, key, text, finished, tts):
+        """Add one part unless its snipe/rule already has a DM waiting. Returns True if added."""
+        if self.dispatcher.is_pending(key):
+            return False
+        self.parts.setdefault(discord_id, []).append((key, text, finished, tts))
+        return True
+
+    def chunks(self, parts):
+        if not self.coalesce:
+            return [[part] for part in parts]
+        chunks, length = [[]], 0
+        for part in parts:
+            if chunks[-1] and length + len(part[1]) > self.max_length:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(part)
+            length += len(part[1]) + 1
+        return chunks
+
+    def submit(self):
+        """Queue the DMs. Returns how many were queued."""
+        queued = 0
+        for discord_id, parts in self.parts.items():
+            for chunk in self.chunks(parts):
+                queued += self.dispatcher.submit(Alert(
+                    discord_id,
+                    self.render(discord_id, [text for _, text, _, _ in chunk]),
+                    any(tts for _, _, _, tts in chunk),
+                    tuple(key for key, _, _, _ in chunk),
+                    tuple(key for key, _, finished, _ in chunk if finished),
+                    self.detected_at,
+                ))
+        self.parts = {}
+        return queued
+
+class NotificationDispatcher:
+    """Delivers alerts from a queue with a bounded pool of concurrent senders.
+
+    A 429 pauses every sender until its retry-after has passed, then the alert
+    is retried. Counters are updated in memory as each alert is delivered;
+    the database writes for one burst (until the queue drains) are committed
+    in a single registry transaction.
+    """
+
+    def __init__(self, resolve_user, registry, concurrency=8, max_attempts=5):
+        self.resolve_user = resolve_user  # async discord_id -> object with .send()
+        self.registry = registry
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.queue = asyncio.Queue()
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.latencies = deque(maxlen=1000)
+        self._pending = set()    # Alert.keys of everything queued or in flight
+        self._notified = []
+        self._finished = []
+        self._active = 0
+        self._resume_at = 0
+        self._workers = []
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.flush()
+
+    def is_pending(self, key):
+        return key in self._pending
+
+    def batch(self, render, detected_at, coalesce=True):
+        return AlertBatch(self, render, detected_at, coalesce)
+
+    def submit(self, alert):
+        """Queue an alert unless every snipe/rule it covers already has one waiting. Returns True if queued."""
+        if all(key in self._pending for key in alert.keys):
+            return False
+        self._pending.update(alert.keys)
+        self.queue.put_nowait(alert)
+        return True
+
+    async def _worker(self):
+        while True:
+            alert = await self.queue.get()
+            self._active += 1
+            try:
+                await self._deliver(alert)
+            finally:
+                self._active -= 1
+                self.registry.apply_notifications(alert.keys, alert.finished)
+                self._pending.difference_update(alert.keys)
+                self._notified.extend(alert.keys)
+                self._finished.extend(alert.finished)
+                self.queue.task_done()
+            if self.queue.empty() and self._active == 0:
+                await self.flush()
+
+    async def _deliver(self, alert):
+        for _ in range(self.max_attempts):
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                user = await self.resolve_user(alert.discord_id)
+                await user.send(alert.content, tts=alert.tts)
+            except (discord.HTTPException, discord.RateLimited) as e:
+                retry_after = retry_after_seconds(e)
+                if retry_after is None:
+                    log.error("❌ Failed to send message to %s: %s", alert.discord_id, e)
+                    break
+                self.rate_limited += 1
+                DISCORD_RATE_LIMITS.inc()
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                continue
+            except Exception as e:
+                log.error("❌ Failed to send message to %s: %s", alert.discord_id, e)
+                break
+            self.sent += 1
+            ALERTS.inc(1, "sent")
+            self.latencies.append(time.time() - alert.detected_at)
+            ALERT_LATENCY_SECONDS.observe(self.latencies[-1])
+            log.debug("✅ Sent DM to user %s for %d snipe(s)", alert.discord_id, len(alert.keys))
+            return True
+        self.failed += 1
+        ALERTS.inc(1, "failed")
+        return False
+
+    async def flush(self):
+        """Commit the counters of everything delivered since the last flush in one transaction.
+
+        On failure the entries are kept for the next flush. Returns True if
+        there was nothing to write or the write succeeded.
+        """
+        notified, self._notified = self._notified, []
+        finished, self._finished = self._finished, []
+        if not notified and not finished:
+            return True
+        try:
+            await self.registry.record_notifications(notified, finished)
+        except Exception as e:
+            self._notified = notified + self._notified
+            self._finished = finished + self._finished
+            log.error("❌ Could not record %d notification(s), keeping them for the next flush: %s", len(notified), e)
+            return False
+        log.info("💾 Recorded %d notification(s); deleted %d snipe(s)/rule(s) that reached their limit.", len(notified), len(finished))
+        return True
+
+    def latency_summary(self):
+        if not self.latencies:
+            return "n/a"
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"p50 {p50:.2f}s / p95 {p95:.2f}s"
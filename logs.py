@@ -0,0 +1,48 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+#########################################
+# Asynchronous Logging Pipeline         #
+#########################################
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {"time": record.created, "level": record.levelname, "logger": record.name, "message": record.getMessage()}
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(level="INFO", fmt="text", path=None):
+    """Send every record through a queue to a background writer thread.
+
+    Callers only pay for building the record and a queue put; formatting
+    and the stdout/file writes happen on the listener's thread. Returns the
+    started QueueListener (stop it to flush on shutdown).
+    """
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(logging.handlers.RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"))
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def set_level(level, name=None):
+    """Change the level of one logger (the root one by default) at runtime. Returns the logger."""
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    return logger
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Metrics (Prometheus Text Format)      #
+#########################################
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Metric:
+    """Base for one metric family; children are keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._children = {}
+        METRICS.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_text(self, values, extra=()):
+        pairs = [*zip(self.label_names, values), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return [0]
+
+    def inc(self, amount=1, *values):
+        self.labels(*values)[0] += amount
+
+    def value(self, *values):
+        return self.labels(*values)[0]
+
+    def total(self):
+        return sum(child[0] for child in self._children.values())
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {child[0]}"]
+
+class Gauge(Counter):
+    """A value that goes up and down; ``function`` makes it read a live value at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        super().__init__(name, help_text, labels)
+        self.function = function
+        if function is not None:
+            self.labels()
+
+    def set(self, value, *values):
+        self.labels(*values)[0] = value
+
+    def value(self, *values):
+        return self.function() if self.function is not None else self.labels(*values)[0]
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {self.value(*values)}"]
+
+class Histogram(Metric):
+    """Fixed-bucket histogram: an observation is one bisect and two additions."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]  # per-bucket counts (+Inf last), sum, count
+
+    def observe(self, value, *values):
+        child = self.labels(*values)
+        child[0][bisect_left(self.buckets, value)] += 1
+        child[1] += value
+        child[2] += 1
+
+    def time(self, *values):
+        return _Timer(self, values)
+
+    def count(self):
+        return sum(child[2] for child in self._children.values())
+
+    def mean(self):
+        count = self.count()
+        return sum(child[1] for child in self._children.values()) / count if count else 0.0
+
+    def _render_child(self, values, child):
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), child[0]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_text(values, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {child[1]}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {child[2]}")
+        return lines
+
+class _Timer:
+    def __init__(self, histogram, values):
+        self.histogram = histogram
+        self.values = values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.values)
+
+METRICS = []
+
+SOC_FETCH_SECONDS = Histogram("soc_fetch_seconds", "Time to download (and stream-parse) one SOC feed.", ["feed"])
+SOC_FETCH_BYTES = Counter("soc_fetch_bytes_total", "Decoded bytes received from the SOC API.", ["feed"])
+SOC_FETCHES = Counter("soc_fetches_total", "SOC requests by HTTP status (or 'error').", ["feed", "status"])
+SOC_PARSE_SECONDS = Histogram("soc_parse_seconds", "Time spent decoding a SOC payload.", ["feed"])
+SOC_STALE_SERVED = Counter("soc_stale_served_total", "Lookups answered from an expired cache while a background refresh ran.", ["feed"])
+SOC_CIRCUIT_OPENS = Counter("soc_circuit_opens_total", "Times repeated SOC failures opened the circuit breaker.")
+SCAN_SECONDS = Histogram("scan_pass_seconds", "Duration of one scan pass.", ["source"])
+SCAN_SECTIONS = Counter("scan_sections_total", "Sections covered by scan passes that saw a new snapshot.", ["source"])
+SCAN_TRANSITIONS = Counter("scan_transitions_total", "Sections that opened or closed between scans.", ["source", "direction"])
+ALERTS_QUEUED = Counter("alerts_queued_total", "Alerts handed to the dispatcher by notify_users.")
+ALERTS = Counter("alerts_total", "Alert deliveries by result.", ["result"])
+ALERT_LATENCY_SECONDS = Histogram("alert_latency_seconds", "Time from detecting an opening to the DM being sent.",
+                                  buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120))
+DISCORD_RATE_LIMITS = Counter("discord_rate_limited_total", "429 responses from Discord.")
+DB_SECONDS = Histogram("db_operation_seconds", "SQLite operations, timed on the database thread.", ["operation"])
+COMMANDS = Counter("commands_total", "Slash commands handled, by command and result.", ["command", "result"])
+COMMAND_SECONDS = Histogram("command_seconds", "Time from a slash command being sent to its handler finishing.", ["command"])
+LOOP_LAG_SECONDS = Histogram("event_loop_lag_seconds", "How late the event loop ran a timer.")
+LOOP_LAG_MAX = Gauge("event_loop_lag_max_seconds", "Largest event-loop lag seen since the last scrape.")
+LOOP_STALLS = Counter("event_loop_stalls_total", "Times the event loop was blocked past the watchdog threshold.")
+TASK_RESTARTS = Counter("task_restarts_total", "Supervised background tasks restarted after crashing or exiting.", ["task"])
+COLD_START_SECONDS = Gauge("cold_start_seconds", "Time from process start to the first completed scan pass.")
+LOOP_STALL_SECONDS = Histogram("event_loop_stall_seconds", "How long each watchdog-detected stall blocked the loop.")
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    LOOP_LAG_MAX.set(0)
+    return "\n".join(lines) + "\n"
+
+async def monitor_loop_lag(interval=0.5):
+    """Measure event-loop lag as how late a sleep wakes up."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        LOOP_LAG_SECONDS.observe(lag)
+        if lag > LOOP_LAG_MAX.value():
+            LOOP_LAG_MAX.set(lag)
+
+async def start_server(host="127.0.0.1", port=9108):
+    """Serve ``/metrics`` from the running loop; returns the runner so the caller can clean it up."""
+    async def handle(request):
+        return web.Response(body=render().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("📈 Metrics on http://%s:%d/metrics", host, port)
+    return runner
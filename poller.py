@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+
+from catalog import CatalogBuilder
+from metrics import TASK_RESTARTS
+from soc_client import CircuitBreaker, SessionPool, SOCAPIError, SOCClient, SOCUnavailableError
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Tiered SOC Poller                     #
+#########################################
+
+class TieredPoller:
+    """Combines the small openSections feed with the full courses.json catalog.
+
+    The hot loop only re-downloads the open-index list (a few KB) every
+    ``open_interval`` seconds. The catalog, needed for names and the section
+    layout, refreshes every ``catalog_interval`` seconds, or early when the
+    open list mentions an index the catalog does not know. Both are merged
+    into one CatalogSnapshot so every reader sees a consistent view.
+    """
+
+    def __init__(self, catalog_url, open_sections_url, open_interval=5, catalog_interval=1800,
+                 min_catalog_refresh=60, timeout=20, pool=None):
+        self.catalog_client = SOCClient(catalog_url, cache_duration=catalog_interval, timeout=timeout, pool=pool, parser=CatalogBuilder)
+        self.open_client = SOCClient(open_sections_url, cache_duration=open_interval, timeout=timeout, pool=pool)
+        self.min_catalog_refresh = min_catalog_refresh
+        self.snapshot = None
+        self.unknown = []
+        self._merged_from = (None, None)
+
+    async def close(self):
+        await self.catalog_client.close()
+        await self.open_client.close()
+
+    @property
+    def timestamp(self):
+        return self.open_client.timestamp
+
+    def age(self):
+        """Seconds since the open-sections list was last confirmed, or None before the first snapshot."""
+        return time.time() - self.timestamp if self.snapshot is not None else None
+
+    async def _get_catalog(self, stale_ok=False):
+        try:
+            return await self.catalog_client.get(stale_ok=stale_ok)
+        except Exception as e:
+            if self.catalog_client.data is None:
+                raise
+            # Names and layout change rarely; an old catalog is better than no scan.
+            log.warning("⚠️ Catalog refresh failed, keeping the copy from %s: %s",
+                        time.strftime("%H:%M:%S", time.localtime(self.catalog_client.timestamp)), e)
+            return self.catalog_client.data
+
+    def request_catalog_refresh(self, reason):
+        """Expire the catalog so the next poll re-downloads it (at most once per min_catalog_refresh)."""
+        if time.time() - self.catalog_client.timestamp >= self.min_catalog_refresh:
+            log.info("📥 Refreshing the full catalog early: %s", reason)
+            self.catalog_client.timestamp = 0
+
+    def export_state(self):
+        """What a warm restart needs: (meta, catalog, merged open bitmap), or None before the first poll."""
+        if self.snapshot is None or self.catalog_client.data is None:
+            return None
+        meta = {}
+        for name, client in (("catalog", self.catalog_client), ("open", self.open_client)):
+            meta[name] = {"timestamp": client.timestamp, "etag": client.etag, "last_modified": client.last_modified}
+        return meta, self.catalog_client.data, self.snapshot.open_bits
+
+    def restore_state(self, meta, catalog, open_bits):
+        """Seed both tiers from a saved state; the next poll revalidates them with the saved validators."""
+        snapshot = catalog.with_open_bits(open_bits)
+        open_list = snapshot.open_indexes()
+        tiers = [(client, data, meta[name]["timestamp"], meta[name]["etag"], meta[name]["last_modified"])
+                 for name, client, data in (("catalog", self.catalog_client, catalog), ("open", self.open_client, open_list))]
+        for client, data, timestamp, etag, last_modified in tiers:  # only once all of meta has been read
+            client.data, client.timestamp, client.etag, client.last_modified = data, timestamp, etag, last_modified
+        self.snapshot, self.unknown = snapshot, []
+        self._merged_from = (catalog, open_list)
+        return snapshot
+
+    async def get(self, max_open_age=None, stale_ok=False):
+        """Return the merged snapshot, refreshing whichever tier has expired.
+
+        ``max_open_age`` overrides how old the open-sections list may be
+        (0 forces a conditional re-download). With ``stale_ok`` expired tiers
+        are served as they are and refreshed in the background.
+        """
+        catalog, open_list = await asyncio.gather(self._get_catalog(stale_ok), self.open_client.get(max_open_age, stale_ok))
+        merged_catalog, merged_open = self._merged_from
+        if catalog is not merged_catalog or open_list is not merged_open:
+            self.snapshot, self.unknown = catalog.with_open_indexes(open_list)
+            self._merged_from = (catalog, open_list)
+            if self.unknown:
+                self.request_catalog_refresh(f"{len(self.unknown)} open index(es) missing from the catalog")
+        return self.snapshot
+
+#########################################
+# Adaptive Poll Cadence                 #
+#########################################
+
+def parse_windows(text):
+    """Parse ``"2025-11-03T07:00/2025-11-03T12:00,..."`` (local time) into (start, end) epoch pairs."""
+    windows = []
+    for item in text.split(","):
+        if item.strip():
+            start, end = item.split("/")
+            windows.append((datetime.fromisoformat(start.strip()).timestamp(), datetime.fromisoformat(end.strip()).timestamp()))
+    return windows
+
+class AdaptiveCadence:
+    """How long one source waits between polls.
+
+    The interval halves whenever a poll brings a new payload and grows by
+    ``growth`` for every poll that does not, staying within
+    [min_interval, max_interval]. Inside a registration window it is pinned
+    to ``min_interval``. API errors switch to exponential backoff until the
+    next successful poll. Every delay gets +/- ``jitter`` so sources (and
+    bot copies) do not poll in lockstep. An admin ``override`` beats all of it.
+    """
+
+    def __init__(self, base_interval=5, min_interval=2, max_interval=60, growth=1.25,
+                 backoff_max=300, jitter=0.1, windows=()):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.windows = windows
+        self.interval = base_interval
+        self.errors = 0
+        self.override = None
+        self.changes = 0
+        self.polls = 0
+        self.last_error = None
+
+    def in_window(self, now=None):
+        now = time.time() if now is None else now
+        return any(start <= now < end for start, end in self.windows)
+
+    def record_poll(self, changed):
+        self.polls += 1
+        self.errors = 0
+        if changed:
+            self.changes += 1
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.growth)
+
+    def record_error(self, error):
+        self.errors += 1
+        self.last_error = error
+
+    def mode(self):
+        if self.override is not None:
+            return "override"
+        if self.errors:
+            return "backoff"
+        if self.in_window():
+            return "registration window"
+        return "adaptive"
+
+    def current(self):
+        """Delay before the next poll, without jitter."""
+        mode = self.mode()
+        if mode == "override":
+            return self.override
+        if mode == "backoff":
+            return min(self.backoff_max, self.base_interval * 2 ** self.errors)
+        if mode == "registration window":
+            return self.min_interval
+        return self.interval
+
+    def next_delay(self):
+        return self.current() * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def describe(self):
+        text = f"{self.mode()}, every ~{self.current():.1f}s ({self.changes}/{self.polls} polls changed)"
+        if self.errors:
+            text += f", {self.errors} error(s) in a row: {self.last_error}"
+        return text
+
+#########################################
+# Multi-Source Poller Scheduler         #
+#########################################
+
+class PollerScheduler:
+    """Runs one TieredPoller per active year/term/campus source, concurrently.
+
+    All pollers share one keep-alive session pool but keep their own caches
+    and cadence. ``active_sources()`` decides what runs: a source that drops
+    out of it (no subscribers left) has its task cancelled, so a paused
+    source makes no requests until something subscribes to it again.
+
+    Each source loop sleeps for its AdaptiveCadence delay and then forces a
+    conditional re-download, so ``on_snapshot`` runs once per payload fetched
+    rather than on a fixed tick. ``wake(source)`` cuts the sleep short.
+    """
+
+    def __init__(self, api_base, on_snapshot, active_sources, open_interval=5, catalog_interval=1800,
+                 timeout=20, pool_size=8, cadence_options=None, breaker_options=None):
+        self.api_base = api_base
+        self.on_snapshot = on_snapshot        # async (source, snapshot) -> None, once per poll
+        self.active_sources = active_sources  # () -> iterable of Source
+        self.open_interval = open_interval
+        self.catalog_interval = catalog_interval
+        self.timeout = timeout
+        self.cadence_options = cadence_options or {}
+        self.breaker_options = breaker_options or {}
+        self.pool = SessionPool(limit=pool_size, breaker=CircuitBreaker(**self.breaker_options))
+        self.pollers = {}
+        self.cadences = {}
+        self._wakeups = {}
+        self._tasks = {}
+
+    def poller(self, source):
+        poller = self.pollers.get(source)
+        if poller is None:
+            poller = self.pollers[source] = TieredPoller(
+                source.url(self.api_base, "courses"), source.url(self.api_base, "openSections"),
+                open_interval=self.open_interval, catalog_interval=self.catalog_interval,
+                timeout=self.timeout, pool=self.pool)
+        return poller
+
+    def cadence(self, source):
+        cadence = self.cadences.get(source)
+        if cadence is None:
+            cadence = self.cadences[source] = AdaptiveCadence(base_interval=self.open_interval, **self.cadence_options)
+        return cadence
+
+    async def get(self, source):
+        """Current snapshot for ``source``; works for paused sources too (e.g. name lookups).
+
+        Only waits on the network before the first download: a polled source
+        is kept fresh by its loop, and a paused one is served from its cache
+        while a background refresh runs.
+        """
+        poller = self.poller(source)
+        if self.is_running(source) and poller.snapshot is not None:
+            return poller.snapshot
+        return await poller.get(stale_ok=True)
+
+    def breaker_status(self):
+        """(state, description) of the SOC circuit breaker shared by every poller."""
+        breaker = self.pool.breaker
+        return breaker.state, breaker.describe()
+
+    def cached(self, source):
+        """Last merged snapshot for ``source`` without polling, or None if it was never fetched."""
+        poller = self.pollers.get(source)
+        return poller.snapshot if poller is not None else None
+
+    def is_running(self, source):
+        task = self._tasks.get(source)
+        return task is not None and not task.done()
+
+    def wake(self, source):
+        """Poll ``source`` now instead of waiting out its current delay."""
+        wakeup = self._wakeups.get(source)
+        if wakeup is not None:
+            wakeup.set()
+
+    def reconcile(self):
+        """Start pollers for newly active sources, restart dead ones and pause the ones nobody needs."""
+        wanted = set(self.active_sources())
+        for source, task in list(self._tasks.items()):
+            if task.done() and source in wanted:
+                error = task.exception() if not task.cancelled() else "cancelled"
+                log.error("🔥 Poller of %s stopped (%s); restarting it.", source.label, error or "exited")
+                TASK_RESTARTS.inc(1, f"poller {source}")
+                del self._tasks[source]
+        for source in wanted - self._tasks.keys():
+            log.info("▶️ Polling %s.", source.label)
+            self._wakeups[source] = asyncio.Event()
+            self._tasks[source] = asyncio.create_task(self._run(source))
+        for source in self._tasks.keys() - wanted:
+            log.info("⏸ Pausing %s: no subscribers.", source.label)
+            self._tasks.pop(source).cancel()
+            self._wakeups.pop(source, None)
+
+    async def _run(self, source):
+        poller = self.poller(source)
+        cadence = self.cadence(source)
+        wakeup = self._wakeups[source]
+        while True:
+            wakeup.clear()
+            previous = poller.snapshot
+            delay = None
+            try:
+                snapshot = await poller.get(max_open_age=0)
+            except asyncio.CancelledError:
+                raise
+            except SOCUnavailableError:
+                # No request went out, so the cadence does not back off; wait for the breaker's next probe.
+                delay = max(self.pool.breaker.retry_at - time.time(), cadence.min_interval)
+                log.debug("⛔ Skipping %s while the SOC circuit is open; retrying in %.0fs.", source.label, delay)
+            except Exception as e:
+                cadence.record_error(e)
+                if isinstance(e, SOCAPIError) and e.status >= 500:
+                    log.warning("🔥 SOC returned %d for %s; backing off %.0fs.", e.status, source.label, cadence.current())
+                else:
+                    log.warning("🔥 Poll of %s failed, backing off %.0fs: %s", source.label, cadence.current(), e)
+            else:
+                cadence.record_poll(previous is None or snapshot.open_mask != previous.open_mask)
+                try:
+                    await self.on_snapshot(source, snapshot)
+                except Exception as e:
+                    log.exception("🔥 Scan of %s failed: %s", source.label, e)
+            try:
+                await asyncio.wait_for(wakeup.wait(), delay if delay is not None else cadence.next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+        await self.pool.close()
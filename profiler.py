@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from metrics import LOOP_STALL_SECONDS, LOOP_STALLS
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Event-Loop Stall Watchdog             #
+#########################################
+
+class LoopWatchdog:
+    """Catches the code that blocks the event loop, while it is blocking it.
+
+    A coroutine on the loop stamps a heartbeat every ``interval`` seconds; a
+    daemon thread checks the stamp. Once it is older than ``threshold`` the
+    thread grabs the loop thread's current stack (the blocking call is on
+    it) and logs it, then logs the stall's total length when the loop
+    recovers. The last ``keep`` stalls are kept for /admin_status.
+    """
+
+    def __init__(self, threshold=0.25, interval=0.05, keep=20):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=keep)  # (started at, seconds, stack text)
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._thread = None
+
+    def start(self):
+        """Start watching the running loop. Call from the loop's thread."""
+        if self._thread is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        stall_beat, stack = None, None
+        while True:
+            time.sleep(self.interval)
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if stall_beat is not None and beat != stall_beat:
+                seconds = beat - stall_beat - self.interval
+                self.stalls.append((stall_beat, seconds, stack))
+                LOOP_STALL_SECONDS.observe(seconds)
+                log.warning("🐢 Event loop stall over after %.0f ms.", seconds * 1000)
+                stall_beat, stack = None, None
+            if stall_beat is None and blocked >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)"
+                stall_beat = beat
+                LOOP_STALLS.inc()
+                log.warning("🐢 Event loop blocked for %.0f ms so far, in:\n%s", blocked * 1000, stack)
+
+    def summary(self):
+        if not self.stalls:
+            return f"none over {self.threshold * 1000:.0f} ms"
+        started, seconds, _ = self.stalls[-1]
+        return (f"{LOOP_STALLS.total()} over {self.threshold * 1000:.0f} ms, "
+                f"last {seconds * 1000:.0f} ms at {time.strftime('%H:%M:%S', time.localtime(time.time() - time.monotonic() + started))}")
+
+#########################################
+# Sampling Profiler                     #
+#########################################
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse(frame, root=None):
+    """One stack in the collapsed format of flamegraph.pl / speedscope: root;...;leaf."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ";".join(reversed(labels))
+
+def sample_stacks(seconds, interval=0.005, thread_id=None):
+    """Sample one thread (default: every other thread) for ``seconds``; returns (Counter of collapsed stacks, samples).
+
+    Runs in the calling thread, so call it off the event loop (e.g. with
+    asyncio.to_thread) and pass the loop thread's id.
+    """
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (thread_id is not None and ident != thread_id):
+                continue
+            stacks[collapse(frame, None if thread_id is not None else names.get(ident, str(ident)))] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+def top_functions(stacks, limit=10):
+    """Functions with the most samples at the top of the stack (self time)."""
+    leaves = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return leaves.most_common(limit)
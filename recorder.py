@@ -0,0 +1,145 @@
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from catalog import CatalogSnapshot
+from soc_client import Source
+
+log = logging.getLogger(__name__)
+
+#########################################
+# SOC Snapshot Recorder                 #
+#########################################
+
+ARCHIVE_MAGIC = b"RUSOCREC\x00\x01"
+RECORD_HEADER = struct.Struct("<BdHI")  # kind, timestamp, source length, body length
+
+CATALOG = 1     # body: CatalogSnapshot.to_bytes() of the merged snapshot
+OPEN_BITS = 2   # body: zlib-compressed open bitmap for the current catalog
+OPEN_FLIPS = 3  # body: little-endian int32 rows whose open flag flipped
+
+def encode_record(kind, source, body, timestamp):
+    source_text = str(source).encode()
+    return RECORD_HEADER.pack(kind, timestamp, len(source_text), len(body)) + source_text + body
+
+class SnapshotEncoder:
+    """Turns each source's successive snapshots into (kind, body) records.
+
+    A source's first snapshot, and every one after a catalog refresh, is
+    stored whole. After that ``mode="diff"`` stores only the rows whose open
+    flag flipped, while ``mode="full"`` stores the open bitmap of every
+    poll. An unchanged poll in diff mode yields nothing unless
+    ``keep_unchanged`` asks for an empty flip record.
+    """
+
+    def __init__(self, mode="diff", keep_unchanged=False):
+        if mode not in ("diff", "full"):
+            raise ValueError(f"Unknown record mode: {mode}")
+        self.mode = mode
+        self.keep_unchanged = keep_unchanged
+        self._last = {}  # source -> last encoded snapshot
+
+    def encode(self, source, snapshot):
+        """Return (kind, body) for ``snapshot``, or None when nothing needs storing."""
+        last = self._last.get(source)
+        self._last[source] = snapshot
+        if last is None or snapshot.indexes is not last.indexes:
+            return CATALOG, snapshot.to_bytes()
+        if self.mode == "full":
+            return OPEN_BITS, zlib.compress(snapshot.open_bits)
+        if snapshot.open_mask != last.open_mask:
+            rows = array("i", snapshot.rows_in_mask(snapshot.open_mask ^ last.open_mask))
+            if sys.byteorder == "big":
+                rows.byteswap()
+            return OPEN_FLIPS, rows.tobytes()
+        return (OPEN_FLIPS, b"") if self.keep_unchanged else None
+
+class SnapshotDecoder:
+    """Rebuilds each source's snapshots from the records of a SnapshotEncoder."""
+
+    def __init__(self):
+        self.current = {}  # source -> latest snapshot
+
+    def decode(self, kind, source, body):
+        if kind == CATALOG:
+            snapshot = CatalogSnapshot.from_bytes(body)
+        elif kind == OPEN_BITS:
+            snapshot = self.current[source].with_open_bits(zlib.decompress(body))
+        elif kind == OPEN_FLIPS:
+            if not body:
+                return self.current[source]  # an unchanged poll keeps the same snapshot object
+            rows = array("i")
+            rows.frombytes(body)
+            if sys.byteorder == "big":
+                rows.byteswap()
+            bits = bytearray(self.current[source].open_bits)
+            for row in rows:
+                bits[row >> 3] ^= 1 << (row & 7)
+            snapshot = self.current[source].with_open_bits(bits)
+        else:
+            raise ValueError(f"Unknown record kind {kind}")
+        self.current[source] = snapshot
+        return snapshot
+
+class SnapshotRecorder:
+    """Appends every snapshot the bot scans to a compact archive, per source.
+
+    Records come from a SnapshotEncoder (see there for ``mode``) and are
+    appended and flushed one at a time, so a crash loses at most the
+    record being written.
+    """
+
+    def __init__(self, path, mode="diff"):
+        self.path = path
+        self.encoder = SnapshotEncoder(mode)
+        self.records = 0
+        self.bytes_written = 0
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(ARCHIVE_MAGIC)
+        else:
+            # Appending to an old archive: the replay state there is unknown, so start every source whole.
+            log.info("📼 Appending to archive %s", path)
+
+    @property
+    def mode(self):
+        return self.encoder.mode
+
+    def record(self, source, snapshot, timestamp=None):
+        record = self.encoder.encode(source, snapshot)
+        if record is None:
+            return
+        data = encode_record(record[0], source, record[1], time.time() if timestamp is None else timestamp)
+        self._file.write(data)
+        self._file.flush()
+        self.records += 1
+        self.bytes_written += len(data)
+
+    def close(self):
+        self._file.close()
+
+def iter_archive(path):
+    """Yield (timestamp, source, snapshot) for every record of an archive, rebuilding each source's state."""
+    decoder = SnapshotDecoder()
+    with open(path, "rb") as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a SOC snapshot archive")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # end of archive (or a record cut short by a crash)
+            kind, timestamp, source_length, body_length = RECORD_HEADER.unpack(header)
+            source = Source.parse(f.read(source_length).decode())
+            body = f.read(body_length)
+            if len(body) < body_length:
+                return
+            try:
+                snapshot = decoder.decode(kind, source, body)
+            except ValueError as e:
+                raise ValueError(f"{e} in {path}") from None
+            yield timestamp, source, snapshot
@@ -0,0 +1,263 @@
+import logging
+import sqlite3
+from dataclasses import astuple, dataclass
+from typing import NamedTuple
+
+from catalog import normalize_index
+from soc_client import Source
+from storage import DEFAULT_USER_CONFIG
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Subscription Registry                 #
+#########################################
+
+def index_key(index_number):
+    """Snipes are keyed by the zero-padded index, the form diffs and lookups produce."""
+    return normalize_index(index_number) or index_number
+
+@dataclass
+class UserConfig:
+    max_snipes: int = DEFAULT_USER_CONFIG[0]
+    banned: int = DEFAULT_USER_CONFIG[1]
+    is_mod: int = DEFAULT_USER_CONFIG[2]
+    notif_limit: int = DEFAULT_USER_CONFIG[3]
+    tts_enabled: int = DEFAULT_USER_CONFIG[4]
+
+    def as_tuple(self):
+        return astuple(self)
+
+class Rule(NamedTuple):
+    """A wildcard snipe: every section of one course, or of a whole subject, in one source."""
+    discord_id: str
+    source: Source
+    subject: str
+    course_number: str  # "" = every course of the subject
+    sections: str       # section-number prefix ("H" honors, "9" online, ...); "" = every section
+
+    @property
+    def label(self):
+        target = f"{self.subject}:{self.course_number}" if self.course_number else f"subject {self.subject}"
+        return f"{target}, {f'sections {self.sections}*' if self.sections else 'any section'}"
+
+    def matches(self, section_number):
+        return section_number.upper().startswith(self.sections)
+
+class SubscriptionRegistry:
+    """Process-wide copy of the snipes, rules and user_configs tables.
+
+    Loaded once at startup. Every mutation is written to SQLite first and then
+    applied here, so the scan path can read subscribers and configs from memory.
+    Snipes are keyed by (Source, index_number); rules by (Source, subject,
+    course_number), which makes matching an opened section two dict lookups
+    (its course, then its whole subject) however many rules exist.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.subscribers = {}  # (source, index_number) -> {discord_id: notifications_sent}
+        self.by_source = {}    # source -> set of tracked index_number
+        self.by_user = {}      # discord_id -> set of (source, index_number)
+        self.rules = {}        # (source, subject, course_number or "") -> {Rule: notifications_sent}
+        self.rules_by_user = {}  # discord_id -> set of Rule
+        self.configs = {}      # discord_id -> UserConfig
+
+    async def load(self):
+        def query(conn):
+            snipes = conn.execute("SELECT discord_id, year, term, campus, index_number, notifications_sent FROM snipes").fetchall()
+            rules = conn.execute("SELECT discord_id, year, term, campus, subject, course_number, sections, notifications_sent FROM rules").fetchall()
+            configs = conn.execute("SELECT discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled FROM user_configs").fetchall()
+            return snipes, rules, configs
+        snipes, rules, configs = await self.db.run(query)
+        self.subscribers, self.by_source, self.by_user = {}, {}, {}
+        self.rules, self.rules_by_user = {}, {}
+        for discord_id, year, term, campus, index_number, sent in snipes:
+            self._add(discord_id, Source(year, term, campus), index_number, sent)
+        for discord_id, year, term, campus, subject, course_number, sections, sent in rules:
+            self._add_rule(Rule(discord_id, Source(year, term, campus), subject, course_number, sections), sent)
+        self.configs = {row[0]: UserConfig(*row[1:]) for row in configs}
+        log.info("📚 Loaded %d snipe(s) across %d section(s) in %d source(s), %d rule(s) and %d user config(s).",
+                 len(snipes), len(self.subscribers), len(self.by_source), len(rules), len(self.configs))
+
+    def _add(self, discord_id, source, index_number, sent=0):
+        index_number = index_key(index_number)
+        self.subscribers.setdefault((source, index_number), {})[discord_id] = sent
+        self.by_source.setdefault(source, set()).add(index_number)
+        self.by_user.setdefault(discord_id, set()).add((source, index_number))
+
+    def _discard(self, discord_id, source, index_number):
+        index_number = index_key(index_number)
+        key = (source, index_number)
+        watchers = self.subscribers.get(key)
+        if watchers is not None:
+            watchers.pop(discord_id, None)
+            if not watchers:
+                del self.subscribers[key]
+                tracked = self.by_source.get(source)
+                if tracked is not None:
+                    tracked.discard(index_number)
+                    if not tracked:
+                        del self.by_source[source]
+        snipes = self.by_user.get(discord_id)
+        if snipes is not None:
+            snipes.discard(key)
+            if not snipes:
+                del self.by_user[discord_id]
+
+    def _add_rule(self, rule, sent=0):
+        self.rules.setdefault((rule.source, rule.subject, rule.course_number), {})[rule] = sent
+        self.rules_by_user.setdefault(rule.discord_id, set()).add(rule)
+
+    def _discard_rule(self, rule):
+        key = (rule.source, rule.subject, rule.course_number)
+        rules = self.rules.get(key)
+        if rules is not None:
+            rules.pop(rule, None)
+            if not rules:
+                del self.rules[key]
+        owned = self.rules_by_user.get(rule.discord_id)
+        if owned is not None:
+            owned.discard(rule)
+            if not owned:
+                del self.rules_by_user[rule.discord_id]
+
+    # User configs
+
+    def config(self, discord_id):
+        """Return the user's config, or the defaults if they have none (without persisting)."""
+        return self.configs.get(discord_id) or UserConfig()
+
+    async def ensure_config(self, discord_id):
+        """Return the user's config, loading their saved row (or creating a default one) on first use."""
+        config = self.configs.get(discord_id)
+        if config is None:
+            row = await self.db.get_user_config(discord_id)
+            config = self.configs.setdefault(discord_id, UserConfig(*row))
+        return config
+
+    async def set_config(self, discord_id, column, value):
+        await self.db.set_user_config(discord_id, column, value)
+        config = self.configs.setdefault(discord_id, UserConfig())
+        setattr(config, column, value)
+
+    def users_with_flag(self, column):
+        return [discord_id for discord_id, config in self.configs.items() if getattr(config, column) == 1]
+
+    # Snipes
+
+    def sources(self):
+        return self.by_source.keys() | {source for source, _, _ in self.rules}
+
+    def tracked_indexes(self, source):
+        return self.by_source.get(source, ())
+
+    def subscribers_of(self, source, index_number):
+        return list(self.subscribers.get((source, index_key(index_number)), {}).items())
+
+    def snipes_of(self, discord_id):
+        return sorted(self.by_user.get(discord_id, ()))
+
+    def count_user_snipes(self, discord_id):
+        """Snipes plus rules: a rule takes one slot of the quota however many sections it covers."""
+        return len(self.by_user.get(discord_id, ())) + len(self.rules_by_user.get(discord_id, ()))
+
+    def count_snipes(self):
+        return sum(len(watchers) for watchers in self.subscribers.values())
+
+    def all_snipes(self):
+        return [(discord_id, source, index_number, sent)
+                for (source, index_number), watchers in self.subscribers.items()
+                for discord_id, sent in watchers.items()]
+
+    async def add_snipe(self, discord_id, source, index_number):
+        """Add a snipe; raises sqlite3.IntegrityError if it already exists."""
+        index_number = index_key(index_number)
+        if discord_id in self.subscribers.get((source, index_number), {}):
+            raise sqlite3.IntegrityError("snipe already exists")
+        await self.db.add_snipe(discord_id, source, index_number)
+        self._add(discord_id, source, index_number)
+
+    async def remove_snipe(self, discord_id, source, index_number):
+        index_number = index_key(index_number)
+        await self.db.remove_snipe(discord_id, source, index_number)
+        self._discard(discord_id, source, index_number)
+
+    async def clear_snipes(self, discord_id):
+        """Remove the user's snipes and rules."""
+        await self.db.clear_snipes(discord_id)
+        for source, index_number in list(self.by_user.get(discord_id, ())):
+            self._discard(discord_id, source, index_number)
+        for rule in list(self.rules_by_user.get(discord_id, ())):
+            self._discard_rule(rule)
+
+    # Rules
+
+    def rules_of(self, discord_id):
+        return sorted(self.rules_by_user.get(discord_id, ()))
+
+    def count_rules(self):
+        return sum(len(rules) for rules in self.rules.values())
+
+    def rule_sent(self, rule):
+        return self.rules.get((rule.source, rule.subject, rule.course_number), {}).get(rule, 0)
+
+    def has_rules(self, source):
+        return any(key[0] == source for key in self.rules)
+
+    def match_rules(self, source, sections):
+        """Group opened sections by the rules they satisfy.
+
+        ``sections`` yields (index_number, SectionInfo); returns
+        {Rule: [index_number, ...]}. Cost is per section, not per rule.
+        """
+        matched = {}
+        if not self.rules:
+            return matched
+        for index_number, section in sections:
+            for course_number in (section.course_number, ""):
+                for rule in self.rules.get((source, section.subject, course_number), ()):
+                    if rule.matches(section.section_number):
+                        matched.setdefault(rule, []).append(index_number)
+        return matched
+
+    async def add_rule(self, rule):
+        """Add a rule; raises sqlite3.IntegrityError if it already exists."""
+        if rule in self.rules_by_user.get(rule.discord_id, ()):
+            raise sqlite3.IntegrityError("rule already exists")
+        await self.db.add_rule(rule)
+        self._add_rule(rule)
+
+    async def remove_rule(self, rule):
+        await self.db.remove_rule(rule)
+        self._discard_rule(rule)
+
+    def apply_notifications(self, notified, finished):
+        """Count one delivered alert in memory right away; the database write is batched.
+
+        Both arguments are lists of (discord_id, source, index_number) snipe
+        keys and Rule objects.
+        """
+        for key in notified:
+            if isinstance(key, Rule):
+                rules = self.rules.get((key.source, key.subject, key.course_number), {})
+                if key in rules:
+                    rules[key] += 1
+            else:
+                discord_id, source, index_number = key
+                watchers = self.subscribers.get((source, index_number), {})
+                if discord_id in watchers:
+                    watchers[discord_id] += 1
+        for key in finished:
+            if isinstance(key, Rule):
+                self._discard_rule(key)
+            else:
+                self._discard(*key)
+
+    async def record_notifications(self, notified, finished):
+        """Persist one burst of alerts already counted by apply_notifications."""
+        snipes_notified = [key for key in notified if not isinstance(key, Rule)]
+        snipes_finished = [key for key in finished if not isinstance(key, Rule)]
+        rules_notified = [key for key in notified if isinstance(key, Rule)]
+        rules_finished = [key for key in finished if isinstance(key, Rule)]
+        await self.db.record_notifications(snipes_notified, snipes_finished, rules_notified, rules_finished)
@@ -0,0 +1,135 @@
+import re
+from bisect import bisect_left
+
+from catalog import format_index
+
+#########################################
+# Catalog Search for Autocomplete       #
+#########################################
+
+TOKEN_SPLIT = re.compile(r"[^0-9a-z:]+")  # keeps "198:111" whole
+MAX_CHOICES = 25  # Discord's autocomplete limit
+
+def tokenize(text):
+    return [token for token in (part.strip(":") for part in TOKEN_SPLIT.split(text.lower())) if token]
+
+class CatalogSearch:
+    """Prefix/token search over one catalog layout: subject, course number, title, section number and index.
+
+    Every course contributes its tokens (subject code, course number,
+    "subject:number" and the title words) to one sorted token list, and
+    every section its zero-padded index to a second one, so each query term
+    is a bisect plus a slice. A query matches sections whose course has a
+    token starting with every term, or whose index starts with a numeric
+    term; a short trailing number that no course matches ("198:111 02")
+    picks the section number. Open flags are read from the snapshot at
+    query time, so the index only changes with the catalog layout.
+    """
+
+    def __init__(self, snapshot, token_cache=None):
+        self.snapshot = snapshot
+        self.indexes = snapshot.indexes
+        token_cache = {} if token_cache is None else token_cache
+        postings = {}
+        self.sections_of = [[] for _ in snapshot.subjects]
+        for row, course in enumerate(snapshot.course_of):
+            self.sections_of[course].append(row)
+        for course, (subject, number, title) in enumerate(zip(snapshot.subjects, snapshot.course_numbers, snapshot.titles)):
+            key = (subject, number, title)
+            tokens = token_cache.get(key)
+            if tokens is None:
+                tokens = token_cache[key] = {subject.lower(), number.lower(), f"{subject}:{number}".lower(), *tokenize(title)}
+            for token in tokens:
+                postings.setdefault(token, []).append(course)
+        self.course_rank = [0] * len(snapshot.subjects)
+        for rank, course in enumerate(sorted(range(len(snapshot.subjects)), key=lambda c: (snapshot.subjects[c], snapshot.course_numbers[c]))):
+            self.course_rank[course] = rank
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+        self.index_keys = sorted((format_index(index), row) for row, index in enumerate(snapshot.indexes))
+
+    def _courses_with_prefix(self, term):
+        courses = set()
+        start = bisect_left(self.tokens, term)
+        for position in range(start, len(self.tokens)):
+            if not self.tokens[position].startswith(term):
+                break
+            courses.update(self.postings[position])
+        return courses
+
+    def _rows_with_index_prefix(self, term, limit):
+        rows = []
+        start = bisect_left(self.index_keys, (term,))
+        for index_text, row in self.index_keys[start:start + limit]:
+            if not index_text.startswith(term):
+                break
+            rows.append(row)
+        return rows
+
+    def _courses_matching(self, terms):
+        courses = None
+        for term in terms:
+            matched = self._courses_with_prefix(term)
+            courses = matched if courses is None else courses & matched
+            if not courses:
+                break
+        return courses
+
+    def search(self, query, limit=MAX_CHOICES):
+        """Rows matching ``query``, best first.
+
+        A lone term of 4+ digits is an index prefix; otherwise sections of
+        the matching courses come first, open ones ahead of closed ones.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        rows = []
+        numeric = len(terms) == 1 and terms[0].isdigit()
+        if numeric and len(terms[0]) >= 4:
+            rows = self._rows_with_index_prefix(terms[0], limit)
+        courses, section_number = self._courses_matching(terms), None
+        if not courses and len(terms) > 1 and terms[-1].isdigit() and len(terms[-1]) <= 3:
+            courses, section_number = self._courses_matching(terms[:-1]), terms[-1]
+        if courses and len(rows) < limit:
+            need, seen = limit - len(rows), set(rows)
+            open_rows, closed_rows = [], []
+            for course in sorted(courses, key=self.course_rank.__getitem__):
+                for row in self.sections_of[course]:
+                    if row not in seen and (section_number is None or self.snapshot.section_numbers[row].lstrip("0") == section_number.lstrip("0")):
+                        (open_rows if self.snapshot.row_is_open(row) else closed_rows).append(row)
+                if len(open_rows) >= need:
+                    break
+            rows.extend((open_rows + closed_rows)[:need])
+        if numeric and len(rows) < limit:
+            rows.extend(row for row in self._rows_with_index_prefix(terms[0], limit - len(rows)) if row not in rows)
+        return rows
+
+    def describe(self, row):
+        """One autocomplete line (max 100 characters) for ``row``."""
+        snapshot = self.snapshot
+        section = snapshot.section(row)
+        text = (f"{format_index(snapshot.indexes[row])} · {section.subject}:{section.course_number} {section.title} "
+                f"sec {section.section_number} ({'open' if section.is_open else 'closed'})")
+        return text[:100]
+
+class SearchIndex:
+    """Keeps one CatalogSearch per source, rebuilt only when that source's catalog layout changes.
+
+    Token sets are cached per (subject, number, title), so a refresh only
+    tokenizes courses that are new or renamed.
+    """
+
+    def __init__(self):
+        self._searches = {}     # source -> CatalogSearch
+        self._token_cache = {}  # (subject, number, title) -> tokens
+
+    def get(self, source, snapshot):
+        search = self._searches.get(source)
+        if search is None or search.indexes is not snapshot.indexes:
+            live = {(s, n, t) for s, n, t in zip(snapshot.subjects, snapshot.course_numbers, snapshot.titles)}
+            if len(self._token_cache) > 2 * len(live) + 1000:
+                self._token_cache = {key: tokens for key, tokens in self._token_cache.items() if key in live}
+            search = self._searches[source] = CatalogSearch(snapshot, self._token_cache)
+        search.snapshot = snapshot  # same layout, newer open flags
+        return search
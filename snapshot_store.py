@@ -0,0 +1,77 @@
+import json
+import os
+import struct
+import time
+
+from catalog import CatalogSnapshot
+from soc_client import Source
+
+#########################################
+# On-Disk Snapshots for Warm Restarts   #
+#########################################
+
+STATE_HEADER = struct.Struct("<II")  # JSON metadata length, catalog blob length
+
+class SnapshotStore:
+    """Keeps each source's latest catalog and open-state baseline on disk.
+
+    One file per source: a small JSON header (saved timestamps and the
+    ETag / Last-Modified validators of both feeds), the catalog in the
+    CatalogSnapshot binary layout, then the merged open bitmap. Files are
+    written to a temporary name and renamed, so a crash never leaves a
+    half-written snapshot behind.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._catalog_blobs = {}  # source -> (catalog, serialized catalog), so unchanged catalogs are not re-encoded
+
+    def path(self, source):
+        return os.path.join(self.directory, f"{source.year}-{source.term}-{source.campus}.snapshot")
+
+    def sources(self):
+        if not os.path.isdir(self.directory):
+            return []
+        sources = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".snapshot"):
+                year, term, campus = name[:-len(".snapshot")].split("-")
+                sources.append(Source(int(year), int(term), campus))
+        return sources
+
+    def save(self, source, state):
+        """Write ``state`` (from TieredPoller.export_state) for ``source``. Blocking; run it off the event loop."""
+        meta, catalog, open_bits = state
+        cached = self._catalog_blobs.get(source)
+        if cached is None or cached[0] is not catalog:
+            cached = self._catalog_blobs[source] = (catalog, catalog.to_bytes())
+        header = json.dumps({**meta, "saved_at": time.time()}).encode()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(source)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(STATE_HEADER.pack(len(header), len(cached[1])))
+            f.write(header)
+            f.write(cached[1])
+            f.write(open_bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def load(self, source):
+        """Return the saved (meta, catalog, open bitmap) for ``source``, or None if there is none."""
+        try:
+            with open(self.path(source), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        header_length, catalog_length = STATE_HEADER.unpack_from(data)
+        offset = STATE_HEADER.size
+        meta = json.loads(data[offset:offset + header_length])
+        offset += header_length
+        catalog = CatalogSnapshot.from_bytes(data[offset:offset + catalog_length])
+        self._catalog_blobs[source] = (catalog, data[offset:offset + catalog_length])
+        open_bits = data[offset + catalog_length:]
+        if len(open_bits) != len(catalog.open_bits):
+            raise ValueError("open bitmap does not match the catalog")
+        return meta, catalog, open_bits
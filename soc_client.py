@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import time
+from typing import NamedTuple
+
+import aiohttp
+
+from metrics import SOC_CIRCUIT_OPENS, SOC_FETCH_BYTES, SOC_FETCH_SECONDS, SOC_FETCHES, SOC_PARSE_SECONDS, SOC_STALE_SERVED
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Rutgers SOC API Client                #
+#########################################
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+TERM_NAMES = {0: "Winter", 1: "Spring", 7: "Summer", 9: "Fall"}
+CAMPUS_NAMES = {"NB": "New Brunswick", "NK": "Newark", "CM": "Camden"}
+
+class Source(NamedTuple):
+    """One year/term/campus offering of the SOC, e.g. Source(2025, 9, "NB")."""
+    year: int
+    term: int
+    campus: str
+
+    @classmethod
+    def parse(cls, text):
+        """Parse ``"2025:9:NB"``."""
+        year, term, campus = text.split(":")
+        return cls(int(year), int(term), campus.strip().upper())
+
+    def __str__(self):
+        return f"{self.year}:{self.term}:{self.campus}"
+
+    @property
+    def label(self):
+        return f"{TERM_NAMES.get(self.term, f'Term {self.term}')} {self.year} {self.campus}"
+
+    def url(self, api_base, feed):
+        return f"{api_base}/{feed}.json?year={self.year}&term={self.term}&campus={self.campus}"
+
+class CircuitBreaker:
+    """Stops SOC requests after repeated failures, then probes with one request at a time.
+
+    Closed: requests go through; ``threshold`` failures in a row open it.
+    Open: requests fail fast without touching the network until
+    ``reset_timeout`` has passed. Half-open: a single probe goes through;
+    success closes the breaker, failure re-opens it with the timeout
+    doubled (up to ``max_reset_timeout``). Only server errors, timeouts and
+    connection errors count as failures; a 4xx is the SOC answering.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=15, max_reset_timeout=300):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opens = 0
+        self.retry_at = 0
+        self.last_error = None
+        self._timeout = reset_timeout
+        self._probing = False
+
+    def allow(self):
+        """Whether a request may go out now; in half-open state this claims the single probe."""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.time() < self.retry_at:
+                return False
+            self.state = "half-open"
+            log.info("🔌 SOC circuit half-open: probing.")
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            log.info("✅ SOC circuit closed: the API answered again.")
+        self.state, self.failures, self._probing = "closed", 0, False
+        self._timeout = self.reset_timeout
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.last_error = error
+        if self.state == "open" or (self.state == "closed" and self.failures < self.threshold):
+            return
+        if self.state == "half-open":
+            self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+        self.state, self._probing = "open", False
+        self.retry_at = time.time() + self._timeout
+        self.opens += 1
+        SOC_CIRCUIT_OPENS.inc()
+        log.warning("⛔ SOC circuit open after %d failure(s) (%s); next probe in %.0fs.", self.failures, error, self._timeout)
+
+    def release(self):
+        """Give back a probe whose request was cancelled before it could tell us anything."""
+        self._probing = False
+
+    def describe(self):
+        if self.state == "closed":
+            return f"closed ({self.failures} recent failure(s))" if self.failures else "closed"
+        if self.state == "open":
+            return f"open, probing in {max(0, self.retry_at - time.time()):.0f}s after {self.failures} failure(s): {self.last_error}"
+        return "half-open, probing"
+
+class SOCUnavailableError(Exception):
+    """Raised instead of a request while the circuit breaker is open."""
+
+    def __init__(self, breaker):
+        super().__init__(f"SOC circuit open, next probe in {max(0, breaker.retry_at - time.time()):.0f}s")
+
+class SessionPool:
+    """One keep-alive aiohttp session that any number of SOC clients share, behind one circuit breaker."""
+
+    def __init__(self, limit=8, breaker=None):
+        self.limit = limit
+        self.breaker = breaker or CircuitBreaker()
+        self._session = None
+
+    def get(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=75, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": "gzip, deflate"})
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+class SOCAPIError(Exception):
+    """Raised when the SOC API answers with an unexpected status."""
+
+    def __init__(self, status):
+        super().__init__(f"API returned non-200 status: {status}")
+        self.status = status
+
+class SOCClient:
+    """Async client for the SOC courses.json feed.
+
+    Uses a pooled keep-alive session, asks for gzip, and revalidates with
+    ETag / Last-Modified so an unchanged catalog costs a 304. Callers that
+    find the cache expired at the same time share a single in-flight fetch;
+    callers that accept stale data get the cached copy at once while that
+    fetch runs in the background. Every request goes through the pool's
+    circuit breaker.
+    """
+
+    def __init__(self, url, cache_duration=60, timeout=20, pool=None, parser=None):
+        self.url = url
+        self.feed = url.split("?")[0].rsplit("/", 1)[-1].removesuffix(".json")  # metrics label, e.g. "courses"
+        self.parser = parser  # factory for an incremental builder (feed/finish); None parses whole JSON
+        self.cache_duration = cache_duration
+        self.timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=5)
+        self.owns_pool = pool is None
+        self.pool = pool or SessionPool(limit=4)
+        self.data = None
+        self.timestamp = 0
+        self.etag = None
+        self.last_modified = None
+        self._inflight = None
+
+    async def close(self):
+        if self.owns_pool:
+            await self.pool.close()
+
+    def is_fresh(self, max_age=None):
+        max_age = self.cache_duration if max_age is None else max_age
+        return self.data is not None and (time.time() - self.timestamp) <= max_age
+
+    async def fetch(self):
+        """Download the catalog once, conditionally. Returns (status, parsed payload or None)."""
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        breaker = self.pool.breaker
+        if not breaker.allow():
+            raise SOCUnavailableError(breaker)
+        session = self.pool.get()
+        started = time.perf_counter()
+        try:
+            async with session.get(self.url, headers=headers, timeout=self.timeout) as response:
+                if response.status != 200:
+                    SOC_FETCHES.inc(1, self.feed, str(response.status))
+                    if response.status >= 500:
+                        breaker.record_failure(f"HTTP {response.status}")
+                    else:
+                        breaker.record_success()
+                    return response.status, None
+                size = parse_seconds = 0
+                if self.parser is None:
+                    body = await response.read()
+                    size = len(body)
+                    parse_started = time.perf_counter()
+                    payload = await asyncio.to_thread(json.loads, body)
+                    parse_seconds = time.perf_counter() - parse_started
+                else:
+                    # Decode as the body streams in, one chunk at a time, so neither the
+                    # raw body nor the full parsed tree is ever held in memory at once.
+                    # Each chunk is parsed in a thread, like the whole-body path, to keep the loop free.
+                    builder = self.parser()
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        size += len(chunk)
+                        parse_started = time.perf_counter()
+                        await asyncio.to_thread(builder.feed, chunk)
+                        parse_seconds += time.perf_counter() - parse_started
+                    parse_started = time.perf_counter()
+                    payload = await asyncio.to_thread(builder.finish)
+                    parse_seconds += time.perf_counter() - parse_started
+                self.etag = response.headers.get("ETag")
+                self.last_modified = response.headers.get("Last-Modified")
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            SOC_FETCHES.inc(1, self.feed, "error")
+            breaker.record_failure(str(e) or type(e).__name__)
+            raise
+        finally:
+            SOC_FETCH_SECONDS.observe(time.perf_counter() - started, self.feed)
+        breaker.record_success()
+        SOC_FETCHES.inc(1, self.feed, "200")
+        SOC_FETCH_BYTES.inc(size, self.feed)
+        SOC_PARSE_SECONDS.observe(parse_seconds, self.feed)
+        return 200, payload
+
+    async def _refresh(self):
+        status, payload = await self.fetch()
+        if status == 200:
+            self.data = payload
+            self.timestamp = time.time()
+        elif status == 304:
+            self.timestamp = time.time()
+        else:
+            raise SOCAPIError(status)
+        return self.data
+
+    def revalidate(self):
+        """Start the shared refresh unless one is running; returns its future."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return self._inflight
+
+    async def get(self, max_age=None, stale_ok=False):
+        """Return the cached catalog, refreshing it first if it is older than ``max_age`` (default cache_duration).
+
+        With ``stale_ok`` an expired cache is returned immediately and the
+        refresh runs in the background (failing fast while the circuit is open).
+        """
+        if self.is_fresh(max_age):
+            return self.data
+        if stale_ok and self.data is not None:
+            SOC_STALE_SERVED.inc(1, self.feed)
+            self.revalidate()
+            return self.data
+        # Shield so one cancelled caller does not cancel the fetch for everyone else.
+        return await asyncio.shield(self.revalidate())
+
+    def _clear_inflight(self, task):
+        self._inflight = None
+        if not task.cancelled():
+            task.exception()  # mark retrieved; callers re-raise it themselves
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import normalize_index
+from metrics import DB_SECONDS
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Schema Migrations                     #
+#########################################
+
+def _create_tables(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS snipes (
+            discord_id TEXT,
+            index_number TEXT,
+            notifications_sent INTEGER DEFAULT 0,
+            UNIQUE(discord_id, index_number)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS user_configs (
+            discord_id TEXT PRIMARY KEY,
+            max_snipes INTEGER DEFAULT 10,
+            banned INTEGER DEFAULT 0,
+            is_mod INTEGER DEFAULT 0,
+            notif_limit INTEGER DEFAULT 5,
+            tts_enabled INTEGER DEFAULT 0
+        )
+    """)
+
+def _add_notification_settings(c):
+    # Databases created before versioning may predate these columns.
+    columns = [row[1] for row in c.execute("PRAGMA table_info(user_configs)")]
+    if "notif_limit" not in columns:
+        c.execute("ALTER TABLE user_configs ADD COLUMN notif_limit INTEGER DEFAULT 5")
+    if "tts_enabled" not in columns:
+        c.execute("ALTER TABLE user_configs ADD COLUMN tts_enabled INTEGER DEFAULT 0")
+
+def _index_snipes_by_section(c):
+    c.execute("CREATE INDEX IF NOT EXISTS idx_snipes_index_number ON snipes(index_number)")
+
+LEGACY_SOURCE = (2025, 7, "NB")  # the year/term/campus every snipe referred to before sources existed
+
+def _key_snipes_by_source(c):
+    c.execute("ALTER TABLE snipes RENAME TO snipes_legacy")
+    c.execute("""
+        CREATE TABLE snipes (
+            discord_id TEXT,
+            year INTEGER,
+            term INTEGER,
+            campus TEXT,
+            index_number TEXT,
+            notifications_sent INTEGER DEFAULT 0,
+            UNIQUE(discord_id, year, term, campus, index_number)
+        )
+    """)
+    c.execute("""
+        INSERT INTO snipes (discord_id, year, term, campus, index_number, notifications_sent)
+        SELECT discord_id, ?, ?, ?, index_number, notifications_sent FROM snipes_legacy
+    """, LEGACY_SOURCE)
+    c.execute("DROP TABLE snipes_legacy")
+    c.execute("CREATE INDEX idx_snipes_source_index ON snipes(year, term, campus, index_number)")
+
+def _add_rules(c):
+    # course_number and sections use "" for "any", so the UNIQUE constraint sees wildcards as equal.
+    c.execute("""
+        CREATE TABLE rules (
+            discord_id TEXT,
+            year INTEGER,
+            term INTEGER,
+            campus TEXT,
+            subject TEXT,
+            course_number TEXT DEFAULT '',
+            sections TEXT DEFAULT '',
+            notifications_sent INTEGER DEFAULT 0,
+            UNIQUE(discord_id, year, term, campus, subject, course_number, sections)
+        )
+    """)
+
+def _normalize_index_numbers(c):
+    # Snipes used to store the index as typed ("9302"); scans look them up zero-padded ("09302").
+    rows = c.execute("SELECT rowid, discord_id, year, term, campus, index_number, notifications_sent FROM snipes").fetchall()
+    for rowid, discord_id, year, term, campus, index_number, sent in rows:
+        key = normalize_index(index_number)
+        if key is None or key == index_number:
+            continue
+        duplicate = c.execute("SELECT rowid, notifications_sent FROM snipes WHERE discord_id = ? AND year = ? AND term = ? AND campus = ? AND index_number = ?",
+                              (discord_id, year, term, campus, key)).fetchone()
+        if duplicate is None:
+            c.execute("UPDATE snipes SET index_number = ? WHERE rowid = ?", (key, rowid))
+        else:
+            # The same snipe typed two ways: keep one row, with the larger count.
+            c.execute("UPDATE snipes SET notifications_sent = ? WHERE rowid = ?", (max(sent, duplicate[1]), duplicate[0]))
+            c.execute("DELETE FROM snipes WHERE rowid = ?", (rowid,))
+
+# Applied in order; PRAGMA user_version records how many have run. Only ever append.
+MIGRATIONS = [
+    _create_tables,
+    _add_notification_settings,
+    _index_snipes_by_section,
+    _key_snipes_by_source,
+    _add_rules,
+    _normalize_index_numbers,
+]
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        log.info("🗄 Applied schema migration %d: %s", number, step.__name__)
+
+#########################################
+# Data Access Layer                     #
+#########################################
+
+DEFAULT_USER_CONFIG = (10, 0, 0, 5, 0)  # max_snipes, banned, is_mod, notif_limit, tts_enabled
+USER_CONFIG_COLUMNS = ("max_snipes", "banned", "is_mod", "notif_limit", "tts_enabled")
+RULE_KEY = "discord_id = ? AND year = ? AND term = ? AND campus = ? AND subject = ? AND course_number = ? AND sections = ?"
+
+def _rule_params(rule):
+    return (rule.discord_id, *rule.source, rule.subject, rule.course_number, rule.sections)
+
+class Database:
+    """One long-lived SQLite connection owned by a dedicated thread.
+
+    Every call is shipped to that thread and awaited, so the event loop never
+    blocks on disk I/O. Each call runs in its own transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        migrate(conn)
+        self._conn = conn
+
+    def _transact(self, fn, args):
+        started = time.perf_counter()
+        try:
+            result = fn(self._conn, *args)
+            self._conn.commit()
+            return result
+        except Exception:
+            self._conn.rollback()
+            raise
+        finally:
+            # "Database.record_notifications.<locals>.query" -> "Database.record_notifications"
+            DB_SECONDS.observe(time.perf_counter() - started, fn.__qualname__.split(".<locals>")[0])
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        if self._conn is None:
+            await self._call(self._open)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._call(self._conn.close)
+            self._conn = None
+
+    async def run(self, fn, *args):
+        """Run ``fn(conn, *args)`` on the database thread inside one transaction."""
+        return await self._call(self._transact, fn, args)
+
+    async def execute(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    # User configs
+
+    async def get_user_config(self, discord_id):
+        """Retrieve or create a default config for the given user."""
+        def query(conn):
+            row = conn.execute("SELECT max_snipes, banned, is_mod, notif_limit, tts_enabled FROM user_configs WHERE discord_id = ?", (discord_id,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, ?, ?, ?, ?, ?)", (discord_id, *DEFAULT_USER_CONFIG))
+                return DEFAULT_USER_CONFIG
+            return row
+        return await self.run(query)
+
+    async def set_user_config(self, discord_id, column, value):
+        """Set one config column, creating the user's default row first if needed."""
+        if column not in USER_CONFIG_COLUMNS:
+            raise ValueError(f"Unknown user config column: {column}")
+        def query(conn):
+            conn.execute("INSERT OR IGNORE INTO user_configs (discord_id, max_snipes, banned, is_mod, notif_limit, tts_enabled) VALUES (?, ?, ?, ?, ?, ?)", (discord_id, *DEFAULT_USER_CONFIG))
+            conn.execute(f"UPDATE user_configs SET {column} = ? WHERE discord_id = ?", (value, discord_id))
+        await self.run(query)
+
+    # Snipes (``source`` is a (year, term, campus) tuple)
+
+    async def add_snipe(self, discord_id, source, index_number):
+        """Insert a snipe; raises sqlite3.IntegrityError if it already exists."""
+        await self.execute("INSERT INTO snipes (discord_id, year, term, campus, index_number, notifications_sent) VALUES (?, ?, ?, ?, ?, 0)",
+                           (discord_id, *source, index_number))
+
+    async def remove_snipe(self, discord_id, source, index_number):
+        return await self.execute("DELETE FROM snipes WHERE discord_id = ? AND year = ? AND term = ? AND campus = ? AND index_number = ?",
+                                  (discord_id, *source, index_number))
+
+    async def clear_snipes(self, discord_id):
+        """Delete the user's snipes and rules."""
+        def query(conn):
+            return (conn.execute("DELETE FROM snipes WHERE discord_id = ?", (discord_id,)).rowcount
+                    + conn.execute("DELETE FROM rules WHERE discord_id = ?", (discord_id,)).rowcount)
+        return await self.run(query)
+
+    # Rules (``rule`` is a registry.Rule: discord_id, source, subject, course_number, sections)
+
+    async def add_rule(self, rule):
+        """Insert a rule; raises sqlite3.IntegrityError if it already exists."""
+        await self.execute("INSERT INTO rules (discord_id, year, term, campus, subject, course_number, sections, notifications_sent) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                           _rule_params(rule))
+
+    async def remove_rule(self, rule):
+        return await self.execute(f"DELETE FROM rules WHERE {RULE_KEY}", _rule_params(rule))
+
+    async def record_notifications(self, notified, finished, rules_notified=(), rules_finished=()):
+        """Bump the counters of ``notified`` and drop ``finished`` (discord_id, source, index_number) snipes, and the same for rules, atomically."""
+        def query(conn):
+            conn.executemany(
+                "UPDATE snipes SET notifications_sent = notifications_sent + 1 WHERE discord_id = ? AND year = ? AND term = ? AND campus = ? AND index_number = ?",
+                [(discord_id, *source, index_number) for discord_id, source, index_number in notified])
+            conn.executemany(
+                "DELETE FROM snipes WHERE discord_id = ? AND year = ? AND term = ? AND campus = ? AND index_number = ?",
+                [(discord_id, *source, index_number) for discord_id, source, index_number in finished])
+            conn.executemany(f"UPDATE rules SET notifications_sent = notifications_sent + 1 WHERE {RULE_KEY}", map(_rule_params, rules_notified))
+            conn.executemany(f"DELETE FROM rules WHERE {RULE_KEY}", map(_rule_params, rules_finished))
+        await self.run(query)
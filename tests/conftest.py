@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The bot's modules live at the repository root, not in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# discord_bot reads these at import: keep its database and snapshots out of the tree and skip the metrics port.
+os.environ.setdefault("SNIPER_DATA_DIR", tempfile.mkdtemp(prefix="sniper-tests-"))
+os.environ.setdefault("METRICS_PORT", "0")
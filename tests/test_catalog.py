@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from benchmarks.payloads import make_payload
+from catalog import CatalogBuilder, CatalogSnapshot
+
+#########################################
+# Streaming Catalog Builder             #
+#########################################
+
+def build(body, chunk_size=7):
+    builder = CatalogBuilder()
+    for start in range(0, len(body), chunk_size):
+        builder.feed(body[start:start + chunk_size])
+    return builder.finish()
+
+def test_chunked_feed_matches_the_parsed_payload():
+    payload = make_payload(courses=30, seed=3)
+    snapshot = build(json.dumps(payload).encode(), chunk_size=101)
+    expected = CatalogSnapshot.from_courses(payload)
+    assert list(snapshot.indexes) == list(expected.indexes)
+    assert snapshot.open_bits == expected.open_bits
+    assert [snapshot.course_name(index) for index in expected.open_indexes()] == \
+           [expected.course_name(index) for index in expected.open_indexes()]
+
+def test_multibyte_characters_split_across_chunks():
+    payload = [{"subject": "198", "courseNumber": "111", "title": "INTRO – CAFÉ", "sections": [{"index": "12345", "openStatus": True}]}]
+    snapshot = build(json.dumps(payload, ensure_ascii=False).encode(), chunk_size=1)
+    assert snapshot.course_name("12345") == "198 111 - INTRO – CAFÉ"
+
+@pytest.mark.parametrize("body", [b"", b"  \n", b'[{"subject": "198", "sections": ['])
+def test_empty_or_truncated_body_raises(body):
+    with pytest.raises(ValueError):
+        build(body)
+
+def test_empty_array_is_an_empty_catalog():
+    assert len(build(b"[]")) == 0
+
+def test_non_array_body_raises():
+    with pytest.raises(ValueError):
+        build(b'{"error": "maintenance"}')
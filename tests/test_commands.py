@@ -0,0 +1,83 @@
+import asyncio
+
+import discord
+from discord import app_commands
+
+import discord_bot as bot
+
+class FakeResponse:
+    """discord.InteractionResponse: one reply, then is_done()."""
+
+    def __init__(self):
+        self.messages = []
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.done = True
+
+    async def send_message(self, content=None, ephemeral=False, **kwargs):
+        if self.done:
+            raise discord.InteractionResponded(None)
+        self.done = True
+        self.messages.append(content)
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, ephemeral=False, **kwargs):
+        self.messages.append(content)
+
+class FakeInteraction:
+    command = None
+
+    def __init__(self, user_id=42):
+        self.user = type("User", (), {"id": user_id, "mention": f"<@{user_id}>"})()
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.created_at = discord.utils.utcnow()
+
+#########################################
+# Error Handling                        #
+#########################################
+
+def test_error_after_defer_is_sent_as_a_followup():
+    interaction = FakeInteraction()
+    async def scenario():
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await bot.on_app_command_error(interaction, app_commands.AppCommandError("export failed"))
+    asyncio.run(scenario())
+    assert interaction.followup.messages == ["An error occurred: export failed"]
+
+def test_error_before_any_reply_is_the_response():
+    interaction = FakeInteraction()
+    asyncio.run(bot.on_app_command_error(interaction, app_commands.CheckFailure()))
+    assert interaction.response.messages == ["❌ You don't have permission to use this command."]
+    assert interaction.followup.messages == []
+
+#########################################
+# Snipe Replies                         #
+#########################################
+
+def test_snipe_answers_without_waiting_for_a_cold_catalog(monkeypatch):
+    async def never(source):
+        await asyncio.sleep(3600)  # a courses.json download that outlives the interaction
+    monkeypatch.setattr(bot.SCHEDULER, "get", never)
+    monkeypatch.setattr(bot.SCHEDULER, "cached", lambda source: None)
+    monkeypatch.setattr(bot.SCHEDULER, "reconcile", lambda: None)
+    monkeypatch.setattr(bot.SCHEDULER, "wake", lambda source: None)
+    interaction = FakeInteraction(user_id=7)
+
+    async def scenario():
+        await bot.initialize_storage()
+        try:
+            await asyncio.wait_for(bot.snipe.callback(interaction, "9302"), 1)
+        finally:
+            await bot.REGISTRY.clear_snipes("7")
+            bot.PENDING_INDEXES.clear()
+    asyncio.run(scenario())
+    reply, = interaction.response.messages
+    assert reply.startswith("✅") and "Unknown Course (09302)" in reply and "No course data" in reply
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from catalog import CatalogSnapshot
+from digest import GlobalDigest, format_filters, parse_filters
+
+COURSES = [
+    {"subject": "198", "courseNumber": "111", "title": "INTRO COMPUTER SCI", "sections": [
+        {"index": "09214", "number": "01", "openStatus": False},
+        {"index": "09215", "number": "02", "openStatus": True},
+    ]},
+    {"subject": "198", "courseNumber": "211", "title": "COMPUTER ARCHITECTURE", "sections": [
+        {"index": "09302", "number": "01", "openStatus": True},
+    ]},
+    {"subject": "640", "courseNumber": "151", "title": "CALCULUS I", "sections": [
+        {"index": "11821", "number": "01", "openStatus": True},
+    ]},
+]
+
+def scans(*open_lists):
+    """The catalog followed by one snapshot per openSections list."""
+    snapshot = CatalogSnapshot.from_courses(COURSES)
+    return [snapshot, *(snapshot.with_open_indexes(open_indexes)[0] for open_indexes in open_lists)]
+
+def collect(digest, snapshots):
+    return [digest.add(previous, current) for previous, current in zip(snapshots, snapshots[1:])]
+
+class Inbox:
+    def __init__(self, fail=False):
+        self.messages = []
+        self.fail = fail
+
+    async def __call__(self, content, file=None):
+        if self.fail:
+            raise RuntimeError("DMs closed")
+        self.messages.append((content, file))
+
+#########################################
+# Filters                               #
+#########################################
+
+def test_parse_filters_splits_subjects_and_courses():
+    filters = parse_filters("198, 640:151, 01:750:203")
+    assert filters == ({"198"}, {("640", "151"), ("750", "203")})
+    assert format_filters(filters) == "198, 640:151, 750:203"
+    assert format_filters(parse_filters("")) == "everything"
+    with pytest.raises(ValueError):
+        parse_filters("198::111")
+
+#########################################
+# Digest Grouping                       #
+#########################################
+
+def test_transitions_are_grouped_into_opened_closed_and_flapped():
+    digest = GlobalDigest(Inbox())
+    assert collect(digest, scans(["09214", "09302"], ["09214", "09302", "11821"])) == [3, 1]
+    summary, text = digest.render(digest.pending)
+    assert "(everything)" in summary and summary.endswith("1 opened, 1 closed, 1 flapped.")
+    assert text.split("\n") == [
+        "🟢 **Opened:**",
+        "198 111 - INTRO COMPUTER SCI (Index: 09214, section 01)",
+        "🔴 **Closed:**",
+        "198 111 - INTRO COMPUTER SCI (Index: 09215, section 02)",
+        "🔁 **Flapped:**",
+        "640 151 - CALCULUS I (Index: 11821, section 01) closed and reopened (2 flips)",
+    ]
+
+def test_filters_drop_other_courses():
+    digest = GlobalDigest(Inbox(), filters="640, 198:211")
+    assert collect(digest, scans(["09214"])) == [2]
+    assert sorted(digest.pending) == ["09302", "11821"]
+    digest.set_filters("198:111")
+    assert collect(digest, scans(["09214"])) == [2]
+    assert sorted(digest.pending) == ["09214", "09215", "09302", "11821"]
+
+def test_flush_sends_one_message_and_attaches_large_bursts():
+    inbox = Inbox()
+    digest = GlobalDigest(inbox, inline_limit=2)
+    collect(digest, scans(["09302", "11821", "09214"]))
+    assert asyncio.run(digest.flush())
+    collect(digest, scans([]))
+    assert asyncio.run(digest.flush())
+    assert not asyncio.run(digest.flush())  # nothing new
+    (first, no_file), (second, attachment) = inbox.messages
+    assert "1 opened, 1 closed" in first and no_file is None
+    assert second.endswith("Full list attached.") and attachment.filename.startswith("global_snipes_")
+    assert digest.digests_sent == 2 and not digest.pending
+
+def test_failed_flush_keeps_the_entries_for_the_next_one():
+    digest = GlobalDigest(Inbox(fail=True))
+    collect(digest, scans(["09214", "09215", "09302", "11821"]))
+    assert not asyncio.run(digest.flush())
+    digest.send = inbox = Inbox()
+    assert asyncio.run(digest.flush())
+    assert "1 opened, 0 closed, 0 flapped" in inbox.messages[0][0]
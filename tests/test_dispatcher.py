@@ -0,0 +1,151 @@
+import asyncio
+
+import discord
+
+from dispatcher import Alert, AlertBatch, NotificationDispatcher
+
+class FakeRegistry:
+    def __init__(self, fail_writes=0):
+        self.fail_writes = fail_writes
+        self.applied = []
+        self.recorded = []
+
+    def apply_notifications(self, notified, finished):
+        self.applied.append((list(notified), list(finished)))
+
+    async def record_notifications(self, notified, finished):
+        if self.fail_writes:
+            self.fail_writes -= 1
+            raise RuntimeError("database is locked")
+        self.recorded.append((list(notified), list(finished)))
+
+class FakeUser:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send(self, content, tts=False):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(content)
+
+class FakeResponse:
+    status = 429
+    reason = "Too Many Requests"
+    headers = {"Retry-After": "0.01"}
+
+def make_dispatcher(users, registry=None):
+    async def resolve(discord_id):
+        return users[discord_id]
+    return NotificationDispatcher(resolve, registry or FakeRegistry(), concurrency=2, max_attempts=3)
+
+def alert(discord_id, *indexes, finished=()):
+    return Alert(discord_id, f"open: {indexes}", False, tuple((discord_id, "src", index) for index in indexes),
+                 tuple((discord_id, "src", index) for index in finished), 0)
+
+async def deliver(dispatcher, *alerts):
+    dispatcher.start()
+    for item in alerts:
+        dispatcher.submit(item)
+    await dispatcher.queue.join()
+    await asyncio.sleep(0)  # let the worker run its flush
+    return dispatcher
+
+#########################################
+# Alert Batch                           #
+#########################################
+
+def render(discord_id, texts):
+    return "\n".join(texts)
+
+def test_batch_coalesces_one_dm_per_user():
+    dispatcher = make_dispatcher({})
+    batch = AlertBatch(dispatcher, render, detected_at=0)
+    for index in ("1", "2", "3"):
+        batch.add("a", ("a", "src", index), f"section {index}", False, False)
+    batch.add("b", ("b", "src", "1"), "section 1", True, True)
+    assert batch.submit() == 2
+    first, second = dispatcher.queue.get_nowait(), dispatcher.queue.get_nowait()
+    assert (first.discord_id, first.content, len(first.keys), first.tts) == ("a", "section 1\nsection 2\nsection 3", 3, False)
+    assert (second.discord_id, second.finished, second.tts) == ("b", (("b", "src", "1"),), True)
+
+def test_batch_splits_where_the_message_limit_forces_it():
+    dispatcher = make_dispatcher({})
+    batch = AlertBatch(dispatcher, render, detected_at=0, max_length=100)
+    parts = [(("a", "src", str(n)), "x" * 30, False, False) for n in range(10)]
+    chunks = batch.chunks(parts)
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert all(sum(len(text) + 1 for _, text, _, _ in chunk) <= 100 for chunk in chunks)
+    assert [part for chunk in chunks for part in chunk] == parts
+
+def test_batch_keeps_an_oversized_part_whole():
+    batch = AlertBatch(make_dispatcher({}), render, detected_at=0, max_length=10)
+    parts = [(("a", "src", "1"), "x" * 50, False, False), (("a", "src", "2"), "y", False, False)]
+    assert batch.chunks(parts) == [[parts[0]], [parts[1]]]
+
+def test_batch_without_coalescing_sends_one_dm_per_part():
+    batch = AlertBatch(make_dispatcher({}), render, detected_at=0, coalesce=False)
+    parts = [(("a", "src", str(n)), "x", False, False) for n in range(3)]
+    assert batch.chunks(parts) == [[part] for part in parts]
+
+def test_batch_skips_keys_that_already_have_a_dm_waiting():
+    dispatcher = make_dispatcher({})
+    dispatcher.submit(alert("a", "1"))
+    batch = AlertBatch(dispatcher, render, detected_at=0)
+    assert not batch.add("a", ("a", "src", "1"), "section 1", False, False)
+    assert batch.add("a", ("a", "src", "2"), "section 2", False, False)
+
+#########################################
+# Notification Dispatcher               #
+#########################################
+
+def test_counts_are_applied_per_delivery_and_written_once_per_burst():
+    async def scenario():
+        registry = FakeRegistry()
+        users = {"a": FakeUser(), "b": FakeUser()}
+        dispatcher = await deliver(make_dispatcher(users, registry), alert("a", "1"), alert("b", "2", finished=("2",)))
+        await dispatcher.stop()
+        return dispatcher, registry, users
+    dispatcher, registry, users = asyncio.run(scenario())
+    assert dispatcher.sent == 2 and dispatcher.failed == 0
+    assert len(registry.applied) == 2
+    assert len(registry.recorded) == 1
+    notified, finished = registry.recorded[0]
+    assert sorted(notified) == [("a", "src", "1"), ("b", "src", "2")]
+    assert finished == [("b", "src", "2")]
+
+def test_failed_flush_keeps_the_entries_and_the_workers():
+    async def scenario():
+        registry = FakeRegistry(fail_writes=1)
+        users = {"a": FakeUser()}
+        dispatcher = await deliver(make_dispatcher(users, registry), alert("a", "1"))
+        assert not registry.recorded
+        assert all(not worker.done() for worker in dispatcher._workers)
+        await deliver(dispatcher, alert("a", "2"))
+        await dispatcher.stop()
+        return registry, users
+    registry, users = asyncio.run(scenario())
+    assert len(users["a"].sent) == 2
+    assert [sorted(notified) for notified, _ in registry.recorded] == [[("a", "src", "1"), ("a", "src", "2")]]
+
+def test_rate_limited_send_is_retried():
+    async def scenario():
+        users = {"a": FakeUser([discord.HTTPException(FakeResponse(), "slow down")])}
+        dispatcher = await deliver(make_dispatcher(users), alert("a", "1"))
+        await dispatcher.stop()
+        return dispatcher, users
+    dispatcher, users = asyncio.run(scenario())
+    assert dispatcher.rate_limited == 1
+    assert dispatcher.sent == 1
+    assert len(users["a"].sent) == 1
+
+def test_failed_send_is_counted_and_the_queue_keeps_draining():
+    async def scenario():
+        users = {"a": FakeUser([RuntimeError("Cannot send messages to this user")]), "b": FakeUser()}
+        dispatcher = await deliver(make_dispatcher(users), alert("a", "1"), alert("b", "2"))
+        await dispatcher.stop()
+        return dispatcher, users
+    dispatcher, users = asyncio.run(scenario())
+    assert (dispatcher.sent, dispatcher.failed) == (1, 1)
+    assert users["b"].sent
+    assert not dispatcher.is_pending(("a", "src", "1"))
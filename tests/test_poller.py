@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from benchmarks.stub_soc import StubSOC, load_json
+from poller import AdaptiveCadence, TieredPoller, parse_windows
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+#########################################
+# Tiered Poller                         #
+#########################################
+
+def test_unknown_open_index_refreshes_the_catalog_early_then_revalidates():
+    """openSections.json lists 09999, which courses.json lacks: one early catalog refresh, then only 304s."""
+    async def scenario():
+        stub = StubSOC(load_json(os.path.join(FIXTURES, "courses.json")),
+                       load_json(os.path.join(FIXTURES, "openSections.json")))
+        base = await stub.start() + "/soc/api"
+        poller = TieredPoller(base + "/courses.json", base + "/openSections.json", min_catalog_refresh=0)
+        try:
+            polls = []
+            for _ in range(3):
+                snapshot = await poller.get(max_open_age=0)
+                polls.append((dict(stub.requests), stub.not_modified, list(poller.unknown), snapshot))
+        finally:
+            await poller.close()
+            await stub.stop()
+        return polls
+    first, second, third = asyncio.run(scenario())
+
+    requests, not_modified, unknown, snapshot = first
+    assert requests == {"courses": 1, "openSections": 1} and not_modified == 0
+    assert unknown == ["09999"]
+    assert snapshot.open_indexes() == ["09215", "09302", "11821"]  # openSections wins over the catalog's flags
+    assert snapshot.course_name("09302") == "198 211 - COMPUTER ARCHITECTURE"  # names come from courses.json
+
+    requests, not_modified, _, snapshot = second
+    assert requests == {"courses": 2, "openSections": 2}  # the early refresh
+    assert not_modified == 2  # both answered 304: nothing re-downloaded or re-parsed
+    assert snapshot is first[3]
+
+    requests, not_modified, _, snapshot = third
+    assert requests == {"courses": 2, "openSections": 3}  # the catalog is fresh again; only the open list is polled
+    assert not_modified == 3
+    assert snapshot is first[3]
+
+#########################################
+# Adaptive Cadence                      #
+#########################################
+
+def test_changed_polls_halve_the_interval_down_to_the_floor():
+    cadence = AdaptiveCadence(base_interval=8, min_interval=3, max_interval=60)
+    cadence.record_poll(changed=True)
+    assert cadence.current() == 4
+    cadence.record_poll(changed=True)
+    assert cadence.current() == 3
+    assert cadence.mode() == "adaptive"
+
+def test_unchanged_polls_grow_the_interval_up_to_the_cap():
+    cadence = AdaptiveCadence(base_interval=8, max_interval=15, growth=1.5)
+    cadence.record_poll(changed=False)
+    assert cadence.current() == 12
+    cadence.record_poll(changed=False)
+    assert cadence.current() == 15
+    assert (cadence.changes, cadence.polls) == (0, 2)
+
+def test_registration_window_pins_the_minimum_interval():
+    now = time.time()
+    cadence = AdaptiveCadence(base_interval=8, min_interval=2, windows=[(now - 60, now + 60)])
+    cadence.record_poll(changed=False)
+    assert cadence.in_window(now) and not cadence.in_window(now + 60)
+    assert cadence.mode() == "registration window"
+    assert cadence.current() == 2
+    cadence.windows = [(now - 120, now - 60)]
+    assert cadence.current() == 10
+
+def test_errors_back_off_until_the_next_good_poll():
+    cadence = AdaptiveCadence(base_interval=5, backoff_max=30)
+    cadence.record_error("HTTP 503")
+    assert (cadence.mode(), cadence.current()) == ("backoff", 10)
+    for _ in range(3):
+        cadence.record_error("HTTP 503")
+    assert cadence.current() == 30
+    cadence.record_poll(changed=False)
+    assert cadence.mode() == "adaptive"
+
+def test_override_beats_windows_and_backoff():
+    now = time.time()
+    cadence = AdaptiveCadence(windows=[(now - 60, now + 60)])
+    cadence.record_error("timeout")
+    cadence.override = 42
+    assert (cadence.mode(), cadence.current()) == ("override", 42)
+
+def test_parse_windows_reads_local_iso_ranges():
+    windows = parse_windows("2025-11-03T07:00/2025-11-03T12:00, ,2025-11-04T07:00/2025-11-04T08:30")
+    assert windows == [
+        (datetime(2025, 11, 3, 7).timestamp(), datetime(2025, 11, 3, 12).timestamp()),
+        (datetime(2025, 11, 4, 7).timestamp(), datetime(2025, 11, 4, 8, 30).timestamp()),
+    ]
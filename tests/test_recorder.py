@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from benchmarks.payloads import make_payload
+from catalog import CatalogSnapshot
+from recorder import CATALOG, OPEN_BITS, OPEN_FLIPS, SnapshotDecoder, SnapshotEncoder
+from soc_client import Source
+
+SOURCE = Source(2025, 9, "NB")
+
+def polls(count, seed=0):
+    """A first catalog, then ``count`` polls that each flip a few open flags, then a catalog refresh."""
+    rng = random.Random(seed)
+    snapshot = CatalogSnapshot.from_courses(make_payload(courses=40, seed=seed))
+    yield snapshot
+    for _ in range(count):
+        bits = bytearray(snapshot.open_bits)
+        for row in rng.sample(range(len(snapshot)), rng.randint(0, 3)):
+            bits[row >> 3] ^= 1 << (row & 7)
+        snapshot = snapshot.with_open_bits(bits)
+        yield snapshot
+    yield CatalogSnapshot.from_courses(make_payload(courses=45, seed=seed + 1))
+
+def assert_same(decoded, snapshot):
+    assert list(decoded.indexes) == list(snapshot.indexes)
+    assert decoded.open_bits == snapshot.open_bits
+    assert decoded.open_indexes() == snapshot.open_indexes()
+    for index_number in snapshot.open_indexes()[:5]:
+        assert decoded.course_name(index_number) == snapshot.course_name(index_number)
+
+@pytest.mark.parametrize("mode", ["diff", "full"])
+def test_round_trip(mode):
+    encoder, decoder = SnapshotEncoder(mode, keep_unchanged=True), SnapshotDecoder()
+    kinds = []
+    for snapshot in polls(20):
+        kind, body = encoder.encode(SOURCE, snapshot)
+        kinds.append(kind)
+        assert_same(decoder.decode(kind, SOURCE, body), snapshot)
+    assert kinds[0] == kinds[-1] == CATALOG
+    assert set(kinds[1:-1]) == {OPEN_FLIPS if mode == "diff" else OPEN_BITS}
+
+def test_unchanged_poll_decodes_to_the_same_object():
+    encoder, decoder = SnapshotEncoder("diff", keep_unchanged=True), SnapshotDecoder()
+    snapshot = next(polls(0))
+    kind, body = encoder.encode(SOURCE, snapshot)
+    first = decoder.decode(kind, SOURCE, body)
+    kind, body = encoder.encode(SOURCE, snapshot.with_open_bits(snapshot.open_bits))
+    assert (kind, body) == (OPEN_FLIPS, b"")
+    assert decoder.decode(kind, SOURCE, body) is first
+
+def test_unchanged_poll_is_skipped_without_keep_unchanged():
+    encoder = SnapshotEncoder("diff")
+    snapshot = next(polls(0))
+    assert encoder.encode(SOURCE, snapshot)[0] == CATALOG
+    assert encoder.encode(SOURCE, snapshot.with_open_bits(snapshot.open_bits)) is None
+
+def test_sources_are_encoded_independently():
+    other = Source(2026, 1, "NK")
+    encoder, decoder = SnapshotEncoder("diff"), SnapshotDecoder()
+    first, second = list(polls(1))[:2]
+    for source, snapshot in ((SOURCE, first), (other, first), (SOURCE, second)):
+        kind, body = encoder.encode(source, snapshot)
+        assert_same(decoder.decode(kind, source, body), snapshot)
+    assert decoder.current[other].open_bits == first.open_bits
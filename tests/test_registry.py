@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from catalog import SectionInfo
+from registry import Rule, SubscriptionRegistry
+from soc_client import Source
+from storage import Database
+
+SOURCE = Source(2025, 9, "NB")
+OTHER = Source(2026, 1, "NB")
+
+def section(subject, course_number, section_number):
+    return SectionInfo(subject, course_number, "TITLE", section_number, True)
+
+def run(tmp_path, scenario):
+    """Run ``scenario(registry)`` against a fresh database; returns its result."""
+    async def main():
+        db = Database(str(tmp_path / "snipes.db"))
+        await db.open()
+        registry = SubscriptionRegistry(db)
+        await registry.load()
+        try:
+            return await scenario(registry)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+#########################################
+# Rule Matching                         #
+#########################################
+
+def test_match_rules_groups_sections_by_course_subject_and_prefix(tmp_path):
+    course = Rule("1", SOURCE, "198", "211", "")
+    subject = Rule("2", SOURCE, "198", "", "")
+    honors = Rule("3", SOURCE, "198", "211", "H")
+    elsewhere = Rule("4", OTHER, "198", "", "")
+
+    async def scenario(registry):
+        for rule in (course, subject, honors, elsewhere):
+            await registry.add_rule(rule)
+        return registry.match_rules(SOURCE, [
+            ("09301", section("198", "211", "01")),
+            ("09302", section("198", "211", "H1")),
+            ("09214", section("198", "111", "01")),
+            ("11821", section("640", "151", "01")),
+        ])
+    matched = run(tmp_path, scenario)
+    assert matched == {
+        course: ["09301", "09302"],
+        subject: ["09301", "09302", "09214"],
+        honors: ["09302"],
+    }
+
+def test_rules_are_indexed_by_source_subject_and_course(tmp_path):
+    rules = [Rule("1", SOURCE, "198", "211", ""), Rule("1", SOURCE, "198", "", "9"), Rule("2", OTHER, "640", "151", "")]
+
+    async def scenario(registry):
+        for rule in rules:
+            await registry.add_rule(rule)
+        return dict(registry.rules), registry.sources(), registry.count_user_snipes("1")
+    index, sources, user_count = run(tmp_path, scenario)
+    assert index == {(SOURCE, "198", "211"): {rules[0]: 0}, (SOURCE, "198", ""): {rules[1]: 0}, (OTHER, "640", "151"): {rules[2]: 0}}
+    assert sources == {SOURCE, OTHER}
+    assert user_count == 2
+
+def test_duplicate_rule_is_rejected(tmp_path):
+    rule = Rule("1", SOURCE, "198", "", "")
+
+    async def scenario(registry):
+        await registry.add_rule(rule)
+        with pytest.raises(sqlite3.IntegrityError):
+            await registry.add_rule(rule)
+        await registry.remove_rule(rule)
+        return registry.has_rules(SOURCE), registry.match_rules(SOURCE, [("09301", section("198", "211", "01"))])
+    assert run(tmp_path, scenario) == (False, {})
+
+#########################################
+# Notification Bookkeeping              #
+#########################################
+
+def test_rule_notifications_are_counted_in_memory_and_persisted(tmp_path):
+    kept = Rule("1", SOURCE, "198", "211", "")
+    finished = Rule("2", SOURCE, "198", "", "")
+
+    async def scenario(registry):
+        await registry.add_rule(kept)
+        await registry.add_rule(finished)
+        await registry.add_snipe("1", SOURCE, "09301")
+        notified = [kept, finished, ("1", SOURCE, "09301")]
+        registry.apply_notifications(notified, [finished])
+        in_memory = registry.rule_sent(kept), registry.rules_of("2"), registry.subscribers_of(SOURCE, "09301")
+        await registry.record_notifications(notified, [finished])
+        reloaded = SubscriptionRegistry(registry.db)
+        await reloaded.load()
+        return in_memory, (reloaded.rule_sent(kept), reloaded.rules_of("2"), reloaded.subscribers_of(SOURCE, "09301"))
+    in_memory, reloaded = run(tmp_path, scenario)
+    assert in_memory == reloaded == (1, [], [("1", 1)])
+
+#########################################
+# User Configs                          #
+#########################################
+
+def test_ensure_config_uses_the_saved_settings(tmp_path):
+    async def scenario(registry):
+        await registry.db.set_user_config("1", "notif_limit", 2)
+        await registry.db.set_user_config("1", "tts_enabled", 1)
+        registry.configs.clear()  # as if loaded before the row was written
+        saved = await registry.ensure_config("1")
+        fresh = await registry.ensure_config("2")
+        return saved, fresh, await registry.db.get_user_config("2")
+    saved, fresh, row = run(tmp_path, scenario)
+    assert (saved.notif_limit, saved.tts_enabled, saved.max_snipes) == (2, 1, 10)
+    assert fresh.as_tuple() == tuple(row) == (10, 0, 0, 5, 0)
@@ -0,0 +1,120 @@
+import asyncio
+import os
+
+import pytest
+
+import discord_bot as bot
+from benchmarks.run import FakeInteraction
+from benchmarks.stub_soc import load_json
+from catalog import CatalogSnapshot
+from registry import Rule
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+SOURCE = bot.DEFAULT_SOURCE
+CATALOG = CatalogSnapshot.from_courses(load_json(os.path.join(FIXTURES, "courses.json")))
+
+class FakeUser:
+    id = 42
+    mention = "<@42>"
+
+@pytest.fixture
+def scanner(monkeypatch):
+    """The bot with storage loaded, its pollers kept idle and scan state reset."""
+    monkeypatch.setattr(bot.SCHEDULER, "reconcile", lambda: None)
+    monkeypatch.setattr(bot.SCHEDULER, "wake", lambda source: None)
+    monkeypatch.setattr(bot.SCHEDULER, "cached", lambda source: CATALOG)
+    async def get(source):
+        return CATALOG
+    monkeypatch.setattr(bot.SCHEDULER, "get", get)
+    asyncio.run(bot.initialize_storage())
+    bot.LAST_SNAPSHOTS.clear()
+    bot.PENDING_INDEXES.clear()
+    bot.PENDING_RULES.clear()
+    bot.LAST_NOTIFIED.clear()
+    yield bot
+    while not bot.DISPATCHER.queue.empty():
+        bot.DISPATCHER.queue.get_nowait()
+        bot.DISPATCHER.queue.task_done()
+    bot.DISPATCHER._pending.clear()
+    asyncio.run(bot.REGISTRY.clear_snipes("42"))
+
+def queued_alerts():
+    alerts = []
+    while not bot.DISPATCHER.queue.empty():
+        alerts.append(bot.DISPATCHER.queue.get_nowait())
+        bot.DISPATCHER.queue.task_done()
+    bot.DISPATCHER._pending.clear()
+    return alerts
+
+#########################################
+# Scan Pass                             #
+#########################################
+
+@pytest.mark.parametrize("typed", ["9302", "09302", " 09302"])
+def test_snipe_is_alerted_however_the_index_was_typed(scanner, typed):
+    opened = CATALOG
+    closed = opened.with_open_indexes([index for index in opened.open_indexes() if index != "09302"])[0]
+
+    async def scenario():
+        assert await bot.add_snipe("42", typed, SOURCE) is True
+        await bot.scan_courses(SOURCE, closed)  # baseline: the section is closed
+        assert not queued_alerts()
+        await bot.scan_courses(SOURCE, opened)
+        return queued_alerts()
+    alerts = asyncio.run(scenario())
+    assert [alert.keys for alert in alerts] == [(("42", SOURCE, "09302"),)]
+    assert "198 211 - COMPUTER ARCHITECTURE" in alerts[0].content
+
+def test_new_rule_is_alerted_for_sections_already_open(scanner):
+    rule = Rule("42", SOURCE, "198", "", "")
+
+    async def scenario():
+        await bot.scan_courses(SOURCE, CATALOG)  # baseline, before the rule exists
+        assert await bot.add_rule(rule) is True
+        await bot.scan_courses(SOURCE, CATALOG)  # nothing opened or closed since
+        first = queued_alerts()
+        await bot.scan_courses(SOURCE, CATALOG)
+        return first, queued_alerts()
+    first, second = asyncio.run(scenario())
+    assert [alert.keys for alert in first] == [(rule,)]
+    assert "09214" in first[0].content and "09302" in first[0].content and "11821" not in first[0].content
+    assert second == []  # checked once, then only transitions alert
+
+#########################################
+# Snipe Commands                        #
+#########################################
+
+def test_snipe_spellings_are_one_snipe(scanner):
+    async def scenario():
+        replies = []
+        for typed in ("9302", "09302", " 09302"):
+            interaction = FakeInteraction(FakeUser())
+            await bot.snipe.callback(interaction, typed)
+            replies.append(interaction.response.messages[-1][0])
+        return replies
+    first, second, third = asyncio.run(scenario())
+    assert first.startswith("✅") and "index 09302" in first
+    assert second.startswith("⚠️") and third.startswith("⚠️")
+    assert bot.REGISTRY.snipes_of("42") == [(SOURCE, "09302")]
+
+def test_remove_snipe_accepts_any_spelling(scanner):
+    async def scenario():
+        await bot.add_snipe("42", "09302", SOURCE)
+        await bot.remove_snipe.callback(FakeInteraction(FakeUser()), "9302")
+    asyncio.run(scenario())
+    assert bot.REGISTRY.snipes_of("42") == []
+
+#########################################
+# Warm Restart                          #
+#########################################
+
+def test_missing_or_corrupt_snapshots_start_cold(scanner, monkeypatch, tmp_path):
+    corrupt, missing = bot.Source(2025, 1, "NB"), bot.Source(2025, 7, "NK")
+    store = bot.SnapshotStore(str(tmp_path))
+    monkeypatch.setattr(bot, "SNAPSHOT_STORE", store)
+    (tmp_path / f"{corrupt.year}-{corrupt.term}-{corrupt.campus}.snapshot").write_bytes(b"\0" * 64)
+    monkeypatch.setattr(store, "sources", lambda: [corrupt, missing])
+    bot.restore_snapshots()
+    assert corrupt not in bot.LAST_SNAPSHOTS and missing not in bot.LAST_SNAPSHOTS
+    assert bot.SCHEDULER.poller(corrupt).snapshot is None
+    assert bot.SCHEDULER.poller(corrupt).catalog_client.data is None
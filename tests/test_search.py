@@ -0,0 +1,59 @@
+from catalog import CatalogSnapshot
+from search import CatalogSearch, SearchIndex
+
+COURSES = [
+    {"subject": "198", "courseNumber": "111", "title": "INTRO COMPUTER SCI", "sections": [
+        {"index": "09214", "number": "01", "openStatus": False},
+        {"index": "09215", "number": "02", "openStatus": True},
+    ]},
+    {"subject": "198", "courseNumber": "211", "title": "COMPUTER ARCHITECTURE", "sections": [
+        {"index": "09302", "number": "01", "openStatus": True},
+    ]},
+    {"subject": "640", "courseNumber": "151", "title": "CALCULUS I", "sections": [
+        {"index": "11821", "number": "01", "openStatus": False},
+    ]},
+]
+
+def indexes(search, query):
+    return [search.describe(row).split(" · ")[0] for row in search.search(query)]
+
+#########################################
+# Catalog Search                        #
+#########################################
+
+def test_title_prefix_ranks_open_sections_first():
+    search = CatalogSearch(CatalogSnapshot.from_courses(COURSES))
+    assert indexes(search, "comp") == ["09215", "09302", "09214"]
+    assert indexes(search, "198 arch") == ["09302"]
+    assert indexes(search, "CALC") == ["11821"]
+    assert indexes(search, "biology") == []
+
+def test_numeric_prefix_matches_indexes_and_courses():
+    search = CatalogSearch(CatalogSnapshot.from_courses(COURSES))
+    assert indexes(search, "0921") == ["09214", "09215"]
+    assert indexes(search, "151") == ["11821"]
+    assert indexes(search, "198:111") == ["09215", "09214"]
+
+def test_trailing_number_picks_the_section():
+    search = CatalogSearch(CatalogSnapshot.from_courses(COURSES))
+    assert indexes(search, "198:111 01") == ["09214"]
+    assert indexes(search, "198:111 2") == ["09215"]
+    assert indexes(search, "198:111 02") == ["09215"]
+
+def test_describe_fits_an_autocomplete_choice():
+    search = CatalogSearch(CatalogSnapshot.from_courses(COURSES))
+    assert search.describe(search.search("09302")[0]) == "09302 · 198:211 COMPUTER ARCHITECTURE sec 01 (open)"
+
+#########################################
+# Per-Source Search Index               #
+#########################################
+
+def test_search_index_rebuilds_only_on_a_new_layout():
+    search_index = SearchIndex()
+    snapshot = CatalogSnapshot.from_courses(COURSES)
+    search = search_index.get("NB", snapshot)
+    reopened, _ = snapshot.with_open_indexes(["09214"])
+    assert search_index.get("NB", reopened) is search
+    assert indexes(search, "comp") == ["09214", "09215", "09302"]  # open flags follow the newer snapshot
+    assert search_index.get("NK", snapshot) is not search
+    assert search_index.get("NB", CatalogSnapshot.from_courses(COURSES)) is not search
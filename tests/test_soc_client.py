@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from soc_client import CircuitBreaker, SOCUnavailableError
+
+#########################################
+# Circuit Breaker                       #
+#########################################
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure("HTTP 503")
+    assert breaker.state == "closed"
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == "open"
+    assert breaker.opens == 1
+    assert not breaker.allow()
+    assert "circuit open" in str(SOCUnavailableError(breaker))
+    assert "HTTP 503" in breaker.describe()
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    breaker.record_success()
+    breaker.record_failure("timeout")
+    assert breaker.state == "closed"
+
+def test_half_open_allows_a_single_probe_that_closes_on_success():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure("HTTP 500")
+    breaker.retry_at = time.time() - 1  # the reset timeout has passed
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    assert not breaker.allow()  # the probe is already out
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+@pytest.mark.parametrize("attempts", [1, 3])
+def test_failed_probe_reopens_with_a_longer_timeout(attempts):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10, max_reset_timeout=25)
+    breaker.record_failure("HTTP 500")
+    for _ in range(attempts):
+        breaker.retry_at = time.time() - 1
+        assert breaker.allow()
+        breaker.record_failure("HTTP 500")
+        assert breaker.state == "open"
+    assert breaker.opens == attempts + 1
+    assert breaker.retry_at - time.time() == pytest.approx(min(10 * 2 ** attempts, 25), abs=1)
+
+def test_release_frees_the_probe_without_a_verdict():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure("HTTP 500")
+    breaker.retry_at = time.time() - 1
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
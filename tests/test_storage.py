@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from registry import SubscriptionRegistry, UserConfig
+from soc_client import Source
+from storage import LEGACY_SOURCE, MIGRATIONS, Database, _normalize_index_numbers, migrate
+
+# The oldest schema the bot created before migrations existed: user_version 0, snipes not keyed
+# by source and user_configs without the notification columns.
+BASELINE_SCHEMA = """
+    CREATE TABLE snipes (
+        discord_id TEXT,
+        index_number TEXT,
+        notifications_sent INTEGER DEFAULT 0,
+        UNIQUE(discord_id, index_number)
+    );
+    CREATE TABLE user_configs (
+        discord_id TEXT PRIMARY KEY,
+        max_snipes INTEGER DEFAULT 10,
+        banned INTEGER DEFAULT 0,
+        is_mod INTEGER DEFAULT 0
+    );
+"""
+
+def migrated_to(step):
+    """An in-memory database with every migration before ``step`` applied."""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    for number, migration in enumerate(MIGRATIONS[:MIGRATIONS.index(step)], start=1):
+        migration(conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+    return conn
+
+#########################################
+# Schema Migrations                     #
+#########################################
+
+def test_index_numbers_are_zero_padded_and_merged():
+    conn = migrated_to(_normalize_index_numbers)
+    conn.executemany("INSERT INTO snipes (discord_id, year, term, campus, index_number, notifications_sent) VALUES (?, 2025, 9, 'NB', ?, ?)",
+                     [("1", "9302", 2), ("1", "09302", 1), ("2", "9302", 0), ("3", "11821", 4), ("4", "abc", 0)])
+    migrate(conn)
+    rows = conn.execute("SELECT discord_id, index_number, notifications_sent FROM snipes ORDER BY discord_id").fetchall()
+    assert rows == [("1", "09302", 2), ("2", "09302", 0), ("3", "11821", 4), ("4", "abc", 0)]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+
+def test_rules_table_treats_wildcards_as_equal():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    migrate(conn)
+    insert = "INSERT INTO rules (discord_id, year, term, campus, subject) VALUES ('1', 2025, 9, 'NB', '198')"
+    conn.execute(insert)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(insert)  # course_number and sections default to "" (any), so this is the same rule
+    conn.execute("INSERT INTO rules (discord_id, year, term, campus, subject, course_number) VALUES ('1', 2025, 9, 'NB', '198', '211')")
+    assert conn.execute("SELECT subject, course_number, sections, notifications_sent FROM rules ORDER BY course_number").fetchall() == \
+           [("198", "", "", 0), ("198", "211", "", 0)]
+
+def test_baseline_database_upgrades_and_keeps_its_rows(tmp_path):
+    path = str(tmp_path / "snipes.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        conn.executemany("INSERT INTO snipes VALUES (?, ?, ?)", [("1", "09214", 2), ("1", "9302", 0), ("2", "09214", 4)])
+        conn.execute("INSERT INTO user_configs VALUES ('1', 25, 0, 1)")
+    conn.close()
+
+    async def upgrade():
+        db = Database(path)
+        await db.open()
+        registry = SubscriptionRegistry(db)
+        await registry.load()
+        version = (await db.fetchone("PRAGMA user_version"))[0]
+        columns = [row[1] for row in await db.fetchall("PRAGMA table_info(snipes)")]
+        await db.close()
+        return registry, version, columns
+    registry, version, columns = asyncio.run(upgrade())
+    legacy = Source(*LEGACY_SOURCE)
+    assert version == len(MIGRATIONS)
+    assert columns == ["discord_id", "year", "term", "campus", "index_number", "notifications_sent"]
+    assert sorted(registry.all_snipes()) == [("1", legacy, "09214", 2), ("1", legacy, "09302", 0), ("2", legacy, "09214", 4)]
+    assert registry.configs == {"1": UserConfig(max_snipes=25, banned=0, is_mod=1, notif_limit=5, tts_enabled=0)}
+
+def test_migrations_are_idempotent_across_restarts(tmp_path):
+    path = str(tmp_path / "snipes.db")
+    for _ in range(2):
+        conn = sqlite3.connect(path, isolation_level=None)
+        migrate(conn)
+        conn.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
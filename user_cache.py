@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+#########################################
+# User and DM Channel Cache             #
+#########################################
+
+class UserCache:
+    """Bounded LRU + TTL cache of resolved users and their DM channels.
+
+    Lookups try this cache, then the gateway cache (``client.get_user``), and
+    only fall back to a REST ``fetch_user`` on a miss. Concurrent misses for
+    the same user share one request.
+    """
+
+    def __init__(self, client, maxsize=10000, ttl=3600):
+        self.client = client
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.gateway_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # discord_id -> [expires_at, user, dm_channel]
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, user, dm_channel=None):
+        self._entries[key] = [time.monotonic() + self.ttl, user, dm_channel]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _resolve(self, key):
+        user = self.client.get_user(int(key))
+        if user is not None:
+            self.gateway_hits += 1
+        else:
+            self.misses += 1
+            user = await self.client.fetch_user(int(key))
+        self._store(key, user, getattr(user, "dm_channel", None))
+        return user
+
+    async def _single_flight(self, flight_key, fn, key):
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = self._inflight[flight_key] = asyncio.ensure_future(fn(key))
+            task.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        return await asyncio.shield(task)
+
+    async def get_user(self, discord_id):
+        key = str(int(discord_id))  # ValueError for non-numeric identifiers, as fetch_user would
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        return await self._single_flight(("user", key), self._resolve, key)
+
+    async def _open_dm(self, key):
+        user = await self.get_user(key)
+        channel = user.dm_channel or await user.create_dm()
+        entry = self._lookup(key)
+        if entry is not None:
+            entry[2] = channel
+        else:
+            self._store(key, user, channel)
+        return channel
+
+    async def get_dm_channel(self, discord_id):
+        """Return a channel to DM the user through, opening it once if needed."""
+        key = str(int(discord_id))
+        entry = self._lookup(key)
+        if entry is not None and entry[2] is not None:
+            self.hits += 1
+            return entry[2]
+        return await self._single_flight(("dm", key), self._open_dm, key)
+
+    async def get_users(self, discord_ids, concurrency=10):
+        """Resolve many users at once, at most ``concurrency`` REST lookups in flight. Returns {id: user or None}."""
+        semaphore = asyncio.Semaphore(concurrency)
+        async def resolve(discord_id):
+            async with semaphore:
+                try:
+                    return await self.get_user(discord_id)
+                except Exception:
+                    return None
+        discord_ids = list(dict.fromkeys(discord_ids))
+        return dict(zip(discord_ids, await asyncio.gather(*(resolve(discord_id) for discord_id in discord_ids))))
+
+    def invalidate(self, discord_id):
+        self._entries.pop(str(discord_id), None)
+
+    async def prewarm(self, discord_ids, concurrency=10):
+        """Resolve users and open their DM channels ahead of the first alert."""
+        semaphore = asyncio.Semaphore(concurrency)
+        async def warm(discord_id):
+            async with semaphore:
+                try:
+                    await self.get_dm_channel(discord_id)
+                    return True
+                except Exception as e:
+                    log.warning("⚠️ Could not prewarm user %s: %s", discord_id, e)
+                    return False
+        results = await asyncio.gather(*(warm(discord_id) for discord_id in discord_ids))
+        log.info("🔥 Prewarmed %d/%d user(s) and DM channel(s).", sum(results), len(results))
+
+    def stats(self):
+        return f"{self.hits} hits, {self.gateway_hits} gateway, {self.misses} REST misses ({len(self)} cached)"
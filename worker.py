@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from metrics import TASK_RESTARTS
+from poller import PollerScheduler
+from recorder import CATALOG, RECORD_HEADER, SnapshotDecoder, SnapshotEncoder, encode_record
+from snapshot_store import SnapshotStore
+from soc_client import Source
+import logs
+
+log = logging.getLogger(__name__)
+
+#########################################
+# Poller Worker Process                 #
+#########################################
+
+# The socket carries recorder records (see recorder.py) from the worker to the bot,
+# plus JSON control messages in both directions.
+CONTROL = 0  # body: one JSON object; no source
+
+class WorkerUnavailableError(Exception):
+    """Raised by RemoteScheduler.get when the poller worker cannot supply a source."""
+
+def encode_control(message):
+    return encode_record(CONTROL, "", json.dumps(message).encode(), time.time())
+
+async def read_record(reader):
+    """Read one (kind, timestamp, source, body) record; raises IncompleteReadError at EOF."""
+    kind, timestamp, source_length, body_length = RECORD_HEADER.unpack(await reader.readexactly(RECORD_HEADER.size))
+    source_text = (await reader.readexactly(source_length)).decode()
+    body = await reader.readexactly(body_length)
+    return kind, timestamp, Source.parse(source_text) if kind != CONTROL else None, body
+
+class PollerWorker:
+    """Fetches, parses and diffs SOC data in its own process for one or more bots.
+
+    Bots connect over a Unix socket and send a ``configure`` message (the
+    scheduler settings, so they live in one place), then the set of sources
+    they need; the worker polls the union. Every poll is published to each
+    bot as a record: the whole catalog the first time and after a refresh,
+    afterwards only the rows whose open flag flipped (an empty record for
+    an unchanged poll), followed by a status message with the cadence.
+    Snapshots are saved and restored here, since only the worker holds the
+    downloaded catalogs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.scheduler = None
+        self.store = None
+        self.save_interval = 10
+        self.reconcile_interval = 10  # seconds between checks for crashed source pollers
+        self.saved = {}    # source -> (snapshot last written, when)
+        self.clients = {}  # writer -> [SnapshotEncoder, wanted sources]
+
+    def configure(self, config):
+        if self.scheduler is not None:
+            return  # the first bot's settings win; pollers keep their caches
+        windows = [tuple(window) for window in config["cadence_options"].pop("windows", ())]
+        self.scheduler = PollerScheduler(config["api_base"], self.publish, self.wanted,
+                                         open_interval=config["open_interval"], catalog_interval=config["catalog_interval"],
+                                         timeout=config["timeout"], pool_size=config["pool_size"],
+                                         cadence_options=dict(config["cadence_options"], windows=windows),
+                                         breaker_options=config.get("breaker_options"))
+        if config.get("snapshot_dir"):
+            self.store = SnapshotStore(config["snapshot_dir"])
+            self.save_interval = config.get("snapshot_save_interval", self.save_interval)
+            self.restore()
+        log.info("🛠️ Worker configured for %s.", config["api_base"])
+
+    def restore(self):
+        for source in self.store.sources():
+            try:
+                state = self.store.load(source)
+                if state is None:
+                    continue
+                snapshot = self.scheduler.poller(source).restore_state(*state)
+            except Exception as e:
+                log.warning("⚠️ Ignoring unreadable snapshot of %s: %s", source.label, e)
+                continue
+            self.saved[source] = (snapshot, time.time())
+            log.info("💽 Restored %s: %d sections, %d open.", source.label, len(snapshot), snapshot.open_count)
+
+    async def save(self, source):
+        saved, saved_at = self.saved.get(source, (None, 0))
+        poller = self.scheduler.poller(source)
+        if self.store is None or poller.snapshot is saved or time.time() - saved_at < self.save_interval:
+            return
+        state = poller.export_state()
+        if state is None:
+            return
+        self.saved[source] = (poller.snapshot, time.time())
+        try:
+            await asyncio.to_thread(self.store.save, source, state)
+        except Exception as e:
+            log.warning("⚠️ Could not save the snapshot of %s: %s", source.label, e)
+
+    def wanted(self):
+        return set().union(*(sources for _, sources in self.clients.values()))
+
+    def status(self, source):
+        poller = self.scheduler.poller(source)
+        return {"source": str(source), "running": self.scheduler.is_running(source),
+                "cadence": self.scheduler.cadence(source).describe(),
+                "timestamp": poller.timestamp, "catalog_timestamp": poller.catalog_client.timestamp}
+
+    async def publish(self, source, snapshot):
+        """on_snapshot of the worker's scheduler: send the poll to every bot that wants ``source``."""
+        now = time.time()
+        for writer, (encoder, sources) in list(self.clients.items()):
+            if source not in sources:
+                continue
+            kind, body = encoder.encode(source, snapshot)
+            writer.write(encode_record(kind, source, body, now))
+            writer.write(encode_control({"status": self.status(source)}))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                self.clients.pop(writer, None)
+        await self.save(source)
+
+    async def fetch(self, source, writer):
+        """Send one bot a source it asked for but does not poll (e.g. for name lookups)."""
+        try:
+            snapshot = await self.scheduler.get(source)
+        except Exception as e:
+            writer.write(encode_control({"unavailable": str(source), "error": str(e)}))
+            return
+        if writer not in self.clients:
+            return
+        kind, body = self.clients[writer][0].encode(source, snapshot)
+        writer.write(encode_record(kind, source, body, self.scheduler.poller(source).timestamp))
+        writer.write(encode_control({"status": self.status(source)}))
+
+    async def handle(self, message, writer):
+        if "configure" in message:
+            self.configure(message["configure"])
+        if self.scheduler is None:
+            return
+        if "sources" in message:
+            self.clients[writer][1] = {Source.parse(text) for text in message["sources"]}
+            self.scheduler.reconcile()
+            for source in self.clients[writer][1]:
+                snapshot = self.scheduler.cached(source)
+                if snapshot is not None:
+                    # Give a new (or reconnected) bot the current state right away instead of at the next poll.
+                    kind, body = self.clients[writer][0].encode(source, snapshot)
+                    writer.write(encode_record(kind, source, body, self.scheduler.poller(source).timestamp))
+                    writer.write(encode_control({"status": self.status(source)}))
+        if "fetch" in message:
+            asyncio.create_task(self.fetch(Source.parse(message["fetch"]), writer))
+        if "wake" in message:
+            source = Source.parse(message["wake"])
+            if "override" in message:
+                self.scheduler.cadence(source).override = message["override"]
+            self.scheduler.wake(source)
+
+    async def serve_client(self, reader, writer):
+        self.clients[writer] = [SnapshotEncoder("diff", keep_unchanged=True), set()]
+        log.info("🔌 Bot connected (%d connected).", len(self.clients))
+        try:
+            while True:
+                kind, _, _, body = await read_record(reader)
+                if kind == CONTROL:
+                    await self.handle(json.loads(body), writer)
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+            if self.scheduler is not None:
+                self.scheduler.reconcile()
+            log.info("🔌 Bot disconnected (%d connected).", len(self.clients))
+
+    async def keep_pollers_running(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            if self.scheduler is not None:
+                self.scheduler.reconcile()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # left behind by a previous run
+        server = await asyncio.start_unix_server(self.serve_client, self.path)
+        log.info("🚀 Poller worker listening on %s", self.path)
+        supervisor = asyncio.create_task(self.keep_pollers_running())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            supervisor.cancel()
+            if self.scheduler is not None:
+                await self.scheduler.close()
+
+#########################################
+# Bot Side: Remote Scheduler            #
+#########################################
+
+class RemoteCadence:
+    """Stands in for a source's AdaptiveCadence when the worker owns it."""
+
+    def __init__(self, scheduler, source):
+        self.scheduler = scheduler
+        self.source = source
+        self.status = None
+        self._override = None
+
+    @property
+    def override(self):
+        return self._override
+
+    @override.setter
+    def override(self, seconds):
+        self._override = seconds
+        self.scheduler.send({"wake": str(self.source), "override": seconds})
+
+    def describe(self):
+        return self.status or "waiting for the poller worker"
+
+class RemoteScheduler(PollerScheduler):
+    """PollerScheduler interface backed by a PollerWorker over a Unix socket.
+
+    The bot keeps a local TieredPoller per source only as a holder for the
+    latest snapshot and timestamps; polling, parsing and diffing happen in
+    the worker. ``on_snapshot`` still runs once per poll, in this process,
+    with snapshots rebuilt from the worker's records. Lookups of a source
+    the bot does not poll are fetched by the worker too; the bot never
+    downloads from the SOC itself.
+    """
+
+    def __init__(self, path, *args, reconnect_delay=1, snapshot_dir=None, snapshot_save_interval=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_save_interval = snapshot_save_interval
+        self.connected = False
+        self._writer = None
+        self._wanted = None
+        self._fetches = {}  # source -> future resolved by the worker's next record of it
+        self._connection = None
+
+    def cadence(self, source):
+        cadence = self.cadences.get(source)
+        if cadence is None:
+            cadence = self.cadences[source] = RemoteCadence(self, source)
+        return cadence
+
+    async def get(self, source):
+        """Latest snapshot of ``source`` from the worker (or a restored one), asking the worker for it if needed.
+
+        Waits at most twice the SOC timeout, and only when there is no copy at all.
+        """
+        poller = self.poller(source)
+        stale = time.time() - poller.open_client.timestamp > self.open_interval
+        if poller.snapshot is not None and (self.is_running(source) or not stale):
+            return poller.snapshot
+        if not self.connected:
+            if poller.snapshot is not None:
+                return poller.snapshot
+            raise WorkerUnavailableError(f"No data for {source.label}: the poller worker at {self.path} is not connected")
+        fetch = self._fetches.get(source)
+        if fetch is None:
+            fetch = self._fetches[source] = asyncio.get_running_loop().create_future()
+            self.send({"fetch": str(source)})
+        if poller.snapshot is not None:
+            return poller.snapshot  # served as it is; the worker's reply replaces it
+        try:
+            return await asyncio.wait_for(asyncio.shield(fetch), self.timeout * 2)
+        except asyncio.TimeoutError:
+            self._fetches.pop(source, None)
+            raise WorkerUnavailableError(f"The poller worker did not send {source.label} within {self.timeout * 2:.0f}s") from None
+
+    def is_running(self, source):
+        return self.connected and source in (self._wanted or ())
+
+    def send(self, message):
+        if self._writer is not None:
+            self._writer.write(encode_control(message))
+
+    def wake(self, source):
+        self.send({"wake": str(source)})
+
+    def reconcile(self):
+        if self._connection is not None and self._connection.done():
+            error = self._connection.exception() if not self._connection.cancelled() else "cancelled"
+            log.error("🔥 Poller worker connection stopped (%s); restarting it.", error)
+            TASK_RESTARTS.inc(1, "worker connection")
+            self._connection = None
+        if self._connection is None:
+            self._connection = asyncio.create_task(self._run_connection())
+        wanted = set(self.active_sources())
+        if wanted != self._wanted and self._writer is not None:
+            self.send({"sources": sorted(str(source) for source in wanted)})
+            self._wanted = wanted
+
+    def breaker_status(self):
+        if self.connected:
+            return None, "kept by the poller worker (see its log)"
+        return super().breaker_status()
+
+    def configuration(self):
+        options = dict(self.cadence_options)
+        options["windows"] = [list(window) for window in options.get("windows", ())]
+        return {"api_base": self.api_base, "open_interval": self.open_interval, "catalog_interval": self.catalog_interval,
+                "timeout": self.timeout, "pool_size": self.pool.limit, "cadence_options": options,
+                "breaker_options": self.breaker_options,
+                "snapshot_dir": self.snapshot_dir, "snapshot_save_interval": self.snapshot_save_interval}
+
+    async def receive(self, kind, timestamp, source, body, decoder):
+        if kind == CONTROL:
+            message = json.loads(body)
+            if "unavailable" in message:
+                fetch = self._fetches.pop(Source.parse(message["unavailable"]), None)
+                if fetch is not None and not fetch.done():
+                    fetch.set_exception(WorkerUnavailableError(message["error"]))
+                    fetch.exception()  # retrieved here too, in case nobody is waiting
+            status = message.get("status")
+            if status:
+                source = Source.parse(status["source"])
+                self.cadence(source).status = status["cadence"]
+                self.poller(source).catalog_client.timestamp = status["catalog_timestamp"]
+            return
+        snapshot = decoder.decode(kind, source, body)
+        poller = self.poller(source)
+        poller.snapshot = snapshot
+        poller.open_client.timestamp = timestamp
+        if kind == CATALOG:
+            poller.catalog_client.timestamp = timestamp
+        fetch = self._fetches.pop(source, None)
+        if fetch is not None and not fetch.done():
+            fetch.set_result(snapshot)
+        if source not in (self._wanted or ()):
+            return  # a lookup the bot asked for, not a poll to scan
+        try:
+            await self.on_snapshot(source, snapshot)
+        except Exception as e:
+            log.exception("🔥 Scan of %s failed: %s", source.label, e)
+
+    async def _run_connection(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                log.warning("🔌 Poller worker at %s unavailable (%s); retrying in %ss.", self.path, e, self.reconnect_delay)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            log.info("🔌 Connected to the poller worker at %s.", self.path)
+            self.connected, self._wanted = True, None
+            self.send({"configure": self.configuration()})
+            self.reconcile()
+            decoder = SnapshotDecoder()
+            try:
+                while True:
+                    await self.receive(*await read_record(reader), decoder)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                log.warning("🔌 Lost the poller worker: %s", e or "connection closed")
+            finally:
+                self.connected, self._writer = False, None
+                for cadence in self.cadences.values():
+                    cadence.status = None
+                for fetch in self._fetches.values():
+                    if not fetch.done():
+                        fetch.set_exception(WorkerUnavailableError("Lost the poller worker"))
+                        fetch.exception()
+                self._fetches = {}
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def close(self):
+        if self._connection is not None:
+            self._connection.cancel()
+            await asyncio.gather(self._connection, return_exceptions=True)
+            self._connection = None
+        if self._writer is not None:
+            self._writer.close()
+        await super().close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll the SOC API for discord_bot.py in a separate process.")
+    parser.add_argument("--socket", default=os.getenv("POLLER_WORKER_SOCKET", "poller.sock"), help="Unix socket to listen on")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"))
+    args = parser.parse_args()
+    logs.setup_logging(args.log_level, os.getenv("LOG_FORMAT", "text"))
+    try:
+        asyncio.run(PollerWorker(args.socket).serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()